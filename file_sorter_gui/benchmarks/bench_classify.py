@@ -0,0 +1,71 @@
+"""Micro-benchmark: per-file classification cost as the rule set grows.
+
+Compares the old linear scan over (category, extensions) pairs with the
+compiled RuleIndex lookup.
+
+Run from the file_sorter_gui/ directory:
+    python benchmarks/bench_classify.py
+"""
+import pathlib
+import random
+import sys
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.file_rules import compile_rules
+
+RULE_SIZES = [10, 50, 200, 500, 1000]
+EXTENSIONS_PER_CATEGORY = 10
+SAMPLE_FILES = 20000
+
+
+def make_rules(extension_count):
+    """Builds a synthetic rule set with extension_count extensions."""
+    rules = {}
+    for i in range(extension_count):
+        category = f"Category{i // EXTENSIONS_PER_CATEGORY}"
+        rules.setdefault(category, []).append(f".e{i}")
+    return rules
+
+
+def make_filenames(extension_count, count, seed=1234):
+    """Builds file names hitting random rules, plus ~10% unknown extensions."""
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        if rng.random() < 0.1:
+            names.append(f"file{i}.unknown")
+        else:
+            names.append(f"file{i}.e{rng.randrange(extension_count)}")
+    return names
+
+
+def linear_classify(rules, filename):
+    """The pre-index classification loop, kept here for comparison."""
+    file_extension = pathlib.Path(filename).suffix.lower()
+    for category, extensions in rules.items():
+        if file_extension in extensions:
+            return category
+    return None
+
+
+def main():
+    print(f"{'extensions':>10} {'linear ns/file':>15} {'index ns/file':>14} {'speedup':>8}")
+    for size in RULE_SIZES:
+        rules = make_rules(size)
+        names = make_filenames(size, SAMPLE_FILES)
+        index = compile_rules(rules)
+
+        linear = min(timeit.repeat(lambda: [linear_classify(rules, n) for n in names], number=1, repeat=3))
+        indexed = min(timeit.repeat(lambda: [index.classify(n) for n in names], number=1, repeat=3))
+
+        linear_ns = linear / len(names) * 1e9
+        indexed_ns = indexed / len(names) * 1e9
+        print(f"{size:>10} {linear_ns:>15.0f} {indexed_ns:>14.0f} {linear_ns / indexed_ns:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
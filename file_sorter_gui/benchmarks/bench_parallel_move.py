@@ -0,0 +1,71 @@
+"""Benchmark: serial vs. parallel execution of a sort plan.
+
+Builds a synthetic flat directory of small files (100k by default), then sorts
+a fresh copy of it once per worker count and reports files/s.
+
+Run from the file_sorter_gui/ directory:
+    python benchmarks/bench_parallel_move.py --files 100000 --workers 1 4 8 16
+Point --base-dir at a network share or slow disk to see where threads help.
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.planner import plan_sort
+from sorter.sorter_engine import execute_plan, logger as sorter_logger
+
+EXTENSIONS = [".jpg", ".png", ".pdf", ".txt", ".mp3", ".mp4", ".zip", ".py", ".xyz"]
+
+
+def make_tree(root, file_count):
+    """Creates file_count small files directly inside root."""
+    os.makedirs(root)
+    for i in range(file_count):
+        with open(os.path.join(root, f"file{i:07d}{EXTENSIONS[i % len(EXTENSIONS)]}"), "wb") as f:
+            f.write(b"x" * 64)
+
+
+def run_once(base_dir, file_count, workers):
+    src_dir = os.path.join(base_dir, f"src_w{workers}")
+    make_tree(src_dir, file_count)
+    plan = plan_sort(src_dir)
+    start = time.perf_counter()
+    moved, skipped = execute_plan(plan, workers=workers, log_each_file=False)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(src_dir)
+    return moved, skipped, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100_000, help="Number of files in the synthetic tree.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16], help="Worker counts to compare.")
+    parser.add_argument("--base-dir", default=None, help="Where to build the trees (defaults to a temp dir).")
+    args = parser.parse_args()
+
+    # Keep log output out of the measurement
+    sorter_logger.setLevel(logging.WARNING)
+
+    base_dir = tempfile.mkdtemp(prefix="sorter_bench_", dir=args.base_dir)
+    try:
+        print(f"{'workers':>7} {'moved':>8} {'seconds':>8} {'files/s':>10} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            moved, skipped, elapsed = run_once(base_dir, args.files, workers)
+            rate = moved / elapsed if elapsed else float("inf")
+            baseline = baseline or rate
+            print(f"{workers:>7} {moved:>8} {elapsed:>8.2f} {rate:>10.0f} {rate / baseline:>7.2f}x")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
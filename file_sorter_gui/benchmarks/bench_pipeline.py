@@ -0,0 +1,208 @@
+"""Benchmark: the sort pipeline phase by phase, on a synthetic workload.
+
+Generates a fresh tree for every repetition (see workload.py), then times
+scanning, classifying (planning), optional dedupe, and moving separately and
+reports files/s and bytes/s per phase. Results are written as JSON, so runs
+from different commits can be compared:
+
+Run from the file_sorter_gui/ directory:
+    python benchmarks/bench_pipeline.py --preset downloads --repeat 3
+    python benchmarks/bench_pipeline.py --preset downloads --compare benchmarks/results/OLD.json
+
+With --compare the exit status is 1 if a phase got slower by more than
+--threshold, so it can gate a change. Only compare runs of the same workload
+on the same machine; scan times also depend on how warm the OS caches are.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from workload import add_arguments, generate, spec_from_args
+from sorter.dedupe import dedupe_plan
+from sorter.file_rules import compile_rules
+from sorter.planner import SortPlan, _plan_entry, category_folders
+from sorter.scanner import walk_directory
+from sorter.sniffer import ContentSniffer
+from sorter.sorter_engine import execute_plan, logger as sorter_logger
+from sorter.utils import NameRegistry
+
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+PHASES = ("scan", "classify", "dedupe", "move")
+
+
+def run_once(base_dir, spec, repetition, options):
+    """Builds one tree and sorts it; returns ({phase: seconds}, moved, skipped, workload)."""
+    src_dir = os.path.join(base_dir, f"run{repetition}")
+    workload = generate(src_dir, spec)
+    rule_index = compile_rules(None)
+    timings = {}
+
+    start = time.perf_counter()
+    if options["recursive"]:
+        scanned = list(walk_directory(src_dir, exclude=category_folders(src_dir, rule_index)))
+    else:
+        scanned = list(walk_directory(src_dir, max_depth=0))
+    timings["scan"] = time.perf_counter() - start
+
+    sniffer = ContentSniffer() if options["sniff"] else None
+    start = time.perf_counter()
+    if sniffer is not None:
+        scanned = list(sniffer.prefetch(scanned))
+    registry = NameRegistry()
+    plan = SortPlan(src_dir, [_plan_entry(entry, prune_reason, src_dir, rule_index, registry, sniffer)
+                              for entry, prune_reason in scanned], registry)
+    timings["classify"] = time.perf_counter() - start
+    if sniffer is not None:
+        sniffer.close()
+
+    if options["dedupe"]:
+        start = time.perf_counter()
+        plan, _ = dedupe_plan(plan, options["dedupe"])
+        timings["dedupe"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    moved, skipped = execute_plan(plan, workers=options["workers"], log_each_file=False)
+    timings["move"] = time.perf_counter() - start
+    shutil.rmtree(src_dir)
+    return timings, moved, skipped, workload
+
+
+def summarize(runs, workload):
+    """Returns {phase: {...}} with every run's seconds, their median and the median rates."""
+    phases = {}
+    for phase in PHASES:
+        seconds = [run["seconds"][phase] for run in runs if phase in run["seconds"]]
+        if not seconds:
+            continue
+        median = statistics.median(seconds)
+        phases[phase] = {
+            "seconds": [round(value, 6) for value in seconds],
+            "median": round(median, 6),
+            "files_per_second": round(workload.files / median, 1) if median else None,
+            "bytes_per_second": round(workload.bytes / median) if median else None,
+        }
+    total = statistics.median(sum(run["seconds"].values()) for run in runs)
+    phases["total"] = {"median": round(total, 6), "files_per_second": round(workload.files / total, 1),
+                       "bytes_per_second": round(workload.bytes / total)}
+    return phases
+
+
+def git_commit():
+    """Returns the current commit's short hash (with "+dirty" for uncommitted changes), or None."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("+dirty" if dirty else "")
+
+
+def compare(result, baseline, threshold):
+    """Prints the change of every phase's median against baseline; returns the phases that regressed."""
+    if baseline.get("workload") != result["workload"] or baseline.get("options") != result["options"]:
+        print("warning: the baseline used a different workload or options; the comparison may be meaningless")
+    print(f"\nvs. {baseline.get('commit') or 'baseline'} ({baseline.get('created', '?')}):")
+    print(f"{'phase':>9} {'before':>10} {'after':>10} {'change':>8}")
+    regressed = []
+    for phase, stats in result["phases"].items():
+        before = baseline.get("phases", {}).get(phase, {}).get("median")
+        if not before:
+            continue
+        change = stats["median"] / before - 1
+        flag = ""
+        if change > threshold:
+            regressed.append(phase)
+            flag = "  REGRESSION"
+        print(f"{phase:>9} {before:>10.4f} {stats['median']:>10.4f} {change:>+7.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions; medians are reported.")
+    parser.add_argument("--workers", type=int, default=1, help="Threads moving files.")
+    parser.add_argument("--recursive", action="store_true", help="Sort subdirectories too (implied by --depth > 0).")
+    parser.add_argument("--sniff", action="store_true", help="Classify by content as well.")
+    parser.add_argument("--dedupe", choices=("skip", "hardlink", "move"), help="Add a dedupe phase.")
+    parser.add_argument("--base-dir", default=None, help="Where to build the trees (defaults to a temp dir).")
+    parser.add_argument("--output", default=None,
+                        help="JSON result file (default: benchmarks/results/pipeline-COMMIT-TIME.json).")
+    parser.add_argument("--compare", default=None, help="Earlier JSON result to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown of a phase that counts as a regression (default: 0.10).")
+    args = parser.parse_args()
+
+    spec = spec_from_args(args)
+    options = {"workers": args.workers, "recursive": args.recursive or spec.depth > 0, "sniff": args.sniff,
+               "dedupe": args.dedupe, "repeat": args.repeat}
+    # Keep log output out of the measurement
+    sorter_logger.setLevel(logging.WARNING)
+
+    runs = []
+    base_dir = tempfile.mkdtemp(prefix="sorter_bench_", dir=args.base_dir)
+    try:
+        print(f"{'run':>3} " + " ".join(f"{phase:>9}" for phase in PHASES) + f" {'moved':>8} {'skipped':>8}")
+        for repetition in range(args.repeat):
+            timings, moved, skipped, workload = run_once(base_dir, spec, repetition, options)
+            runs.append({"seconds": timings, "moved": moved, "skipped": skipped})
+            cells = " ".join(f"{timings[phase]:>9.4f}" if phase in timings else f"{'-':>9}" for phase in PHASES)
+            print(f"{repetition + 1:>3} {cells} {moved:>8} {skipped:>8}")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+    result = {
+        "benchmark": "pipeline",
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workload": spec._asdict(),
+        "options": options,
+        "files": workload.files,
+        "bytes": workload.bytes,
+        "duplicates": workload.duplicates,
+        "collisions": workload.collisions,
+        "runs": runs,
+        "phases": summarize(runs, workload),
+    }
+    print(f"\n{'phase':>9} {'median s':>10} {'files/s':>10} {'MB/s':>8}")
+    for phase, stats in result["phases"].items():
+        print(f"{phase:>9} {stats['median']:>10.4f} {stats['files_per_second']:>10.0f} "
+              f"{stats['bytes_per_second'] / 1024 ** 2:>8.1f}")
+
+    output = args.output
+    if output is None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"pipeline-{result['commit'] or 'nogit'}-{stamp}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressed = compare(result, json.load(f), args.threshold)
+        if regressed:
+            print(f"Slower by more than {args.threshold:.0%}: {', '.join(regressed)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
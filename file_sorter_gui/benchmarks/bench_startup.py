@@ -0,0 +1,60 @@
+"""Benchmark: cold-start time of the CLI vs. the GUI's import path.
+
+Starts a fresh interpreter for each entry point several times and reports
+the best and median wall time, plus whether Qt got imported. The CLI must
+stay well under the GUI and must never import PyQt5.
+
+Run from the file_sorter_gui/ directory:
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+QT_CHECK = "; import sys; print(any(name.split('.')[0] == 'PyQt5' for name in sys.modules))"
+ENTRY_POINTS = [
+    ("python (baseline)", "pass"),
+    ("cli parser (--help)", "import sorter.cli; sorter.cli.build_parser().format_help()"),
+    ("cli + engine", "import sorter.cli, sorter.sorter_engine"),
+    ("gui (gui.layout)", "import gui.layout"),
+]
+
+
+def time_startup(code, runs):
+    """Returns (wall times, imported Qt) for `python -c code` started runs times."""
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT), PYTHONDONTWRITEBYTECODE="1")
+    times = []
+    qt = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code + QT_CHECK], cwd=PROJECT_ROOT, env=env,
+                                capture_output=True, text=True)
+        times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        qt = result.stdout.strip().splitlines()[-1] == "True"
+    return times, qt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Interpreter starts per entry point.")
+    args = parser.parse_args()
+
+    print(f"{'entry point':<22} {'best ms':>8} {'median ms':>10} {'imports Qt':>11}")
+    for label, code in ENTRY_POINTS:
+        times, qt = time_startup(code, args.runs)
+        if times is None:
+            print(f"{label:<22} failed: {qt}")
+            continue
+        print(f"{label:<22} {min(times) * 1000:>8.1f} {statistics.median(times) * 1000:>10.1f} {str(qt):>11}")
+
+
+if __name__ == '__main__':
+    main()
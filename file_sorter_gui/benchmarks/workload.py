@@ -0,0 +1,182 @@
+"""Synthetic folder trees for the benchmarks.
+
+A WorkloadSpec describes a tree: how many files, how big, which extensions,
+how deeply nested, and how many of them are duplicates (same content as an
+earlier file) or collisions (a file of the same name is already sorted).
+generate() builds it; the same spec and seed always produce the same tree.
+
+Run from the file_sorter_gui/ directory to build a tree and keep it:
+    python benchmarks/workload.py /tmp/tree --preset downloads
+"""
+import argparse
+import math
+import os
+import random
+import shutil
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.file_rules import UNCATEGORIZED, compile_rules
+from sorter.utils import parse_size
+
+# sizes: "64", "4KB" (fixed), "1KB-10MB" (log-uniform) or "lognormal:256KB[:sigma]" (median and spread)
+# extensions: {".jpg": weight, ...}; "" is a file without extension
+# depth, fanout: levels of subdirectories below the root, and subdirectories per directory
+# duplicate_rate: share of files that copy an earlier file's content
+# collision_rate: share of files whose name is already taken in their category folder
+WorkloadSpec = namedtuple("WorkloadSpec", [
+    "files", "sizes", "extensions", "depth", "fanout", "duplicate_rate", "collision_rate", "seed"],
+    defaults=("4KB", None, 0, 4, 0.0, 0.0, 1234))
+# What generate() built; bytes counts the files to sort, not the pre-sorted collision files
+Workload = namedtuple("Workload", ["root", "files", "bytes", "directories", "duplicates", "collisions"])
+
+DEFAULT_EXTENSIONS = {
+    ".jpg": 25, ".png": 10, ".pdf": 10, ".docx": 5, ".txt": 10, ".mp3": 8, ".mp4": 4, ".zip": 5,
+    ".py": 8, ".html": 5, ".xyz": 5, "": 5,
+}
+
+PRESETS = {
+    # Many tiny files in one folder: metadata-bound (listing, renames)
+    "small-flat": WorkloadSpec(files=20000, sizes="64"),
+    # A camera dump: few types, sizes around a few MB
+    "photos": WorkloadSpec(files=2000, sizes="lognormal:3MB:0.5", extensions={".jpg": 8, ".png": 1, ".mp4": 1}),
+    # A nested project/archive tree with a broad mix
+    "mixed-deep": WorkloadSpec(files=10000, sizes="256-4MB", depth=4, fanout=3),
+    # A downloads folder: re-downloads and names that are already sorted
+    "downloads": WorkloadSpec(files=5000, sizes="lognormal:200KB", duplicate_rate=0.15, collision_rate=0.1),
+}
+
+# Bytes written per call while filling files
+_WRITE_CHUNK = 1024 * 1024
+
+
+def size_sampler(sizes, rng):
+    """Returns a function drawing file sizes (bytes) for a WorkloadSpec.sizes string."""
+    sizes = str(sizes).strip()
+    if sizes.startswith("lognormal:"):
+        parts = sizes.split(":")
+        median = parse_size(parts[1])
+        sigma = float(parts[2]) if len(parts) > 2 else 1.0
+        return lambda: max(1, int(rng.lognormvariate(math.log(median), sigma)))
+    if "-" in sizes:
+        low, high = (parse_size(part) for part in sizes.split("-", 1))
+        if not 0 < low <= high:
+            raise ValueError(f"Invalid size range: {sizes!r}")
+        return lambda: int(math.exp(rng.uniform(math.log(low), math.log(high))))
+    size = parse_size(sizes)
+    return lambda: size
+
+
+def parse_extensions(text):
+    """Parses an extension mix such as "jpg:5,pdf:2,none:1" into {".jpg": 5, ".pdf": 2, "": 1}."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition(":")
+        extension = "" if name.lower() in ("", "none") else "." + name.lstrip(".").lower()
+        mix[extension] = float(weight or 1)
+    return mix
+
+
+def _directories(root, depth, fanout):
+    """Returns root and every directory of a full tree below it, depth levels deep."""
+    directories = [root]
+    level = [root]
+    for d in range(depth):
+        level = [os.path.join(parent, f"dir{d}_{i}") for parent in level for i in range(fanout)]
+        directories.extend(level)
+    return directories
+
+
+def _write(path, size, header):
+    """Writes a file of size bytes: a distinct header (so sizes can collide without content colliding), then zeros."""
+    with open(path, "wb") as f:
+        f.write(header[:size])
+        remaining = size - min(size, len(header))
+        zeros = bytes(min(remaining, _WRITE_CHUNK))
+        while remaining > 0:
+            remaining -= f.write(zeros[:remaining])
+
+
+def generate(root, spec):
+    """Builds the tree described by spec under root (created; it must not exist yet).
+
+    Returns:
+        Workload: What was built.
+    """
+    rng = random.Random(spec.seed)
+    draw_size = size_sampler(spec.sizes, rng)
+    mix = spec.extensions or DEFAULT_EXTENSIONS
+    extensions, weights = list(mix), list(mix.values())
+    rule_index = compile_rules(None)
+
+    os.makedirs(root)
+    directories = _directories(root, spec.depth, spec.fanout)
+    for directory in directories[1:]:
+        os.makedirs(directory)
+
+    written = [] # (path, size) of files with unique content, for duplicates to copy
+    total_bytes = duplicates = collisions = 0
+    for i in range(spec.files):
+        directory = directories[rng.randrange(len(directories))]
+        extension = rng.choices(extensions, weights)[0]
+        name = f"file{i:07d}{extension}"
+        path = os.path.join(directory, name)
+        if written and rng.random() < spec.duplicate_rate:
+            source, size = written[rng.randrange(len(written))]
+            shutil.copyfile(source, path)
+            duplicates += 1
+        else:
+            size = draw_size()
+            _write(path, size, f"{spec.seed}:{i}:".encode("ascii").ljust(32, b"#"))
+            written.append((path, size))
+        total_bytes += size
+
+        if extension and rng.random() < spec.collision_rate:
+            # An earlier run already sorted a different file of the same name
+            category = rule_index.classify(name) or UNCATEGORIZED
+            os.makedirs(os.path.join(root, category), exist_ok=True)
+            _write(os.path.join(root, category, name), 16, b"already sorted  ")
+            collisions += 1
+    return Workload(root, spec.files, total_bytes, len(directories), duplicates, collisions)
+
+
+def add_arguments(parser):
+    """Adds the options that pick and adjust a workload to an argparse parser."""
+    parser.add_argument("--preset", choices=sorted(PRESETS), default=None, help="Start from a named workload.")
+    parser.add_argument("--files", type=int, default=None, help="Number of files to sort.")
+    parser.add_argument("--sizes", default=None,
+                        help='File sizes: "4KB", "1KB-10MB" (log-uniform) or "lognormal:256KB[:sigma]".')
+    parser.add_argument("--extensions", default=None, help='Extension mix, e.g. "jpg:5,pdf:2,none:1".')
+    parser.add_argument("--depth", type=int, default=None, help="Levels of subdirectories.")
+    parser.add_argument("--fanout", type=int, default=None, help="Subdirectories per directory.")
+    parser.add_argument("--duplicates", type=float, default=None, help="Share of files duplicating another (0-1).")
+    parser.add_argument("--collisions", type=float, default=None,
+                        help="Share of files whose name is already taken in their category folder (0-1).")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def spec_from_args(args):
+    """Returns the WorkloadSpec selected by the options of add_arguments()."""
+    spec = PRESETS[args.preset] if args.preset else WorkloadSpec(files=10000)
+    changes = {"files": args.files, "sizes": args.sizes, "depth": args.depth, "fanout": args.fanout,
+               "duplicate_rate": args.duplicates, "collision_rate": args.collisions, "seed": args.seed,
+               "extensions": parse_extensions(args.extensions) if args.extensions else None}
+    return spec._replace(**{field: value for field, value in changes.items() if value is not None})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="Directory to create.")
+    add_arguments(parser)
+    args = parser.parse_args()
+    workload = generate(args.root, spec_from_args(args))
+    print(f"{workload.files} files ({workload.bytes / 1024 ** 2:.1f} MB) in {workload.directories} directories, "
+          f"{workload.duplicates} duplicates, {workload.collisions} collisions: {workload.root}")
+
+
+if __name__ == '__main__':
+    main()
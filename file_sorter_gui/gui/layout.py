@@ -1,80 +1,138 @@
 import sys
 import logging # For custom handler and logger access
+import time
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
-    QPushButton, QLineEdit, QTextEdit, QLabel, QSizePolicy,
-    QFileDialog, QMessageBox # Added QMessageBox
+    QPushButton, QLabel, QSizePolicy, QAbstractItemView, QHeaderView,
+    QFileDialog, QMessageBox, QProgressBar, QTableWidget, QTableWidgetItem, # Added QMessageBox
+    QTableView, QComboBox
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QObject # Added pyqtSignal, QObject
+from PyQt5.QtCore import Qt, QThread
 
 # Adjust path to import from sorter module
 import os
 from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
-from sorter.sorter_engine import sort_files_by_extension, logger as sorter_logger # Import the specific logger
-
-# Custom Log Handler for QTextEdit
-class QTextEditLogHandler(logging.Handler, QObject):
-    messageWritten = pyqtSignal(str)
-
-    def __init__(self, parent):
-        super().__init__()
-        QObject.__init__(self)
-        self.formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-        self.setFormatter(self.formatter)
-
-    def emit(self, record):
-        msg = self.format(record)
-        self.messageWritten.emit(msg)
+from sorter.sorter_engine import logger as sorter_logger # Import the specific logger
+from sorter.scheduler import SortJob
+from gui.worker import PreviewWorker, SortWorker # Run the engine off the GUI thread
+from gui.preview_model import PreviewModel, format_size # Lazily populated preview of the planned moves
+from gui.log_view import DEFAULT_RETENTION, BufferedLogHandler, LogView # Batched, bounded log display
 
 class MainAppLayout(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, log_retention=DEFAULT_RETENTION):
         super().__init__(parent)
+        self.log_retention = log_retention # Max lines kept in the on-screen log
         self.setWindowTitle("File Sorter GUI")
-        self.setMinimumSize(600, 450) # Slightly increased height for log messages
-        self.selected_folder_path = None
+        self.setMinimumSize(700, 600) # Room for the preview table and log messages
+        self.sources = [] # [src_dir, target_dir or None] per row of the source table
+        self._sort_thread = None
+        self._sort_worker = None
+        self._sort_started_at = None
+        self._preview_thread = None
+        self._preview_worker = None
+        self._expected_total = None # Items of the previewed plan being sorted (progress totals)
+        self._setup_gui_logging() # Initialize GUI logging (the log view needs the handler)
         self._init_ui()
-        self._setup_gui_logging() # Initialize GUI logging
 
     def _setup_gui_logging(self):
-        """Sets up logging to the GUI's QTextEdit."""
-        self.log_handler = QTextEditLogHandler(self)
+        """Sets up the buffered handler that feeds the GUI's log view."""
+        # Records are only buffered here; LogView drains them on a timer in batches,
+        # so large runs don't re-layout the widget once per file.
+        self.log_handler = BufferedLogHandler(capacity=self.log_retention)
         # Add handler to the specific sorter_logger from sorter_engine
         # This avoids capturing all root logger messages if not desired.
         sorter_logger.addHandler(self.log_handler)
         # Optionally, set the level for this handler if you want GUI to show different verbosity
         # self.log_handler.setLevel(logging.INFO) 
-        self.log_handler.messageWritten.connect(self._update_log_area)
-
-    def _update_log_area(self, message):
-        """Appends a message to the log_output_area QTextEdit."""
-        self.log_output_area.append(message)
 
     def _init_ui(self):
         main_layout = QVBoxLayout(self)
 
-        folder_section_layout = QHBoxLayout()
-        self.folder_path_label = QLabel("Selected Folder:")
-        self.folder_path_display = QLineEdit()
-        self.folder_path_display.setPlaceholderText("No folder selected...")
-        self.folder_path_display.setReadOnly(True)
-        self.browse_folder_button = QPushButton("Browse...")
+        # Every source folder is sorted in place or into its own target folder
+        self.folder_path_label = QLabel("Folders to Sort:")
+        self.source_table = QTableWidget(0, 2)
+        self.source_table.setHorizontalHeaderLabels(["Source folder", "Sort into"])
+        self.source_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.source_table.verticalHeader().setVisible(False)
+        self.source_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.source_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.source_table.setMaximumHeight(140)
+        main_layout.addWidget(self.folder_path_label)
+        main_layout.addWidget(self.source_table)
+
+        folder_buttons_layout = QHBoxLayout()
+        self.browse_folder_button = QPushButton("Add Folder...")
         self.browse_folder_button.clicked.connect(self._browse_folder)
-        folder_section_layout.addWidget(self.folder_path_label)
-        folder_section_layout.addWidget(self.folder_path_display, 1)
-        folder_section_layout.addWidget(self.browse_folder_button)
-        main_layout.addLayout(folder_section_layout)
+        self.target_folder_button = QPushButton("Sort Into...")
+        self.target_folder_button.setToolTip("Choose where the selected folder's files go (default: in place).")
+        self.target_folder_button.clicked.connect(self._choose_target)
+        self.remove_folder_button = QPushButton("Remove")
+        self.remove_folder_button.clicked.connect(self._remove_source)
+        folder_buttons_layout.addWidget(self.browse_folder_button)
+        folder_buttons_layout.addWidget(self.target_folder_button)
+        folder_buttons_layout.addWidget(self.remove_folder_button)
+        folder_buttons_layout.addStretch(1)
+        main_layout.addLayout(folder_buttons_layout)
 
-        self.sort_files_button = QPushButton("Sort Files in Selected Folder")
+        # Preview of the planned moves; unchecked rows stay where they are
+        preview_controls_layout = QHBoxLayout()
+        self.preview_button = QPushButton("Preview")
+        self.preview_button.setToolTip("List the moves without making them, to review or exclude files first.")
+        self.preview_button.clicked.connect(self._trigger_preview)
+        self.category_filter = QComboBox()
+        self.category_filter.addItem("All categories")
+        self.category_filter.currentIndexChanged.connect(self._filter_category)
+        self.exclude_button = QPushButton("Exclude")
+        self.exclude_button.clicked.connect(lambda: self._exclude_selected(True))
+        self.include_button = QPushButton("Include")
+        self.include_button.clicked.connect(lambda: self._exclude_selected(False))
+        self.preview_summary_label = QLabel("")
+        preview_controls_layout.addWidget(self.preview_button)
+        preview_controls_layout.addWidget(self.category_filter)
+        preview_controls_layout.addWidget(self.exclude_button)
+        preview_controls_layout.addWidget(self.include_button)
+        preview_controls_layout.addWidget(self.preview_summary_label, 1)
+        main_layout.addLayout(preview_controls_layout)
+
+        self.preview_model = PreviewModel(parent=self)
+        self.preview_model.exclusions_changed.connect(self._update_preview_summary)
+        self.preview_view = QTableView()
+        self.preview_view.setModel(self.preview_model)
+        self.preview_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.preview_view.setSortingEnabled(True)
+        self.preview_view.sortByColumn(-1, Qt.AscendingOrder) # Scan order until a header is clicked
+        self.preview_view.verticalHeader().setVisible(False)
+        # Fixed row heights: the view never measures rows, however many are fetched
+        self.preview_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.preview_view.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 6)
+        self.preview_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.preview_view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        main_layout.addWidget(self.preview_view)
+        self._set_preview_controls_enabled(False)
+
+        self.sort_files_button = QPushButton("Sort Files in Selected Folders")
         self.sort_files_button.setObjectName("SortButton") # Set object name for specific styling
         # self.sort_files_button.setStyleSheet("padding: 10px; font-size: 16px;") # QSS will handle this now
         self.sort_files_button.clicked.connect(self._trigger_sort) # Connect sort button
         main_layout.addWidget(self.sort_files_button, alignment=Qt.AlignCenter)
 
+        progress_section_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(0)
+        self.throughput_label = QLabel("")
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self._cancel_sort)
+        progress_section_layout.addWidget(self.progress_bar, 1)
+        progress_section_layout.addWidget(self.throughput_label)
+        progress_section_layout.addWidget(self.cancel_button)
+        main_layout.addLayout(progress_section_layout)
+
         log_area_label = QLabel("Log Output:")
-        self.log_output_area = QTextEdit()
-        self.log_output_area.setReadOnly(True)
+        self.log_output_area = LogView(self.log_handler, retention=self.log_retention)
         self.log_output_area.setPlaceholderText("Events will be logged here...")
         self.log_output_area.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         main_layout.addWidget(log_area_label)
@@ -82,46 +140,277 @@ class MainAppLayout(QWidget):
 
         self.setLayout(main_layout)
 
+    def _refresh_sources(self):
+        self.source_table.setRowCount(len(self.sources))
+        for row, (src_dir, target_dir) in enumerate(self.sources):
+            self.source_table.setItem(row, 0, QTableWidgetItem(src_dir))
+            self.source_table.setItem(row, 1, QTableWidgetItem(target_dir or "(in place)"))
+
+    def _selected_rows(self):
+        return sorted({index.row() for index in self.source_table.selectionModel().selectedRows()})
+
+    def _sources_description(self):
+        """Names the folders of the current sort in messages: the path itself if there is only one."""
+        return self.sources[0][0] if len(self.sources) == 1 else f"{len(self.sources)} folders"
+
     def _browse_folder(self):
-        folder_path = QFileDialog.getExistingDirectory(self, "Select Folder to Sort", self.selected_folder_path or os.getcwd())
-        if folder_path:
-            self.selected_folder_path = folder_path
-            self.folder_path_display.setText(self.selected_folder_path)
-            # Log to GUI instead of print
-            self.log_output_area.append(f"INFO: Selected folder: {self.selected_folder_path}") 
-        else:
+        start = self.sources[-1][0] if self.sources else os.getcwd()
+        folder_path = QFileDialog.getExistingDirectory(self, "Select Folder to Sort", start)
+        if not folder_path:
             self.log_output_area.append("INFO: Folder selection cancelled or no folder chosen.")
+        elif any(src_dir == folder_path for src_dir, _ in self.sources):
+            self.log_output_area.append(f"INFO: '{folder_path}' is already in the list.")
+        else:
+            self.sources.append([folder_path, None])
+            self._clear_preview()
+            self._refresh_sources()
+            self.source_table.selectRow(len(self.sources) - 1)
+            # Log to GUI instead of print
+            self.log_output_area.append(f"INFO: Added folder: {folder_path}")
+
+    def _choose_target(self):
+        rows = self._selected_rows()
+        if not rows:
+            self.log_output_area.append("INFO: Select a folder in the list first.")
+            return
+        target_dir = QFileDialog.getExistingDirectory(self, "Sort Into Folder", self.sources[rows[0]][0])
+        if not target_dir:
+            return
+        for row in rows:
+            # Sorting a folder into itself is the same as sorting it in place
+            self.sources[row][1] = target_dir if target_dir != self.sources[row][0] else None
+            self.log_output_area.append(f"INFO: '{self.sources[row][0]}' will be sorted into '{target_dir}'.")
+        self._clear_preview()
+        self._refresh_sources()
+
+    def _remove_source(self):
+        rows = self._selected_rows()
+        for row in reversed(rows):
+            del self.sources[row]
+        if rows:
+            self._clear_preview()
+        self._refresh_sources()
+
+    # --- Preview ---
+    def _trigger_preview(self):
+        """Plans the listed folders on a worker thread and shows the result in the preview table."""
+        if self._sort_thread is not None or self._preview_thread is not None:
+            return
+        missing = [src_dir for src_dir, _ in self.sources if not os.path.isdir(src_dir)]
+        if not self.sources or missing:
+            self.log_output_area.append("WARNING: Add existing folders to the list before previewing.")
+            return
+        self._clear_preview()
+        self.log_output_area.append(f"Previewing sort for: {self._sources_description()}")
+        self._preview_thread = QThread(self)
+        self._preview_worker = PreviewWorker([tuple(source) for source in self.sources])
+        self._preview_worker.moveToThread(self._preview_thread)
+        self._preview_thread.started.connect(self._preview_worker.run)
+        self._preview_worker.progress.connect(self._preview_progress)
+        self._preview_worker.finished.connect(self._preview_finished)
+        self._preview_worker.failed.connect(self._preview_failed)
+        self._set_sources_editable(False)
+        self.preview_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.progress_bar.setRange(0, 0)
+        self._preview_thread.start()
+
+    def _preview_progress(self, rows):
+        self.preview_summary_label.setText(f"Planning... {rows} file(s)")
+
+    def _finish_preview_thread(self):
+        self._preview_thread.quit()
+        self._preview_thread.wait()
+        self._preview_worker.deleteLater()
+        self._preview_thread.deleteLater()
+        self._preview_thread = None
+        self._preview_worker = None
+        self._set_sources_editable(True)
+        self.cancel_button.setEnabled(False)
+        self.progress_bar.setRange(0, 1)
+
+    def _preview_finished(self, preview, cancelled):
+        self._finish_preview_thread()
+        if cancelled: # A partial preview would sort only part of the folders
+            self.log_output_area.append("INFO: Preview cancelled.")
+            self._clear_preview()
+            return
+        self.preview_model.set_preview(preview)
+        self.category_filter.blockSignals(True)
+        self.category_filter.clear()
+        self.category_filter.addItem("All categories")
+        self.category_filter.addItems(sorted(preview.categories))
+        self.category_filter.blockSignals(False)
+        self._set_preview_controls_enabled(True)
+        self._update_preview_summary()
+        self.log_output_area.append(f"INFO: Preview ready: {len(preview)} file(s) to move, "
+                                    f"{sum(preview.skipped)} item(s) left in place. "
+                                    "Uncheck files to keep them where they are, then sort.")
+
+    def _preview_failed(self, error):
+        self._finish_preview_thread()
+        self._clear_preview()
+        self.log_output_area.append(f"ERROR: Preview failed: {error}")
+
+    def _clear_preview(self):
+        """Drops the preview, e.g. because the folders changed; sorting then plans afresh."""
+        self.preview_model.set_preview(None)
+        self.preview_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.category_filter.blockSignals(True)
+        self.category_filter.clear()
+        self.category_filter.addItem("All categories")
+        self.category_filter.blockSignals(False)
+        self._set_preview_controls_enabled(False)
+        self.preview_summary_label.setText("")
+
+    def _set_preview_controls_enabled(self, enabled):
+        for widget in (self.category_filter, self.exclude_button, self.include_button):
+            widget.setEnabled(enabled)
+
+    def _filter_category(self, index):
+        self.preview_model.set_category_filter(self.category_filter.itemText(index) if index > 0 else None)
+        self._update_preview_summary()
+
+    def _exclude_selected(self, excluded):
+        rows = [index.row() for index in self.preview_view.selectionModel().selectedRows()]
+        self.preview_model.set_excluded(rows, excluded)
+
+    def _update_preview_summary(self):
+        preview = self.preview_model.preview
+        if preview is None:
+            self.preview_summary_label.setText("")
+            return
+        included = len(preview) - preview.excluded_count()
+        shown = self.preview_model.total_rows()
+        text = f"{included} of {len(preview)} file(s) will be moved ({format_size(preview.included_bytes())})"
+        if shown != len(preview):
+            text += f"; {shown} shown"
+        self.preview_summary_label.setText(text)
 
     def _trigger_sort(self):
         """Handles the click of the 'Sort Files' button."""
+        if self._sort_thread is not None or self._preview_thread is not None: # A sort or preview is running
+            return
         self.log_output_area.clear() # Clear log area for new sort operation
         
-        if self.selected_folder_path and os.path.isdir(self.selected_folder_path):
-            self.log_output_area.append(f"Starting sort for: {self.selected_folder_path}")
-            try:
-                # This will now log to both file (if sorter_engine still has its file handler)
-                # and to our GUI log area via the QTextEditLogHandler.
-                moved_count, skipped_count = sort_files_by_extension(self.selected_folder_path)
-                
-                # The summary is already logged by sorter_engine, so we mainly focus on overall status here.
-                if moved_count == 0 and skipped_count > 0:
-                    self.log_output_area.append(f"INFO: Sorting process completed. No files were moved, but {skipped_count} items were processed/skipped.")
-                    QMessageBox.information(self, "Sort Complete", f"Sorting process finished for \n{self.selected_folder_path}.\nNo files were moved. Check logs for details.")
-                elif moved_count == 0 and skipped_count == 0:
-                    self.log_output_area.append(f"INFO: Sorting process completed. No files found to move or skip in {self.selected_folder_path}.")
-                    QMessageBox.information(self, "Sort Complete", f"No files found to sort in \n{self.selected_folder_path}.")
-                else: # moved_count > 0
-                    self.log_output_area.append(f"SUCCESS: Sorting process completed. {moved_count} file(s) moved.")
-                    QMessageBox.information(self, "Sort Complete", f"Successfully sorted {moved_count} file(s) in \n{self.selected_folder_path}")
-            except Exception as e:
-                error_msg = f"ERROR: An unexpected error occurred during sorting: {e}"
-                self.log_output_area.append(error_msg)
-                QMessageBox.critical(self, "Sort Error", f"An error occurred: \n{e}")
+        missing = [src_dir for src_dir, _ in self.sources if not os.path.isdir(src_dir)]
+        if self.sources and not missing:
+            self.log_output_area.append(f"Starting sort for: {self._sources_description()}")
+            # The engine runs on a worker thread; its log records are buffered by
+            # BufferedLogHandler and flushed into log_output_area by the GUI thread.
+            preview = self.preview_model.preview
+            if preview is not None:
+                # Apply the reviewed plan as shown, leaving the excluded files in place
+                jobs = [SortJob(src_dir, target_dir, preview.iter_items(index))
+                        for index, (src_dir, target_dir) in enumerate(self.sources)]
+                self._expected_total = len(preview)
+                self.log_output_area.append(f"INFO: Sorting the previewed files ({preview.excluded_count()} excluded).")
+            else:
+                jobs = [tuple(source) for source in self.sources]
+                self._expected_total = None
+            self._sort_thread = QThread(self)
+            self._sort_worker = SortWorker(jobs)
+            self._sort_worker.moveToThread(self._sort_thread)
+            self._sort_thread.started.connect(self._sort_worker.run)
+            self._sort_worker.progress.connect(self._update_progress)
+            self._sort_worker.finished.connect(self._sort_finished)
+            self._sort_worker.failed.connect(self._sort_failed)
+
+            self._set_sources_editable(False)
+            self.cancel_button.setEnabled(True)
+            self.progress_bar.setRange(0, 0) # Busy indicator until the plan size is known
+            self.throughput_label.setText("")
+            self._sort_started_at = time.monotonic()
+            self._sort_thread.start()
         else:
             msg = "No folder selected or folder is invalid. Please select a valid folder first."
+            if missing:
+                msg = f"These folders no longer exist: {', '.join(missing)}. Please remove them from the list."
             self.log_output_area.append(f"WARNING: {msg}")
             QMessageBox.warning(self, "No Folder Selected", msg)
 
+    def _set_sources_editable(self, editable):
+        for button in (self.sort_files_button, self.browse_folder_button, self.target_folder_button,
+                       self.remove_folder_button, self.preview_button):
+            button.setEnabled(editable)
+
+    def _cancel_sort(self):
+        if self._preview_worker is not None:
+            self.cancel_button.setEnabled(False)
+            self._preview_worker.cancel()
+        if self._sort_worker is not None:
+            self.cancel_button.setEnabled(False)
+            self.log_output_area.append("INFO: Cancelling sort after the current file(s)...")
+            self._sort_worker.cancel()
+
+    def _update_progress(self, event):
+        """Updates the progress bar and throughput readout from a ProgressEvent."""
+        # A previewed plan is streamed to the engine, so its size comes from the preview
+        files_total = event.files_total or self._expected_total
+        if files_total:
+            self.progress_bar.setRange(0, files_total)
+            self.progress_bar.setValue(min(event.files_done, files_total))
+        elapsed = max(time.monotonic() - self._sort_started_at, 1e-6)
+        files_per_sec = event.files_done / elapsed
+        mb_per_sec = event.bytes_done / elapsed / (1024 * 1024)
+        self.throughput_label.setText(f"{event.files_done} item(s) - {files_per_sec:.0f} files/s, {mb_per_sec:.1f} MB/s")
+
+    def _finish_sort_thread(self):
+        self._sort_thread.quit()
+        self._sort_thread.wait()
+        self._sort_worker.deleteLater()
+        self._sort_thread.deleteLater()
+        self._sort_thread = None
+        self._sort_worker = None
+        self._expected_total = None
+        self._clear_preview() # Whatever it showed has been sorted (or is out of date)
+        self._set_sources_editable(True)
+        self.cancel_button.setEnabled(False)
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 1)
+
+    def _show_summary(self, title, text, stats):
+        """Shows the end-of-sort message box, with the run statistics under "Show Details..."."""
+        box = QMessageBox(QMessageBox.Information, title, text, QMessageBox.Ok, self)
+        box.setDetailedText(stats.format())
+        box.exec_()
+
+    def _sort_finished(self, moved_count, skipped_count, cancelled):
+        stats = self._sort_worker.stats # The worker is gone after _finish_sort_thread()
+        self._finish_sort_thread()
+        # The summary is already logged by sorter_engine, so we mainly focus on overall status here.
+        if cancelled:
+            self.log_output_area.append(f"WARNING: Sorting cancelled. {moved_count} file(s) moved, {skipped_count} item(s) skipped before stopping.")
+            self._show_summary("Sort Cancelled", f"Sorting was cancelled for \n{self._sources_description()}.\n{moved_count} file(s) were moved before stopping.", stats)
+        elif moved_count == 0 and skipped_count > 0:
+            self.log_output_area.append(f"INFO: Sorting process completed. No files were moved, but {skipped_count} items were processed/skipped.")
+            self._show_summary("Sort Complete", f"Sorting process finished for \n{self._sources_description()}.\nNo files were moved. Check logs for details.", stats)
+        elif moved_count == 0 and skipped_count == 0:
+            self.log_output_area.append(f"INFO: Sorting process completed. No files found to move or skip in {self._sources_description()}.")
+            self._show_summary("Sort Complete", f"No files found to sort in \n{self._sources_description()}.", stats)
+        else: # moved_count > 0
+            self.log_output_area.append(f"SUCCESS: Sorting process completed. {moved_count} file(s) moved.")
+            self._show_summary("Sort Complete", f"Successfully sorted {moved_count} file(s) in \n{self._sources_description()}", stats)
+
+    def _sort_failed(self, error):
+        self._finish_sort_thread()
+        error_msg = f"ERROR: An unexpected error occurred during sorting: {error}"
+        self.log_output_area.append(error_msg)
+        QMessageBox.critical(self, "Sort Error", f"An error occurred: \n{error}")
+
+    def closeEvent(self, event):
+        """Stops a running sort cleanly before the window closes."""
+        if self._sort_worker is not None:
+            self._sort_worker.cancel()
+            self._sort_thread.quit()
+            self._sort_thread.wait()
+        if self._preview_worker is not None:
+            self._preview_worker.cancel()
+            self._preview_thread.quit()
+            self._preview_thread.wait()
+        sorter_logger.removeHandler(self.log_handler)
+        super().closeEvent(event)
+
 # To allow testing this layout independently
 if __name__ == '__main__':
     # Setup a basic console logger for __main__ execution for debugging this file itself.
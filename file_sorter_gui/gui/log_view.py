@@ -0,0 +1,81 @@
+import collections
+import logging
+import threading
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QPlainTextEdit
+
+# Lines kept in the on-screen log; the full history stays in logs/sorter.log
+DEFAULT_RETENTION = 5000
+# How often buffered records are pushed to the widget
+DEFAULT_FLUSH_HZ = 20
+
+class BufferedLogHandler(logging.Handler):
+    """Logging handler that collects formatted records in a bounded ring buffer.
+
+    emit() is cheap and safe to call from any thread: it never touches Qt. The GUI
+    thread drains the buffer periodically (see LogView). If more than `capacity`
+    records arrive between drains, the oldest are dropped and counted.
+    """
+
+    def __init__(self, capacity=DEFAULT_RETENTION):
+        super().__init__()
+        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+        self._buffer = collections.deque(maxlen=capacity)
+        self._buffer_lock = threading.Lock()
+        self._dropped = 0
+
+    def emit(self, record):
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._buffer_lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._dropped += 1
+            self._buffer.append(msg)
+
+    def drain(self):
+        """Returns (messages, dropped_count) accumulated since the last drain and resets both."""
+        with self._buffer_lock:
+            messages = list(self._buffer)
+            dropped = self._dropped
+            self._buffer.clear()
+            self._dropped = 0
+        return messages, dropped
+
+class LogView(QPlainTextEdit):
+    """Read-only log widget fed by a BufferedLogHandler in timed batches.
+
+    Records are coalesced and appended `flush_hz` times per second with a single
+    widget update each, and the widget keeps at most `retention` lines.
+    """
+
+    def __init__(self, handler, retention=DEFAULT_RETENTION, flush_hz=DEFAULT_FLUSH_HZ, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(retention) # Oldest lines are discarded beyond this
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(int(1000 / flush_hz))
+        self._flush_timer.timeout.connect(self.flush)
+        self._flush_timer.start()
+
+    def flush(self):
+        """Moves any buffered records into the widget in one append."""
+        messages, dropped = self.handler.drain()
+        if dropped:
+            messages.insert(0, f"... {dropped} earlier line(s) not shown (see logs/sorter.log) ...")
+        if messages:
+            self.appendPlainText("\n".join(messages))
+
+    def append(self, text):
+        """Appends a GUI message after any records still waiting in the buffer."""
+        self.flush()
+        self.appendPlainText(text)
+
+    def clear(self):
+        """Clears the widget and discards records that haven't been shown yet."""
+        self.handler.drain()
+        super().clear()
@@ -0,0 +1,146 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtGui import QColor
+
+from sorter.preview import SORT_CATEGORY, SORT_NAME, SORT_SIZE, SORT_SOURCE
+
+# Rows handed to the view per fetchMore(), as the user scrolls
+FETCH_BATCH = 500
+
+COLUMNS = ("Source", "Category", "Final name", "Size")
+_SORT_KEYS = (SORT_SOURCE, SORT_CATEGORY, SORT_NAME, SORT_SIZE)
+
+def format_size(size):
+    if size is None:
+        return "?"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+class PreviewModel(QAbstractTableModel):
+    """Table model over a sorter.preview.PlanPreview, for a QTableView.
+
+    Nothing is copied out of the preview: the model keeps an array of the row
+    numbers in view (filtered by category and sorted) and formats cells only
+    when the view asks for them. Rows are made visible in FETCH_BATCH steps
+    through canFetchMore()/fetchMore(), so the view never lays out more rows
+    than were scrolled to. The first column's check box includes or excludes a
+    row from the sort.
+    """
+    exclusions_changed = pyqtSignal() # Rows were excluded or included
+
+    def __init__(self, preview=None, parent=None):
+        super().__init__(parent)
+        self._preview = None
+        self._rows = [] # Preview row numbers in view order
+        self._loaded = 0 # How many of them the view knows about
+        self._category = None
+        self._sort = (None, False) # (sort key, descending)
+        self.set_preview(preview)
+
+    @property
+    def preview(self):
+        return self._preview
+
+    def set_preview(self, preview):
+        """Shows another PlanPreview (or None to clear the table)."""
+        self._preview = preview
+        self._category = None
+        self._sort = (None, False)
+        self._refresh()
+
+    def set_category_filter(self, category):
+        """Shows only the rows of one category; None shows all of them."""
+        self._category = category
+        self._refresh()
+
+    def _refresh(self):
+        self.beginResetModel()
+        if self._preview is None:
+            self._rows = []
+        else:
+            self._rows = self._preview.view(self._category, *self._sort)
+        self._loaded = min(len(self._rows), FETCH_BATCH)
+        self.endResetModel()
+
+    def total_rows(self):
+        """Rows matching the filter, including those not fetched yet."""
+        return len(self._rows)
+
+    # --- Incremental population ---
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH, len(self._rows) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    # --- QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return self._preview.source(row)
+            if column == 1:
+                return self._preview.category(row)
+            if column == 2:
+                return self._preview.name(row)
+            return format_size(self._preview.size(row))
+        if role == Qt.CheckStateRole and column == 0:
+            return Qt.Unchecked if self._preview.is_excluded(row) else Qt.Checked
+        if role == Qt.ForegroundRole and self._preview.is_excluded(row):
+            return QColor(Qt.gray)
+        if role == Qt.ToolTipRole and column == 2:
+            return self._preview.destination(row)
+        if role == Qt.TextAlignmentRole and column == 3:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole or index.column() != 0:
+            return False
+        self.set_excluded([index.row()], value != Qt.Checked)
+        return True
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sorts by a column; a negative column restores the scan order."""
+        self._sort = (_SORT_KEYS[column] if column >= 0 else None, column >= 0 and order == Qt.DescendingOrder)
+        self.layoutAboutToBeChanged.emit()
+        self._rows = self._preview.view(self._category, *self._sort) if self._preview is not None else []
+        self.layoutChanged.emit()
+
+    # --- Exclusion ---
+    def set_excluded(self, view_rows, excluded=True):
+        """Excludes (or includes again) the given rows of the view."""
+        view_rows = list(view_rows)
+        if not view_rows or self._preview is None:
+            return
+        self._preview.set_excluded((self._rows[row] for row in view_rows), excluded)
+        self.dataChanged.emit(self.index(min(view_rows), 0), self.index(max(view_rows), len(COLUMNS) - 1))
+        self.exclusions_changed.emit()
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from sorter.journal import DEFAULT_JOURNAL_PATH
+from sorter.preview import build_preview
+from sorter.scheduler import sort_sources
+from sorter.sorter_engine import ProgressEvent
+from sorter.stats import RunStats
+
+# Minimum seconds between progress signals, so 100k-file runs don't flood the event loop
+PROGRESS_INTERVAL = 0.05
+
+class SortWorker(QObject):
+    """Sorts one or more source folders on a background QThread.
+
+    Sources go through the multi-source scheduler, so folders on different
+    disks are sorted in parallel. Their progress is summed into one
+    ProgressEvent and throttled before crossing to the GUI thread; the final
+    counts arrive through `finished`. Call cancel() from any thread to stop early.
+    Each source's moves are recorded as a run in the move journal so it can be
+    rolled back (python -m sorter.journal rollback RUN_ID).
+    """
+    progress = pyqtSignal(object) # sorter_engine.ProgressEvent
+    finished = pyqtSignal(int, int, bool) # moved, skipped, cancelled
+    failed = pyqtSignal(str)
+
+    def __init__(self, jobs, workers=1, parent=None):
+        """
+        Args:
+            jobs (list): SortJob instances (e.g. with a reviewed preview's plan), (src_dir, target_dir)
+                pairs or plain folder paths, as for sort_sources().
+            workers (int, optional): Threads moving files within each source.
+        """
+        super().__init__(parent)
+        self.jobs = [jobs] if isinstance(jobs, str) else list(jobs)
+        self.workers = workers
+        self.report = None # scheduler.BatchReport, once finished
+        self.stats = RunStats() # Phase times and operation counts, for the summary dialog
+        self._cancel_event = threading.Event()
+        self._last_progress = 0.0
+        self._progress_lock = threading.Lock() # Sources report from their own threads
+        self._latest = {} # job index -> its last ProgressEvent
+
+    def cancel(self):
+        """Asks the engine to stop after the files currently being moved."""
+        self._cancel_event.set()
+
+    def _on_progress(self, index, event):
+        with self._progress_lock:
+            self._latest[index] = event
+            now = time.monotonic()
+            done = event.files_total is not None and event.files_done >= event.files_total
+            if not (done or event.cancelled or now - self._last_progress >= PROGRESS_INTERVAL):
+                return
+            self._last_progress = now
+            events = list(self._latest.values())
+        # Totals cover the sources started so far; None while any of them streams without totals
+        files_total = bytes_total = None
+        if all(e.files_total is not None for e in events):
+            files_total = sum(e.files_total for e in events)
+            bytes_total = sum(e.bytes_total for e in events)
+        self.progress.emit(ProgressEvent(files_total, sum(e.files_done for e in events), bytes_total,
+                                         sum(e.bytes_done for e in events), event.cancelled))
+
+    def run(self):
+        """Entry point; connect QThread.started to this slot."""
+        try:
+            self.report = sort_sources(self.jobs, workers=self.workers, progress=self._on_progress,
+                                       cancel_event=self._cancel_event, journal_path=DEFAULT_JOURNAL_PATH,
+                                       stats=self.stats)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(self.report.moved, self.report.skipped, self._cancel_event.is_set())
+
+class PreviewWorker(QObject):
+    """Plans one or more source folders on a background QThread, without moving anything.
+
+    The result is a sorter.preview.PlanPreview, delivered through `finished`;
+    `progress` reports the number of files planned so far. Call cancel() from
+    any thread to stop early (`finished` then carries the partial preview).
+    """
+    progress = pyqtSignal(int) # Files planned so far
+    finished = pyqtSignal(object, bool) # PlanPreview, cancelled
+    failed = pyqtSignal(str)
+
+    def __init__(self, jobs, parent=None):
+        """
+        Args:
+            jobs (list): (src_dir, target_dir) pairs or plain folder paths.
+        """
+        super().__init__(parent)
+        self.jobs = [jobs] if isinstance(jobs, str) else list(jobs)
+        self._cancel_event = threading.Event()
+        self._last_progress = 0.0
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def _on_progress(self, rows):
+        now = time.monotonic()
+        if now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.progress.emit(rows)
+
+    def run(self):
+        """Entry point; connect QThread.started to this slot."""
+        try:
+            preview = build_preview(self.jobs, progress=self._on_progress, cancel_event=self._cancel_event)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(preview, self._cancel_event.is_set())
@@ -0,0 +1,203 @@
+"""An asyncio front end to the engine, for services that sort files on an event loop.
+
+sort_async() runs a sort on a worker thread and streams its per-file results to
+the loop as FileEvents:
+
+    async with sort_async(src_dir, workers=4) as run:
+        async for event in run:
+            ...
+    print(run.summary)
+
+Nothing blocks the loop. The consumer sets the pace: once max_pending events are
+waiting to be read, the sort stops until the consumer catches up, with at most
+max_in_flight moves started ahead of it. Cancelling (run.cancel(), leaving the
+`async with` block early or cancelling the consuming task) stops the sort after
+the moves in flight; run.summary then counts what was done.
+"""
+import time
+import asyncio
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .journal import MoveJournal
+from .planner import SkippedItem
+from .state_index import ScanStateIndex, default_state_path
+from .sorter_engine import sort_files_by_extension
+from .transfer import TRANSFER_MODES, TRANSFER_MOVE
+
+# Events not read yet before the sort waits for the consumer
+DEFAULT_MAX_PENDING = 256
+# Moves handed to the worker threads ahead of their results being taken
+DEFAULT_MAX_IN_FLIGHT = 64
+
+STATUS_MOVED = "moved"
+STATUS_COPIED = "copied"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+# One plan item's outcome. destination is the final path (None unless moved or copied); detail
+# is the transfer strategy (transfer.STRATEGY_*) or the reason an item was skipped (planner.SKIP_*).
+FileEvent = namedtuple("FileEvent", ["source", "destination", "category", "status", "detail", "bytes"])
+# A run's totals (skipped doesn't include failed moves); partial if cancelled
+AsyncSortSummary = namedtuple("AsyncSortSummary", [
+    "moved", "skipped", "failed", "bytes_done", "seconds", "cancelled"])
+
+_DONE = object() # Queued after the last event
+
+
+class AsyncSort:
+    """One sort_async() run: an async iterator of FileEvents, and an async context manager.
+
+    The sort starts on first use (iteration, `async with` or wait()) on the running
+    event loop; use it from that loop only, except for cancel().
+    """
+
+    def __init__(self, src_dir, options, journal_path=None, incremental=False, max_pending=DEFAULT_MAX_PENDING,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, executor=None):
+        self.src_dir = src_dir
+        self.summary = None # AsyncSortSummary, once the sort has stopped
+        self._options = options
+        self._journal_path = journal_path
+        self._incremental = incremental
+        self._max_in_flight = max_in_flight
+        self._executor = executor
+        self._own_executor = None
+        self._copying = options.get("transfer_mode") not in (None, TRANSFER_MOVE)
+        self._cancel_event = threading.Event()
+        self._slots = threading.Semaphore(max(1, max_pending)) # Room for unread events
+        self._loop = None
+        self._queue = None
+        self._future = None # The sort thread, as an asyncio future
+        self._started = 0.0
+        # Written by the sort thread only; read once it has finished
+        self._moved = self._skipped = self._failed = self._bytes_done = 0
+
+    # --- Running ---
+    def _start(self):
+        if self._future is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        executor = self._executor
+        if executor is None:
+            executor = self._own_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sorter-async")
+        self._started = time.perf_counter()
+        self._future = self._loop.run_in_executor(executor, self._run)
+        self._future.add_done_callback(self._on_done)
+
+    def _run(self):
+        # SQLite connections stay on the thread that opened them
+        journal = MoveJournal(self._journal_path) if self._journal_path else None
+        state_index = ScanStateIndex(default_state_path(self.src_dir)) if self._incremental else None
+        try:
+            sort_files_by_extension(self.src_dir, cancel_event=self._cancel_event, journal=journal,
+                                    state_index=state_index, on_result=self._on_result,
+                                    max_in_flight=self._max_in_flight, **self._options)
+        finally:
+            for resource in (journal, state_index):
+                if resource is not None:
+                    resource.close()
+
+    def _on_result(self, item, result):
+        """Runs on the sort thread for every plan item; waits while the consumer is behind."""
+        if isinstance(item, SkippedItem):
+            self._skipped += 1
+            event = FileEvent(item.source, None, None, STATUS_SKIPPED, item.reason, 0)
+        elif result is None:
+            self._failed += 1
+            event = FileEvent(item.source, None, item.category, STATUS_FAILED, None, 0)
+        else:
+            self._moved += 1
+            self._bytes_done += result.bytes
+            event = FileEvent(item.source, result.path, item.category,
+                              STATUS_COPIED if self._copying else STATUS_MOVED, result.strategy, result.bytes)
+        # Once cancelled, the moves still in flight are counted but nobody waits for their events
+        if self._cancel_event.is_set():
+            return
+        self._slots.acquire()
+        if not self._cancel_event.is_set():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def _on_done(self, future):
+        self.summary = AsyncSortSummary(self._moved, self._skipped, self._failed, self._bytes_done,
+                                        time.perf_counter() - self._started, self._cancel_event.is_set())
+        if self._own_executor is not None:
+            self._own_executor.shutdown(wait=False)
+        self._queue.put_nowait(_DONE)
+
+    def cancel(self):
+        """Stops the sort after the moves in flight. Safe to call from any thread."""
+        self._cancel_event.set()
+        self._slots.release() # Wakes the sort if it waits for the consumer
+
+    # --- Consuming ---
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self._start()
+        try:
+            event = await self._queue.get()
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+        if event is _DONE:
+            self._queue.put_nowait(_DONE) # Later calls end as well
+            self._future.result() # Raises what stopped the sort, if anything
+            raise StopAsyncIteration
+        self._slots.release()
+        return event
+
+    async def wait(self):
+        """Waits for the sort to finish, dropping the events not read yet; returns the summary."""
+        async for _ in self:
+            pass
+        return self.summary
+
+    async def aclose(self):
+        """Cancels the sort if it still runs and waits for it to stop; returns the summary."""
+        if self._future is None: # Never started
+            self._cancel_event.set()
+            self.summary = AsyncSortSummary(0, 0, 0, 0, 0.0, True)
+            return self.summary
+        self.cancel()
+        return await self.wait()
+
+    async def __aenter__(self):
+        self._start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+
+def sort_async(src_dir, rules=None, workers=1, log_each_file=True, recursive=False, max_depth=None,
+               follow_symlinks=False, sniffer=None, dedupe=None, target_dir=None, stats=None, plan=None,
+               transfer_mode=None, journal_path=None, incremental=False, max_pending=DEFAULT_MAX_PENDING,
+               max_in_flight=DEFAULT_MAX_IN_FLIGHT, executor=None):
+    """Sorts src_dir without blocking the event loop, streaming a FileEvent per plan item.
+
+    Args:
+        src_dir (str): The source directory containing files to sort.
+        rules, workers, log_each_file, recursive, max_depth, follow_symlinks, sniffer, dedupe,
+            target_dir, stats, plan, transfer_mode: See sorter_engine.sort_files_by_extension().
+        journal_path (str, optional): Record the run in this move journal.
+        incremental (bool, optional): Keep a state index for src_dir (see default_state_path()).
+        max_pending (int, optional): Events not read yet before the sort waits for the consumer.
+        max_in_flight (int, optional): Moves started ahead of the results being taken
+            (with workers > 1; one at a time otherwise).
+        executor (concurrent.futures.Executor, optional): Runs the blocking sort (planning,
+            logging, bookkeeping); the moves themselves run on the engine's `workers` threads.
+            Defaults to a thread of its own.
+
+    Returns:
+        AsyncSort: Iterate it with `async for` (ideally inside `async with`, which cancels
+        the sort if the block is left early); its summary is set once the sort stops.
+    """
+    if transfer_mode not in (None,) + TRANSFER_MODES:
+        raise ValueError(f"Unknown transfer mode: {transfer_mode!r}")
+    options = dict(rules=rules, workers=workers, log_each_file=log_each_file, recursive=recursive,
+                   max_depth=max_depth, follow_symlinks=follow_symlinks, sniffer=sniffer, dedupe=dedupe,
+                   target_dir=target_dir, stats=stats, plan=plan, transfer_mode=transfer_mode)
+    return AsyncSort(src_dir, options, journal_path, incremental, max_pending, max_in_flight, executor)
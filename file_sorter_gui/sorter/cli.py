@@ -0,0 +1,216 @@
+"""Command-line interface: python -m sorter SRC_DIR [SRC_DIR ...] [options].
+
+Only the standard library is imported before the arguments are parsed, and
+never Qt, so scripted and cron runs start fast. Logging goes to stderr; a log
+file is only written with --log-file.
+
+Several source folders are sorted through the multi-source scheduler: folders
+on different disks in parallel, folders sharing a disk throttled.
+
+Exit status: 0 on success, 1 if the run couldn't start (bad arguments, missing
+folder, unreadable rules), 2 if it ran but errors were logged, e.g. files that
+couldn't be moved.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m sorter",
+                                     description="Sort the files of a folder into category subfolders by type.")
+    parser.add_argument("src_dir", nargs="+", help="The folder(s) to sort.")
+    parser.add_argument("-t", "--target", action="append", default=None,
+                        help="Sort into this folder instead of in place. Give it once for all sources, "
+                             "or once per source in order.")
+    parser.add_argument("--per-device", type=int, default=None,
+                        help="Sources sorted at once per disk (default: 1 on spinning disks, more on SSDs).")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Plan only; don't move anything.")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Also sort files in subdirectories.")
+    parser.add_argument("--max-depth", type=int, default=None, help="Levels to descend with --recursive.")
+    parser.add_argument("--follow-symlinks", action="store_true", help="Descend into symlinked directories.")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Threads moving files (default: 1).")
+    parser.add_argument("--rules", help="JSON rule file (extension map or multi-criteria rules).")
+    parser.add_argument("--sniff", action="store_true", help="Also detect file types from their content.")
+    parser.add_argument("--dedupe", choices=("skip", "hardlink", "move"),
+                        help="What to do with files whose content is already sorted.")
+    parser.add_argument("--copy", action="store_true",
+                        help="Organise a copy and leave the originals in place (copy-on-write clones where the "
+                             "filesystem supports them, e.g. btrfs or XFS). Best with --target.")
+    parser.add_argument("--hardlinks", action="store_true",
+                        help="With --copy, hard-link files the filesystem can't clone instead of copying their "
+                             "bytes (copy and original then share changes).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only look at what changed since the last run (keeps a state index under logs/state/).")
+    parser.add_argument("--journal", action="store_true",
+                        help="Record moves in the move journal, for python -m sorter.journal rollback.")
+    parser.add_argument("--json", action="store_true", help="Print a JSON summary (and with --dry-run, the plan).")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only log warnings and errors.")
+    parser.add_argument("--log-file", default=None, help="Also write the log to this file.")
+    parser.add_argument("--stats", action="store_true",
+                        help="Report per-phase times, operation counts and move latencies (stderr, or in --json).")
+    parser.add_argument("--profile", metavar="FILE", default=None,
+                        help="Run under cProfile and write the profile to FILE (view with python -m pstats).")
+    parser.add_argument("--metrics-file", metavar="FILE", default=None,
+                        help="Append the run statistics to FILE as a JSON line.")
+    return parser
+
+
+class _ErrorCounter(logging.Handler):
+    """Counts the errors logged during a run, for the exit status."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+def _dry_run(args, src_dir, target_dir, rules, sniffer):
+    from .planner import plan_sort
+
+    plan = plan_sort(src_dir, rules, recursive=args.recursive, max_depth=args.max_depth,
+                     follow_symlinks=args.follow_symlinks, sniffer=sniffer, target_dir=target_dir)
+    if args.dedupe:
+        from .dedupe import dedupe_plan
+        plan, _ = dedupe_plan(plan, args.dedupe)
+    return plan
+
+
+def _transfer_mode(args):
+    from .transfer import TRANSFER_COPY, TRANSFER_LINK, TRANSFER_MOVE
+    if not args.copy:
+        return TRANSFER_MOVE
+    return TRANSFER_LINK if args.hardlinks else TRANSFER_COPY
+
+
+def _sort_many(args, jobs, rules, sniffer, stats):
+    from .journal import DEFAULT_JOURNAL_PATH
+    from .scheduler import sort_sources
+
+    report = sort_sources(jobs, rules, per_device=args.per_device, workers=args.workers,
+                          journal_path=DEFAULT_JOURNAL_PATH if args.journal else None, incremental=args.incremental,
+                          log_each_file=not args.quiet, recursive=args.recursive, max_depth=args.max_depth,
+                          follow_symlinks=args.follow_symlinks, sniffer=sniffer, dedupe=args.dedupe, stats=stats,
+                          transfer_mode=_transfer_mode(args))
+    return {
+        "moved": report.moved, "skipped": report.skipped, "bytes_moved": report.bytes_moved,
+        "files_per_second": round(report.files_per_second, 1), "bytes_per_second": round(report.bytes_per_second),
+        "sources": [
+            dict(source._asdict(), seconds=round(source.seconds, 3), files_per_second=round(source.files_per_second, 1),
+                 bytes_per_second=round(source.bytes_per_second))
+            for source in report.sources
+        ],
+    }
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    for src_dir in args.src_dir:
+        if not os.path.isdir(src_dir):
+            print(f"error: '{src_dir}' is not a directory", file=sys.stderr)
+            return 1
+    targets = args.target or [None]
+    if len(targets) == 1:
+        targets = targets * len(args.src_dir)
+    elif len(targets) != len(args.src_dir):
+        print("error: give --target once, or once per source folder", file=sys.stderr)
+        return 1
+    jobs = list(zip(args.src_dir, targets))
+    if args.hardlinks and not args.copy:
+        print("error: --hardlinks only applies with --copy", file=sys.stderr)
+        return 1
+
+    # Import the engine only now: a typo'd command line costs no more than argparse
+    from . import sorter_engine
+
+    rules = None
+    if args.rules:
+        from .rule_engine import load_rules
+        try:
+            rules = load_rules(args.rules)
+        except (OSError, ValueError) as e:
+            print(f"error: cannot load rules: {e}", file=sys.stderr)
+            return 1
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
+    console.setLevel(logging.WARNING if args.quiet else logging.INFO)
+    sorter_engine.setup_logger(log_file=args.log_file)
+    sorter_engine.logger.addHandler(console)
+    errors = _ErrorCounter()
+    sorter_engine.logger.addHandler(errors)
+
+    sniffer = None
+    if args.sniff:
+        from .sniffer import ContentSniffer
+        sniffer = ContentSniffer()
+
+    stats = None
+    if args.stats or args.profile or args.metrics_file:
+        from .stats import MetricsFileHook, ProfileHook, RunStats
+        hooks = []
+        if args.profile:
+            hooks.append(ProfileHook(args.profile))
+        if args.metrics_file:
+            hooks.append(MetricsFileHook(args.metrics_file))
+        stats = RunStats(hooks)
+
+    started = time.perf_counter()
+    summary = {"src_dir": [os.path.abspath(src_dir) for src_dir in args.src_dir], "dry_run": args.dry_run}
+    if len(jobs) == 1:
+        summary["src_dir"] = summary["src_dir"][0]
+    try:
+        if args.dry_run:
+            plans = [_dry_run(args, src_dir, target_dir, rules, sniffer) for src_dir, target_dir in jobs]
+            operations = [op for plan in plans for op in plan.operations]
+            if not args.json:
+                for op in operations:
+                    print(f"{op.source} -> {op.destination}")
+            summary.update(planned=len(operations), skipped=sum(len(plan) for plan in plans) - len(operations))
+            if args.json:
+                summary["plan"] = plans[0].to_dict() if len(plans) == 1 else [plan.to_dict() for plan in plans]
+        elif len(jobs) > 1:
+            summary.update(_sort_many(args, jobs, rules, sniffer, stats))
+        else:
+            src_dir, target_dir = jobs[0]
+            journal = state_index = None
+            if args.journal:
+                from .journal import MoveJournal
+                journal = MoveJournal()
+            if args.incremental:
+                from .state_index import ScanStateIndex, default_state_path
+                state_index = ScanStateIndex(default_state_path(src_dir))
+            try:
+                moved, skipped = sorter_engine.sort_files_by_extension(
+                    src_dir, rules, target_dir=target_dir, workers=args.workers, log_each_file=not args.quiet,
+                    recursive=args.recursive, max_depth=args.max_depth, follow_symlinks=args.follow_symlinks,
+                    journal=journal, state_index=state_index, sniffer=sniffer, dedupe=args.dedupe,
+                    stats=stats, transfer_mode=_transfer_mode(args))
+            finally:
+                for resource in (journal, state_index):
+                    if resource is not None:
+                        resource.close()
+            summary.update(moved=moved, skipped=skipped)
+    finally:
+        if sniffer is not None:
+            sniffer.close()
+        sorter_engine.logger.removeHandler(console)
+        sorter_engine.logger.removeHandler(errors)
+        sorter_engine.shutdown_logging()
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    summary["errors"] = errors.count
+    if args.stats and stats is not None:
+        if args.json:
+            summary["stats"] = stats.to_dict()
+        else:
+            print(stats.format(), file=sys.stderr)
+
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    return 2 if errors.count else 0
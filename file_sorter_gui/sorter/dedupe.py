@@ -0,0 +1,189 @@
+import os
+import mmap
+import hashlib
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .file_rules import DUPLICATES
+from .planner import SKIP_DUPLICATE, SkippedItem, SortOperation, SortPlan
+from .scanner import scan_directory
+
+logger = logging.getLogger("FileSorterEngine.dedupe")
+
+# What happens to a file whose content is already sorted
+DEDUPE_SKIP = "skip" # Leave it where it is
+DEDUPE_HARDLINK = "hardlink" # Sort it as a hard link to the existing copy (no second copy on disk)
+DEDUPE_MOVE = "move" # Move it to the Duplicates/ folder instead of its category
+DEDUPE_MODES = (DEDUPE_SKIP, DEDUPE_HARDLINK, DEDUPE_MOVE)
+
+# Bytes hashed from each end of a file in the partial-hash stage
+PARTIAL_BLOCK = 64 * 1024
+# Buffer for full hashes when a file can't be memory-mapped
+READ_BUFFER = 1024 * 1024
+# Threads hashing files
+DEFAULT_WORKERS = 4
+
+# How much work each stage did. full_bytes vs. candidate_bytes is what staging saved.
+DedupeStats = namedtuple("DedupeStats", [
+    "files", "candidate_bytes", "partial_hashed", "full_hashed", "full_bytes", "duplicates"])
+
+
+def partial_hash(path, size):
+    """Hashes the first and last PARTIAL_BLOCK bytes of a file (the whole file if it's small)."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        digest.update(f.read(PARTIAL_BLOCK))
+        if size > PARTIAL_BLOCK:
+            f.seek(max(PARTIAL_BLOCK, size - PARTIAL_BLOCK))
+            digest.update(f.read(PARTIAL_BLOCK))
+    return digest.digest()
+
+
+def full_hash(path):
+    """Hashes a whole file through mmap, or large buffered reads where mmap isn't possible."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped) # hashlib releases the GIL on large buffers
+            return digest.digest()
+        except (OSError, ValueError): # Empty file, special file or a filesystem without mmap
+            f.seek(0)
+        buffer = bytearray(READ_BUFFER)
+        view = memoryview(buffer)
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.digest()
+
+
+def _refine(groups, hash_function, pool):
+    """Splits every group of (path, size) members by hash_function(path, size); unreadable files drop out."""
+    def safe_hash(member):
+        try:
+            return hash_function(*member)
+        except OSError as e:
+            logger.warning(f"Not checking '{member[0]}' for duplicates: {e}")
+            return None
+
+    members = [(index, member) for index, group in enumerate(groups) for member in group]
+    buckets = {}
+    for (index, member), digest in zip(members, pool.map(lambda item: safe_hash(item[1]), members)):
+        if digest is not None:
+            buckets.setdefault((index, digest), []).append(member)
+    return list(buckets.values())
+
+
+def find_duplicate_groups(candidates, is_new, workers=DEFAULT_WORKERS):
+    """Finds files with identical content, hashing as little as possible.
+
+    Stage 1 groups by size (no I/O). Stage 2 hashes the first and last 64 KiB of
+    files that share a size. Only files that still collide are hashed in full in
+    stage 3, so most same-size files are told apart after reading 128 KiB.
+    Files up to 128 KiB are fully covered by stage 2. Empty files are ignored.
+
+    Args:
+        candidates (list): (path, size) pairs, in order of precedence: the first
+            file of a group is treated as the original.
+        is_new (callable): is_new(path) is True for files being sorted; groups made
+            only of files that are already in place are not looked at.
+        workers (int, optional): Threads hashing files.
+
+    Returns:
+        tuple: (groups, DedupeStats). Each group lists the paths of identical files
+        in candidate order.
+    """
+    by_size = {}
+    for path, size in candidates:
+        if size > 0:
+            by_size.setdefault(size, []).append((path, size))
+
+    def interesting(group):
+        return len(group) > 1 and any(is_new(path) for path, _ in group)
+
+    groups = [group for group in by_size.values() if interesting(group)]
+    candidate_bytes = sum(size for group in groups for _, size in group)
+    partial_hashed = sum(len(group) for group in groups)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sorter-hash") as pool:
+        groups = [group for group in _refine(groups, partial_hash, pool) if interesting(group)]
+
+        small = [group for group in groups if group[0][1] <= 2 * PARTIAL_BLOCK] # Already fully hashed
+        large = [group for group in groups if group[0][1] > 2 * PARTIAL_BLOCK]
+        full_hashed = sum(len(group) for group in large)
+        full_bytes = sum(size for group in large for _, size in group)
+        large = [group for group in _refine(large, lambda path, size: full_hash(path), pool) if interesting(group)]
+
+    # Buckets keep candidate order, so each group's first path is the original
+    result = [[path for path, _ in group] for group in small + large]
+    duplicates = sum(sum(1 for path in group[1:] if is_new(path)) for group in result)
+    stats = DedupeStats(len(candidates), candidate_bytes, partial_hashed, full_hashed, full_bytes, duplicates)
+    return result, stats
+
+
+def dedupe_plan(plan, mode=DEDUPE_SKIP, workers=DEFAULT_WORKERS):
+    """Rewrites a plan so files whose content is already sorted aren't sorted again.
+
+    A planned file is a duplicate if its content matches a file already in one of
+    the plan's destination category folders, or an earlier file of the same plan.
+    The first file of each set of identical ones is sorted normally.
+
+    Args:
+        plan (SortPlan): The plan to check, e.g. from plan_sort().
+        mode (str, optional): DEDUPE_SKIP, DEDUPE_HARDLINK or DEDUPE_MOVE.
+        workers (int, optional): Threads hashing files.
+
+    Returns:
+        tuple: (SortPlan, DedupeStats). The new plan shares the original's registry.
+    """
+    if mode not in DEDUPE_MODES:
+        raise ValueError(f"Unknown dedupe mode: {mode!r}")
+    operations = {op.source: op for op in plan.operations}
+
+    # Files already in place come first, so they are the originals
+    candidates = []
+    for category in sorted({op.category for op in operations.values()}):
+        try:
+            entries = list(scan_directory(os.path.join(plan.target_dir, category)))
+        except OSError: # Category folder doesn't exist yet
+            continue
+        for entry in entries:
+            try:
+                if entry.is_file:
+                    candidates.append((entry.path, entry.stat().st_size))
+            except OSError:
+                continue
+    for op in operations.values():
+        try:
+            candidates.append((op.source, op.entry.stat().st_size))
+        except OSError:
+            continue
+
+    groups, stats = find_duplicate_groups(candidates, operations.__contains__, workers)
+    originals = {} # duplicate source -> path of the original once the plan has run
+    for group in groups:
+        original = operations[group[0]].destination if group[0] in operations else group[0]
+        for path in group[1:]:
+            if path in operations:
+                originals[path] = original
+
+    items = []
+    for item in plan:
+        original = originals.get(item.source) if isinstance(item, SortOperation) else None
+        if original is None:
+            items.append(item)
+        elif mode == DEDUPE_SKIP:
+            plan.registry.release(item.destination)
+            items.append(SkippedItem(item.name, item.source, SKIP_DUPLICATE))
+        elif mode == DEDUPE_MOVE:
+            plan.registry.release(item.destination)
+            destination = plan.registry.claim(os.path.join(plan.target_dir, DUPLICATES, item.name))
+            items.append(item._replace(category=DUPLICATES, destination=destination))
+        else:
+            items.append(item._replace(link_to=original))
+    logger.info(f"Dedupe: {stats.duplicates} duplicate(s) among {stats.files} file(s); "
+                f"{stats.full_bytes} of {stats.candidate_bytes} candidate byte(s) hashed in full.")
+    return SortPlan(plan.src_dir, items, plan.registry, plan.target_dir), stats
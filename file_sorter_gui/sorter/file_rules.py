@@ -1,3 +1,7 @@
+import hashlib
+import functools
+import types
+
 DEFAULT_RULES = {
     "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp"],
     "Documents": [".pdf", ".docx", ".doc", ".txt", ".odt"],
@@ -7,4 +11,114 @@ DEFAULT_RULES = {
     "Adobe Files": [".psd", ".ai", ".indd"],
     "Executables": [".exe", ".msi", ".bat"],
     "Code": [".py", ".js", ".html", ".css", ".cpp", ".java"]
-} 
\ No newline at end of file
+}
+
+UNCATEGORIZED = "Uncategorized"
+DUPLICATES = "Duplicates" # Dedupe mode: where files already sorted once can be moved
+
+
+def _normalize_extension(extension):
+    """Lower-cases an extension and makes sure it starts with a single dot."""
+    return "." + extension.strip().lstrip(".").lower()
+
+
+class RuleIndex:
+    """Immutable extension -> category lookup compiled from a rule set.
+
+    Classification is a handful of dict lookups per file instead of a scan over
+    every (category, extensions) pair. Extensions may span several dots
+    (e.g. ".tar.gz"); the longest matching suffix wins, so "backup.tar.gz"
+    is matched by ".tar.gz" before ".gz".
+
+    Build instances through compile_rules() so each rule set is compiled once.
+    """
+
+    __slots__ = ("_lookup", "_max_parts")
+
+    def __init__(self, rules):
+        lookup = {}
+        max_parts = 1
+        for category, extensions in rules.items():
+            for extension in extensions:
+                key = _normalize_extension(extension)
+                # The first category listing an extension wins, like the old linear scan did.
+                lookup.setdefault(key, category)
+                max_parts = max(max_parts, key.count("."))
+        object.__setattr__(self, "_lookup", types.MappingProxyType(lookup))
+        object.__setattr__(self, "_max_parts", max_parts)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RuleIndex is immutable")
+
+    def __len__(self):
+        return len(self._lookup)
+
+    def __repr__(self):
+        return f"RuleIndex({len(self._lookup)} extensions, max_parts={self._max_parts})"
+
+    @property
+    def extensions(self):
+        """Read-only mapping of normalized extension -> category."""
+        return self._lookup
+
+    @property
+    def categories(self):
+        """The distinct categories this index can return, in rule order."""
+        return tuple(dict.fromkeys(self._lookup.values()))
+
+    @property
+    def fingerprint(self):
+        """Short stable hash of the compiled rules, e.g. to invalidate cached decisions."""
+        text = repr(sorted(self._lookup.items()))
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+    def classify(self, filename):
+        """Returns the category for filename, or None if no rule matches.
+
+        Suffixes are split the same way pathlib does: leading dots belong to the
+        stem (".bashrc" has no suffix) and a trailing dot means no suffix.
+
+        Args:
+            filename (str): A bare file name (not a path).
+
+        Returns:
+            str: The matching category, or None.
+        """
+        if filename.endswith("."):
+            return None
+        parts = filename.lstrip(".").lower().rsplit(".", self._max_parts)
+        lookup = self._lookup
+        # parts[0] is the stem; try the longest multi-part suffix first.
+        for start in range(1, len(parts)):
+            category = lookup.get("." + ".".join(parts[start:]))
+            if category is not None:
+                return category
+        return None
+
+    def classify_entry(self, entry):
+        """Returns the category for a ScanEntry, or None. Only the name is used."""
+        return self.classify(entry.name)
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_frozen(frozen_rules):
+    return RuleIndex({category: extensions for category, extensions in frozen_rules})
+
+
+def compile_rules(rules=None):
+    """Compiles a rule set into a RuleIndex, reusing the index for identical rule sets.
+
+    Args:
+        rules (dict, optional): Mapping of category -> list of extensions.
+            Defaults to DEFAULT_RULES. Already compiled rules (a RuleIndex, or a
+            rule_engine.RuleSet) are returned as they are.
+
+    Returns:
+        RuleIndex: The compiled, immutable lookup index.
+    """
+    if rules is None:
+        rules = DEFAULT_RULES
+    if hasattr(rules, "classify_entry"): # Compiled already
+        return rules
+    frozen = tuple((category, tuple(extensions)) for category, extensions in rules.items())
+    return _compile_frozen(frozen)
@@ -0,0 +1,307 @@
+import os
+import time
+import sqlite3
+import logging
+import itertools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .transfer import move_file
+
+logger = logging.getLogger("FileSorterEngine.journal")
+
+DEFAULT_JOURNAL_PATH = os.path.join("logs", "journal.sqlite3") # Relative to project root, next to sorter.log
+
+# Moves buffered in memory before they are written and committed in one transaction
+DEFAULT_BATCH_SIZE = 500
+# Buffered moves are also committed when this many seconds passed since the last commit
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+RUN_RUNNING = "running"
+RUN_COMPLETED = "completed"
+RUN_CANCELLED = "cancelled"
+RUN_ROLLED_BACK = "rolled back"
+RUN_PARTIALLY_ROLLED_BACK = "partially rolled back" # Some moves couldn't be undone (conflicts)
+
+JournalRun = namedtuple("JournalRun", ["run_id", "src_dir", "started_at", "finished_at", "status", "moves"])
+# Rollback outcome; conflicts are (source, destination, reason) triples
+RollbackReport = namedtuple("RollbackReport", ["run_id", "restored", "conflicts"])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    src_dir TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moves (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    seq INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class MoveJournal:
+    """Append-only record of every source -> destination move, per run, in SQLite.
+
+    Moves are written ahead: intend() commits a batch of planned moves before any
+    of them starts, and record() confirms each one once done. Confirmations are
+    buffered and committed in batches (WAL mode, synchronous=NORMAL), not one
+    fsync per file. If the process dies, the moves it made since the last commit
+    are still in the journal as unconfirmed intents; rollback_run() checks the
+    files to tell which of those happened. A crashed run stays in the "running"
+    state and can still be rolled back. (A power loss can additionally drop the
+    last commits, as synchronous=NORMAL doesn't fsync each one.)
+
+    Use one instance from one thread; the engine records moves from the thread
+    that consumes the executor's results.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if "done" not in {row[1] for row in self._conn.execute("PRAGMA table_info(moves)")}:
+            with self._conn: # Journals from before write-ahead intents: every row is a completed move
+                self._conn.execute("ALTER TABLE moves ADD COLUMN done INTEGER NOT NULL DEFAULT 1")
+        self._pending = [] # New completed moves: (run_id, seq, source, destination)
+        self._confirmed = [] # Intents since done: (destination, run_id, seq)
+        self._intents = {} # Source -> seq of its unconfirmed intent in the current run
+        self._run_id = None
+        self._seq = 0
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def run_id(self):
+        """Id of the run being recorded, or None."""
+        return self._run_id
+
+    def start_run(self, src_dir):
+        """Opens a new run and returns its id."""
+        if self._run_id is not None:
+            self.finish_run()
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (src_dir, started_at, status) VALUES (?, ?, ?)",
+                (os.path.abspath(src_dir), time.time(), RUN_RUNNING))
+        self._run_id = cursor.lastrowid
+        self._seq = 0
+        self._intents = {}
+        return self._run_id
+
+    def intend(self, moves):
+        """Commits planned (source, destination) moves of the current run before they start.
+
+        Also commits the buffered confirmations, in the same transaction.
+        """
+        rows = []
+        for source, destination in moves:
+            source = os.path.abspath(source)
+            self._seq += 1
+            self._intents[source] = self._seq
+            rows.append((self._run_id, self._seq, source, os.path.abspath(destination)))
+        if not rows:
+            return
+        with self._conn:
+            self._write_pending()
+            self._conn.executemany(
+                "INSERT INTO moves (run_id, seq, source, destination, done) VALUES (?, ?, ?, ?, 0)", rows)
+        self._last_flush = time.monotonic()
+
+    def record(self, source, destination):
+        """Buffers one completed move of the current run, confirming its intent if there is one."""
+        source = os.path.abspath(source)
+        seq = self._intents.pop(source, None)
+        if seq is not None: # The final name may differ from the intended one (collisions)
+            self._confirmed.append((os.path.abspath(destination), self._run_id, seq))
+        else:
+            self._seq += 1
+            self._pending.append((self._run_id, self._seq, source, os.path.abspath(destination)))
+        if (len(self._pending) + len(self._confirmed) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def _write_pending(self):
+        if self._pending:
+            self._conn.executemany(
+                "INSERT INTO moves (run_id, seq, source, destination) VALUES (?, ?, ?, ?)", self._pending)
+            self._pending = []
+        if self._confirmed:
+            self._conn.executemany(
+                "UPDATE moves SET destination = ?, done = 1 WHERE run_id = ? AND seq = ?", self._confirmed)
+            self._confirmed = []
+
+    def flush(self):
+        """Writes and commits all buffered moves and confirmations in one transaction."""
+        if self._pending or self._confirmed:
+            with self._conn:
+                self._write_pending()
+        self._last_flush = time.monotonic()
+
+    def finish_run(self, status=RUN_COMPLETED):
+        """Flushes the current run and marks it finished.
+
+        Intents still unconfirmed are dropped: the run is over, so those moves
+        failed or never started.
+        """
+        if self._run_id is None:
+            return
+        with self._conn:
+            self._write_pending()
+            self._conn.execute("DELETE FROM moves WHERE run_id = ? AND NOT done", (self._run_id,))
+            self._conn.execute("UPDATE runs SET finished_at = ?, status = ? WHERE run_id = ?",
+                               (time.time(), status, self._run_id))
+        self._last_flush = time.monotonic()
+        self._intents = {}
+        self._run_id = None
+
+    def close(self):
+        """Finishes any open run and closes the database."""
+        if self._conn is None:
+            return
+        if self._run_id is not None:
+            self.finish_run()
+        self._conn.close()
+        self._conn = None
+
+    def runs(self):
+        """Returns every recorded run as a JournalRun, newest first."""
+        rows = self._conn.execute(
+            "SELECT r.run_id, r.src_dir, r.started_at, r.finished_at, r.status, "
+            "(SELECT COUNT(*) FROM moves m WHERE m.run_id = r.run_id AND m.done) "
+            "FROM runs r ORDER BY r.run_id DESC").fetchall()
+        return [JournalRun(*row) for row in rows]
+
+    def iter_moves(self, run_id, reverse=False, unconfirmed=False):
+        """Yields (source, destination) for a run's completed moves, in move order (or reversed).
+
+        unconfirmed=True also yields the intents never confirmed (the run stopped or
+        crashed around them), as (source, destination, done) triples.
+        """
+        order = "DESC" if reverse else "ASC"
+        if unconfirmed:
+            cursor = self._conn.execute(
+                f"SELECT source, destination, done FROM moves WHERE run_id = ? ORDER BY seq {order}", (run_id,))
+        else:
+            cursor = self._conn.execute(
+                f"SELECT source, destination FROM moves WHERE run_id = ? AND done ORDER BY seq {order}", (run_id,))
+        yield from cursor
+
+    def set_status(self, run_id, status):
+        with self._conn:
+            self._conn.execute("UPDATE runs SET status = ? WHERE run_id = ?", (status, run_id))
+
+
+# _undo_move() result for an unconfirmed intent whose move never happened
+_NOT_MOVED = "not moved"
+
+
+def _undo_move(source, destination, done=True):
+    """Moves destination back to source. Returns None on success, _NOT_MOVED or a conflict reason.
+
+    For an unconfirmed intent (done false) the files tell whether the move happened:
+    destinations are reserved exclusively, so the intended one exists without the
+    source only if this move created it.
+    """
+    if not done and (os.path.lexists(source) or not os.path.lexists(destination)):
+        return _NOT_MOVED
+    if not os.path.lexists(destination):
+        return "file is no longer at its sorted location"
+    try:
+        os.makedirs(os.path.dirname(source), exist_ok=True)
+        # Exclusive create: never overwrite something that now lives at the original path
+        os.close(os.open(source, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+    except FileExistsError:
+        return "original location is occupied"
+    except OSError as e:
+        return f"cannot restore original location: {e}"
+    try:
+        move_file(destination, source)
+    except OSError as e:
+        try:
+            os.remove(source) # Drop the placeholder
+        except OSError:
+            pass
+        return f"move failed: {e}"
+    return None
+
+
+def rollback_run(run_id, journal_path=DEFAULT_JOURNAL_PATH, workers=4, batch_size=DEFAULT_BATCH_SIZE):
+    """Reverts a recorded run by moving every file back, newest move first.
+
+    Moves are undone in batches on a thread pool. Problems (file gone from its
+    sorted location, original path occupied, ...) are collected as conflicts
+    instead of stopping the rollback; the run is then marked partially rolled back.
+    Intents the run never confirmed are undone if their move happened after all.
+
+    Args:
+        run_id (int): The run to revert (see MoveJournal.runs()).
+        journal_path (str, optional): The journal database.
+        workers (int, optional): Threads moving files back.
+        batch_size (int, optional): Moves read from the journal and dispatched at a time.
+
+    Returns:
+        RollbackReport: (run_id, restored count, list of (source, destination, reason)).
+    """
+    restored = 0
+    conflicts = []
+    with MoveJournal(journal_path) as journal:
+        moves = journal.iter_moves(run_id, reverse=True, unconfirmed=True)
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sorter-rollback") as pool:
+            while True:
+                batch = list(itertools.islice(moves, batch_size))
+                if not batch:
+                    break
+                for (source, destination, _), reason in zip(batch, pool.map(lambda m: _undo_move(*m), batch)):
+                    if reason is None:
+                        restored += 1
+                    elif reason is not _NOT_MOVED:
+                        logger.warning(f"Rollback conflict for '{destination}' -> '{source}': {reason}")
+                        conflicts.append((source, destination, reason))
+        journal.set_status(run_id, RUN_PARTIALLY_ROLLED_BACK if conflicts else RUN_ROLLED_BACK)
+    logger.info(f"Rolled back run {run_id}: {restored} file(s) restored, {len(conflicts)} conflict(s).")
+    return RollbackReport(run_id, restored, conflicts)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or roll back sorter runs recorded in the move journal.")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL_PATH, help="Path to the journal database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List recorded runs.")
+    rollback_parser = subparsers.add_parser("rollback", help="Move the files of a run back where they came from.")
+    rollback_parser.add_argument("run_id", type=int)
+    rollback_parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    if args.command == "list":
+        with MoveJournal(args.journal) as journal:
+            for run in journal.runs():
+                started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run.started_at))
+                print(f"{run.run_id:>5}  {started}  {run.status:<12} {run.moves:>8} move(s)  {run.src_dir}")
+    else:
+        report = rollback_run(args.run_id, journal_path=args.journal, workers=args.workers)
+        print(f"Restored {report.restored} file(s); {len(report.conflicts)} conflict(s).")
+        for source, destination, reason in report.conflicts:
+            print(f"  {destination} -> {source}: {reason}")
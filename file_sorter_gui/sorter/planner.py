@@ -0,0 +1,273 @@
+import os
+import pathlib
+from collections import namedtuple
+
+from .file_rules import DUPLICATES, UNCATEGORIZED, compile_rules
+from .scanner import PRUNE_ERROR, PRUNE_EXCLUDED, PRUNE_LOOP, ScanEntry, walk_directory
+from .stats import (
+    COUNT_COLLISIONS, COUNT_ENTRIES, NULL_STATS, PHASE_CLASSIFY, PHASE_COLLISIONS, PHASE_SCAN, PHASE_SNIFF
+)
+from .utils import NameRegistry
+
+# Reasons an item is left in place
+SKIP_NO_EXTENSION = "no_extension"
+SKIP_DIRECTORY = "directory"
+SKIP_UNKNOWN = "unknown"
+SKIP_LOOP = "loop" # Recursive mode: directory already visited through a symlink
+SKIP_UNREADABLE = "unreadable" # Recursive mode: directory could not be listed
+SKIP_DUPLICATE = "duplicate" # Dedupe mode: the same content is already sorted
+SKIP_EXCLUDED = "excluded" # Excluded by the user when reviewing a preview
+SKIP_IN_PLACE = "in_place" # Recursive mode: already where the rules put it (e.g. under a "{ext}/..." target)
+
+# A planned move: 'destination' is final, collisions are already resolved. With 'link_to'
+# set (dedupe hardlink mode), the destination becomes a hard link to that file instead.
+SortOperation = namedtuple("SortOperation", ["name", "source", "category", "destination", "entry", "link_to"],
+                           defaults=(None,))
+# An item the plan leaves untouched, with one of the SKIP_* reasons.
+SkippedItem = namedtuple("SkippedItem", ["name", "source", "reason"])
+
+
+class SortPlan:
+    """In-memory result of planning a sort: every move and skip, in scan order.
+
+    Building a plan doesn't touch the filesystem beyond listing the source and
+    destination directories, so it doubles as a dry run.
+    """
+
+    def __init__(self, src_dir, items=None, registry=None, target_dir=None):
+        self.src_dir = src_dir
+        # Where the category folders are created; src_dir unless sorting into another folder
+        self.target_dir = target_dir if target_dir is not None else src_dir
+        self.items = list(items) if items is not None else []
+        # The registry that resolved the plan's names; the executor keeps using it.
+        self.registry = registry if registry is not None else NameRegistry()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    @property
+    def operations(self):
+        """The planned moves."""
+        return [item for item in self.items if isinstance(item, SortOperation)]
+
+    @property
+    def skipped(self):
+        """The items the plan leaves in place."""
+        return [item for item in self.items if isinstance(item, SkippedItem)]
+
+    def total_bytes(self):
+        """Returns the combined size of all files the plan moves (stats each entry once)."""
+        total = 0
+        for op in self.operations:
+            try:
+                total += op.entry.stat().st_size
+            except (AttributeError, OSError): # No scan record, or the file vanished since planning
+                pass
+        return total
+
+    def to_dict(self):
+        """Returns a JSON-serializable description of the plan."""
+        return {
+            "src_dir": self.src_dir,
+            "target_dir": self.target_dir,
+            "operations": [
+                {"source": op.source, "category": op.category, "destination": op.destination}
+                for op in self.operations
+            ],
+            "skipped": [{"source": item.source, "reason": item.reason} for item in self.skipped],
+        }
+
+    def diff(self, other):
+        """Compares this plan's moves with another plan's.
+
+        Args:
+            other (SortPlan): The plan to compare against (e.g. from a previous run).
+
+        Returns:
+            tuple: (added, removed) lists of (source, destination) pairs that are
+            only in this plan, and only in the other plan, respectively.
+        """
+        mine = {(op.source, op.destination) for op in self.operations}
+        theirs = {(op.source, op.destination) for op in other.operations}
+        return sorted(mine - theirs), sorted(theirs - mine)
+
+
+def category_folders(src_dir, rule_index):
+    """Returns the normalized paths of every top-level folder the sorter may create in src_dir."""
+    categories = set(rule_index.categories) | {UNCATEGORIZED, DUPLICATES}
+    return {os.path.normcase(os.path.abspath(os.path.join(src_dir, category))) for category in categories}
+
+
+# Skip decisions that hold until the entry itself changes, so they can be reused by incremental runs
+_PERSISTENT_SKIPS = (SKIP_NO_EXTENSION, SKIP_DIRECTORY, SKIP_UNKNOWN)
+
+
+def _iter_entries(src_dir, target_dir, rule_index, recursive, max_depth, follow_symlinks, state):
+    """Yields (ScanEntry, prune_reason) for the items to plan, flat or recursive."""
+    if not recursive:
+        # Flat mode is a walk that never descends: subdirectories come back as pruned
+        return walk_directory(src_dir, max_depth=0, state=state)
+    # The sorter's own output folders are never walked, so sorted files aren't re-sorted.
+    exclude = category_folders(target_dir, rule_index)
+    if target_dir != src_dir: # A target inside the source tree is output as a whole
+        exclude.add(os.path.normcase(os.path.abspath(target_dir)))
+    return walk_directory(src_dir, max_depth=max_depth, follow_symlinks=follow_symlinks,
+                          exclude=exclude, state=state)
+
+
+def plan_fingerprint(rule_index, recursive=False, max_depth=None, follow_symlinks=False, sniff=False):
+    """Identifies the rules and walk options a ScanStateIndex's decisions were made with."""
+    return f"{rule_index.fingerprint}:{int(recursive)}:{max_depth}:{int(follow_symlinks)}:{int(sniff)}"
+
+
+def _plan_entry(entry, prune_reason, target_dir, rule_index, registry, sniffer=None, stats=NULL_STATS):
+    """Decides what happens to one scanned entry: a SortOperation or a SkippedItem."""
+    with stats.phase(PHASE_CLASSIFY):
+        return _classify_entry(entry, prune_reason, target_dir, rule_index, registry, sniffer, stats)
+
+
+def _classify_entry(entry, prune_reason, target_dir, rule_index, registry, sniffer, stats):
+    if prune_reason == PRUNE_LOOP:
+        return SkippedItem(entry.name, entry.path, SKIP_LOOP)
+    elif prune_reason == PRUNE_ERROR:
+        return SkippedItem(entry.name, entry.path, SKIP_UNREADABLE)
+    elif entry.is_file:
+        has_extension = bool(pathlib.Path(entry.name).suffix)
+        category = rule_index.classify_entry(entry)
+        if sniffer is not None:
+            category = sniffer.classify(entry, rule_index, category)
+        if category is None and not has_extension: # Files with no extension stay put, unless recognized
+            return SkippedItem(entry.name, entry.path, SKIP_NO_EXTENSION)
+        # Default to Uncategorized if no rule matches
+        category = category or UNCATEGORIZED
+        # Rule-engine targets may be nested, e.g. "Images/2024/05"
+        wanted = os.path.join(target_dir, *category.split("/"), entry.name)
+        if os.path.normcase(os.path.abspath(wanted)) == os.path.normcase(os.path.abspath(entry.path)):
+            return SkippedItem(entry.name, entry.path, SKIP_IN_PLACE)
+        with stats.phase(PHASE_COLLISIONS):
+            destination = registry.claim(wanted)
+        if destination != wanted:
+            stats.count(COUNT_COLLISIONS)
+        return SortOperation(entry.name, entry.path, category, destination, entry)
+    elif entry.is_dir:
+        return SkippedItem(entry.name, entry.path, SKIP_DIRECTORY)
+    else:
+        return SkippedItem(entry.name, entry.path, SKIP_UNKNOWN)
+
+
+def iter_plan(src_dir, rules=None, registry=None, recursive=False, max_depth=None, follow_symlinks=False,
+              state=None, sniffer=None, target_dir=None, stats=None):
+    """Yields the plan for sorting src_dir one item at a time, in scan order.
+
+    Args:
+        src_dir (str): The source directory containing files to sort.
+        rules (dict, optional): Mapping of category -> extensions. Defaults to DEFAULT_RULES.
+        registry (NameRegistry, optional): Destination name registry; a new one is
+            created if omitted. Share one to plan several batches without collisions.
+        recursive (bool, optional): Also sort files in subdirectories (into the category
+            folders of src_dir). The walk is streamed; only pending directories are
+            kept in memory.
+        max_depth (int, optional): In recursive mode, how many levels below src_dir to
+            descend (0 = src_dir only). None means unlimited.
+        follow_symlinks (bool, optional): In recursive mode, descend into symlinked
+            directories, with loop protection.
+        state (ScanStateIndex, optional): Incremental mode. Unchanged directories are
+            not listed, and unchanged entries that were left in place before are
+            skipped silently. Call state.commit() after executing the plan.
+        sniffer (ContentSniffer, optional): Also classify files by their first bytes, so
+            files with no or a wrong extension are sorted by content. Headers are read
+            ahead in parallel batches.
+        target_dir (str, optional): Create the category folders here instead of in src_dir.
+        stats (RunStats, optional): Records scan, sniff and classify times and counters.
+
+    Yields:
+        SortOperation or SkippedItem
+    """
+    rule_index = compile_rules(rules) # Compiled once per rule set, then O(1) per file
+    if registry is None:
+        registry = NameRegistry()
+    if target_dir is None:
+        target_dir = src_dir
+    if stats is None:
+        stats = NULL_STATS
+    if state is not None:
+        state.rebind(plan_fingerprint(rule_index, recursive, max_depth, follow_symlinks, sniffer is not None))
+
+    scanned = stats.timed(PHASE_SCAN, _iter_entries(src_dir, target_dir, rule_index, recursive, max_depth,
+                                                    follow_symlinks, state))
+    if sniffer is not None:
+        scanned = stats.timed(PHASE_SNIFF, sniffer.prefetch(scanned))
+    entries = 0
+    try:
+        for entry, prune_reason in scanned:
+            entries += 1
+            if prune_reason == PRUNE_EXCLUDED:
+                # The sorter's own output folders (maybe created by this very run) aren't plan items
+                continue
+            if state is not None and prune_reason not in (PRUNE_LOOP, PRUNE_ERROR):
+                decision = state.known_decision(entry)
+                if decision is not None:
+                    state.remember(entry, decision) # Unchanged since it was last left in place
+                    continue
+
+            item = _plan_entry(entry, prune_reason, target_dir, rule_index, registry, sniffer, stats)
+            if state is not None and isinstance(item, SkippedItem) and item.reason in _PERSISTENT_SKIPS:
+                state.remember(entry, item.reason)
+            yield item
+    finally:
+        stats.count(COUNT_ENTRIES, entries)
+
+
+def plan_sort(src_dir, rules=None, recursive=False, max_depth=None, follow_symlinks=False, state=None,
+              sniffer=None, target_dir=None, stats=None):
+    """Builds the complete SortPlan for src_dir without moving anything.
+
+    Args:
+        src_dir (str): The source directory containing files to sort.
+        rules (dict, optional): Mapping of category -> extensions. Defaults to DEFAULT_RULES.
+        recursive, max_depth, follow_symlinks, state, sniffer, target_dir, stats: See iter_plan().
+
+    Returns:
+        SortPlan: The planned moves and skips.
+    """
+    registry = NameRegistry()
+    items = iter_plan(src_dir, rules, registry, recursive=recursive, max_depth=max_depth,
+                      follow_symlinks=follow_symlinks, state=state, sniffer=sniffer, target_dir=target_dir,
+                      stats=stats)
+    return SortPlan(src_dir, items, registry, target_dir)
+
+
+def plan_paths(src_dir, paths, rules=None, registry=None, sniffer=None, target_dir=None):
+    """Builds a SortPlan for specific files of src_dir, e.g. the ones a watcher saw change.
+
+    Paths that no longer exist are left out of the plan.
+
+    Args:
+        src_dir (str): The directory whose category folders receive the files.
+        paths (iterable): Paths of entries inside src_dir (or below it).
+        rules (dict, optional): Mapping of category -> extensions. Defaults to DEFAULT_RULES.
+        registry (NameRegistry, optional): Destination name registry; a new one is
+            created if omitted.
+        sniffer (ContentSniffer, optional): Also classify files by content.
+        target_dir (str, optional): Create the category folders here instead of in src_dir.
+
+    Returns:
+        SortPlan: The planned moves and skips, in the order of paths.
+    """
+    rule_index = compile_rules(rules)
+    if registry is None:
+        registry = NameRegistry()
+    entries = []
+    for path in paths:
+        try:
+            entries.append(ScanEntry.from_path(path))
+        except OSError: # Gone before it could be planned
+            continue
+    if sniffer is not None:
+        sniffer.sniff_many(entry for entry in entries if entry.is_file)
+    target_dir = src_dir if target_dir is None else target_dir
+    items = [_plan_entry(entry, None, target_dir, rule_index, registry, sniffer) for entry in entries]
+    return SortPlan(src_dir, items, registry, target_dir)
@@ -0,0 +1,217 @@
+"""Compact previews of the moves a sort would make, for reviewing (and editing) before running it.
+
+A PlanPreview holds the planned moves of one or more source folders in a few
+flat arrays instead of SortOperation/ScanEntry objects: per row, an index into
+a table of directories, the file name, a category code, the size and an
+exclusion flag, about 100 bytes in total, so a million-file preview fits in
+memory next to the GUI. Sorting and filtering return arrays of row numbers;
+the rows themselves are never copied.
+
+Excluded rows are left in place when the preview is executed: pass
+preview.iter_items(job) as a SortJob's plan (or to execute_plan()).
+"""
+import os
+from array import array
+from collections import namedtuple
+
+from .planner import SKIP_EXCLUDED, SkippedItem, SortOperation, iter_plan
+from .utils import NameRegistry
+
+# Columns rows can be sorted by
+SORT_SOURCE = "source"
+SORT_CATEGORY = "category"
+SORT_NAME = "name" # The final (destination) name
+SORT_SIZE = "size"
+SORT_KEYS = (SORT_SOURCE, SORT_CATEGORY, SORT_NAME, SORT_SIZE)
+
+# Rows planned between two progress callbacks while building a preview
+PROGRESS_EVERY = 1000
+
+# One row, materialized on demand. size is None if the file couldn't be stat'ed.
+PreviewRow = namedtuple("PreviewRow", ["job", "source", "category", "name", "destination", "size", "excluded"])
+
+
+class PlanPreview:
+    """The planned moves of one or more sort jobs, in scan order.
+
+    Not thread-safe: build it on one thread (see build_preview()), then hand it over.
+    """
+
+    def __init__(self):
+        self.jobs = [] # (src_dir, target_dir) per job
+        self.skipped = [] # Items each job leaves in place anyway (directories, files without extension, ...)
+        self.categories = [] # Category names, indexed by code
+        self._category_codes = {}
+        self._directories = [] # Source directories, indexed by code
+        self._directory_codes = {}
+        self._job = array("H")
+        self._directory = array("I")
+        self._names = [] # Source file names
+        self._category = array("I")
+        self._size = array("q") # -1 when unknown
+        self._excluded = bytearray()
+        self._renamed = {} # row -> final name, only for rows whose destination name differs (collisions)
+
+    def __len__(self):
+        return len(self._names)
+
+    @staticmethod
+    def _code(value, table, codes):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(table)
+            table.append(value)
+        return code
+
+    def add_job(self, src_dir, target_dir=None):
+        """Starts a new job; returns its index for add()."""
+        self.jobs.append((src_dir, target_dir if target_dir is not None else src_dir))
+        self.skipped.append(0)
+        return len(self.jobs) - 1
+
+    def add(self, job, item):
+        """Appends a plan item (SortOperation or SkippedItem) of job."""
+        if isinstance(item, SkippedItem):
+            self.skipped[job] += 1
+            return
+        directory, name = os.path.split(item.source)
+        final_name = os.path.basename(item.destination)
+        try:
+            size = item.entry.stat().st_size if item.entry is not None else os.stat(item.source).st_size
+        except OSError:
+            size = -1
+        if final_name != name:
+            self._renamed[len(self._names)] = final_name
+        self._job.append(job)
+        self._directory.append(self._code(directory, self._directories, self._directory_codes))
+        self._names.append(name)
+        self._category.append(self._code(item.category, self.categories, self._category_codes))
+        self._size.append(size)
+        self._excluded.append(0)
+
+    # --- Reading rows ---
+    def source(self, row):
+        return os.path.join(self._directories[self._directory[row]], self._names[row])
+
+    def category(self, row):
+        return self.categories[self._category[row]]
+
+    def name(self, row):
+        """The name the file gets in its category folder."""
+        return self._renamed.get(row, self._names[row])
+
+    def destination(self, row):
+        target_dir = self.jobs[self._job[row]][1]
+        return os.path.join(target_dir, *self.category(row).split("/"), self.name(row))
+
+    def size(self, row):
+        size = self._size[row]
+        return size if size >= 0 else None
+
+    def is_excluded(self, row):
+        return bool(self._excluded[row])
+
+    def row(self, row):
+        """Returns row as a PreviewRow."""
+        return PreviewRow(self._job[row], self.source(row), self.category(row), self.name(row),
+                          self.destination(row), self.size(row), self.is_excluded(row))
+
+    # --- Editing ---
+    def set_excluded(self, rows, excluded=True):
+        """Excludes rows from the sort (or includes them again)."""
+        flag = 1 if excluded else 0
+        for row in rows:
+            self._excluded[row] = flag
+
+    def excluded_count(self):
+        return len(self._excluded) - self._excluded.count(0)
+
+    def included_bytes(self):
+        """Combined size of the files that will be moved (unknown sizes count as 0)."""
+        return sum(size for size, excluded in zip(self._size, self._excluded) if size > 0 and not excluded)
+
+    # --- Views ---
+    def view(self, category=None, sort_key=None, descending=False):
+        """Returns the row numbers to show, as an array: optionally one category only, optionally sorted.
+
+        Args:
+            category (str, optional): Only rows of this category.
+            sort_key (str, optional): One of SORT_KEYS; None keeps scan order.
+            descending (bool, optional): Reverse the sort order.
+        """
+        if category is None:
+            rows = range(len(self))
+        elif category in self._category_codes:
+            code = self._category_codes[category]
+            rows = [row for row, row_code in enumerate(self._category) if row_code == code]
+        else:
+            rows = []
+        if sort_key is None:
+            rows = list(rows)
+            if descending:
+                rows.reverse()
+        else:
+            if sort_key not in SORT_KEYS:
+                raise ValueError(f"Unknown sort key {sort_key!r}; expected one of {', '.join(SORT_KEYS)}")
+            key = {SORT_SOURCE: self.source, SORT_CATEGORY: self._category_key(), SORT_NAME: self.name,
+                   SORT_SIZE: self._size.__getitem__}[sort_key]
+            rows = sorted(rows, key=key, reverse=descending)
+        return array("l", rows)
+
+    def _category_key(self):
+        # Rank the (few) categories once, then sort rows by their rank
+        ranks = {code: rank for rank, code in enumerate(sorted(range(len(self.categories)),
+                                                                key=self.categories.__getitem__))}
+        return lambda row: ranks[self._category[row]]
+
+    # --- Executing ---
+    def iter_items(self, job):
+        """Yields job's plan items in scan order: a SortOperation per included row, a SkippedItem per excluded one.
+
+        The items carry no scan records, so every source is stat'ed again as it is
+        moved; files that changed or vanished since the preview are handled then.
+        """
+        for row in range(len(self)):
+            if self._job[row] != job:
+                continue
+            name = self._names[row]
+            if self._excluded[row]:
+                yield SkippedItem(name, self.source(row), SKIP_EXCLUDED)
+            else:
+                yield SortOperation(name, self.source(row), self.category(row), self.destination(row), None)
+
+
+def build_preview(jobs, rules=None, recursive=False, max_depth=None, follow_symlinks=False, sniffer=None,
+                  progress=None, cancel_event=None):
+    """Plans every job without moving anything and collects the moves in a PlanPreview.
+
+    The plans are streamed into the preview, so only its compact rows are kept.
+    Jobs sorting into the same folder share one name registry, so their
+    destinations don't collide.
+
+    Args:
+        jobs (list): (src_dir, target_dir) pairs (target_dir None sorts in place) or plain source paths.
+        rules (dict, optional): Mapping of category -> extensions, or a RuleSet. Defaults to DEFAULT_RULES.
+        recursive, max_depth, follow_symlinks, sniffer: See planner.iter_plan().
+        progress (callable, optional): Called as progress(rows_planned) every PROGRESS_EVERY rows.
+        cancel_event (threading.Event, optional): Set it to stop early; the preview then
+            holds the rows planned so far.
+
+    Returns:
+        PlanPreview
+    """
+    preview = PlanPreview()
+    registries = {} # Normalized target folder -> NameRegistry
+    for job in jobs:
+        src_dir, target_dir = (job, None) if isinstance(job, str) else tuple(job)[:2]
+        index = preview.add_job(src_dir, target_dir)
+        target_key = os.path.normcase(os.path.abspath(target_dir or src_dir))
+        registry = registries.setdefault(target_key, NameRegistry())
+        for item in iter_plan(src_dir, rules, registry, recursive=recursive, max_depth=max_depth,
+                              follow_symlinks=follow_symlinks, sniffer=sniffer, target_dir=target_dir):
+            if cancel_event is not None and cancel_event.is_set():
+                return preview
+            preview.add(index, item)
+            if progress is not None and len(preview) % PROGRESS_EVERY == 0 and isinstance(item, SortOperation):
+                progress(len(preview))
+    return preview
@@ -0,0 +1,293 @@
+"""Declarative multi-criteria sorting rules.
+
+A rule file is JSON. The plain extension format of DEFAULT_RULES is accepted
+as is; the extended format adds ordered rules on names, sizes and dates:
+
+    {
+      "categories": {"Images": [".jpg", ".png"], "Documents": [".pdf"]},
+      "rules": [
+        {"name": "Big videos", "priority": 10, "extensions": [".mp4", ".mkv"],
+         "min_size": "1 GiB", "target": "Video/Large"},
+        {"name": "Screenshots", "glob": "Screenshot*", "target": "Images/Screenshots"},
+        {"name": "Invoices", "regex": "^invoice[-_]\\\\d+", "target": "Documents/Invoices"},
+        {"name": "Photos by month", "extensions": [".jpg", ".png"], "target": "{category}/{year}/{month}"}
+      ]
+    }
+
+A file goes to the target of the first rule (highest priority, then file
+order) whose criteria all hold; otherwise it is classified by extension with
+"categories" (DEFAULT_RULES if omitted). Criteria: extensions, glob, regex,
+min_size, max_size, modified_after, modified_before, older_than_days,
+newer_than_days. Targets may use {category}, {ext}, {year}, {month} and {day}
+(from the modification time). Globs ignore case; regexes are searched in the
+name as written, so use scoped flags such as (?i:...) for case-insensitivity.
+"""
+import os
+import re
+import json
+import time
+import string
+import fnmatch
+import hashlib
+from collections import namedtuple
+
+from .file_rules import DEFAULT_RULES, UNCATEGORIZED, compile_rules
+from .utils import parse_date, parse_size
+
+_CRITERIA = {"extensions", "glob", "regex", "min_size", "max_size", "modified_after", "modified_before",
+             "older_than_days", "newer_than_days"}
+_RULE_KEYS = _CRITERIA | {"name", "priority", "target"}
+_PLACEHOLDERS = {"category", "ext", "year", "month", "day"}
+_DATE_PLACEHOLDERS = {"year", "month", "day"}
+# Backreferences would point at the wrong group once patterns are combined
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+# older_than and newer_than are ages in seconds, compared with the time of each evaluation
+_CompiledRule = namedtuple("_CompiledRule", [
+    "name", "extensions", "pattern", "in_combined", "min_size", "max_size", "after", "before",
+    "older_than", "newer_than", "target", "needs_stat", "needs_date"])
+
+
+def _name_pattern(rule):
+    """Returns the rule's glob/regex as one regex source matched from the start of the name, or None."""
+    sources = []
+    for glob in ([rule["glob"]] if isinstance(rule.get("glob"), str) else rule.get("glob") or []):
+        sources.append(f"(?i:{fnmatch.translate(glob)})")
+    if rule.get("regex"):
+        sources.append(f".*?(?:{rule['regex']})") # Search semantics, but anchored so branch order decides
+    if not sources:
+        return None
+    # All of a rule's name patterns must match: lookaheads for all but the last
+    return "".join(f"(?={source})" for source in sources[:-1]) + sources[-1]
+
+
+def _rule_label(rule, position):
+    return rule.get("name") or f"rule {position + 1}"
+
+
+def _number(rule, key, label, default=None):
+    """Returns rule[key] as a number; raises ValueError if it isn't one."""
+    value = rule.get(key, default)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    raise ValueError(f"{label}: {key} must be a number, not {value!r}")
+
+
+def _compile_rule(rule, position):
+    label = _rule_label(rule, position)
+    unknown = set(rule) - _RULE_KEYS
+    if unknown:
+        raise ValueError(f"{label}: unknown key(s) {', '.join(sorted(unknown))}")
+    target = rule.get("target")
+    if not target or not isinstance(target, str):
+        raise ValueError(f"{label}: a target folder is required")
+    target = target.replace("\\", "/").strip("/")
+    if os.path.isabs(target) or ".." in target.split("/"):
+        raise ValueError(f"{label}: the target must be a folder inside the sorted directory")
+    fields = {field for _, field, _, _ in string.Formatter().parse(target) if field is not None}
+    if fields - _PLACEHOLDERS:
+        raise ValueError(f"{label}: unknown placeholder(s) {', '.join(sorted(fields - _PLACEHOLDERS))}")
+
+    extensions = None
+    if rule.get("extensions"):
+        if not isinstance(rule["extensions"], (list, tuple)) or not all(
+                isinstance(extension, str) for extension in rule["extensions"]):
+            raise ValueError(f"{label}: extensions must be a list of strings, e.g. [\".jpg\", \".png\"]")
+        extensions = frozenset("." + extension.strip().lstrip(".").lower() for extension in rule["extensions"])
+    source = _name_pattern(rule)
+    try:
+        pattern = re.compile(source, re.S) if source is not None else None
+    except re.error as e:
+        raise ValueError(f"{label}: invalid pattern: {e}") from None
+
+    min_size = parse_size(rule["min_size"]) if "min_size" in rule else None
+    max_size = parse_size(rule["max_size"]) if "max_size" in rule else None
+    after = parse_date(rule["modified_after"]) if "modified_after" in rule else None
+    before = parse_date(rule["modified_before"]) if "modified_before" in rule else None
+    older_than = _number(rule, "older_than_days", label)
+    newer_than = _number(rule, "newer_than_days", label)
+    older_than = older_than * 86400 if older_than is not None else None
+    newer_than = newer_than * 86400 if newer_than is not None else None
+
+    needs_date = bool(fields & _DATE_PLACEHOLDERS)
+    needs_stat = needs_date or any(value is not None
+                                   for value in (min_size, max_size, after, before, older_than, newer_than))
+    in_combined = source is not None and not _BACKREFERENCE.search(source)
+    return _CompiledRule(label, extensions, pattern, in_combined, min_size, max_size, after, before,
+                         older_than, newer_than, target, needs_stat, needs_date)
+
+
+class RuleSet:
+    """Compiled multi-criteria rules: an evaluation plan run once per file.
+
+    At compile time rules are ordered by priority and every glob and regex is
+    folded into one alternation, branches in rule order. Per file:
+
+    1. The name's suffixes are computed once, so extension criteria are set lookups.
+    2. One match of the combined regex finds the first rule whose name pattern
+       matches; rules before it are known not to match without further work.
+    3. The file is stat'ed only when a rule that passed the name checks needs
+       its size or date, and at most once (the ScanEntry caches it).
+
+    Duck-types RuleIndex (classify, categories, fingerprint), so it can be passed
+    wherever rules are accepted.
+    """
+
+    def __init__(self, rules=(), categories=None, now=None):
+        """
+        Args:
+            rules (list): Rule dicts as in the module docstring.
+            categories (dict, optional): Extension -> category fallback. Defaults to DEFAULT_RULES.
+            now (float, optional): Reference time for older_than_days/newer_than_days. Defaults
+                to the time each file is classified, so a long-lived rule set doesn't go stale.
+        """
+        self._now = now
+        self._index = compile_rules(categories if categories is not None else DEFAULT_RULES)
+        priorities = [_number(rule, "priority", _rule_label(rule, position), 0) for position, rule in enumerate(rules)]
+        ordered = sorted(enumerate(rules), key=lambda item: (-priorities[item[0]], item[0]))
+        self._rules = tuple(_compile_rule(rule, position) for position, rule in ordered)
+        # Longest multi-part extension a rule asks for (".tar.gz" has 2 parts)
+        self._max_parts = max([1] + [extension.count(".") for rule in self._rules for extension in rule.extensions or ()])
+
+        branches = {f"_r{rank}": rule.pattern.pattern for rank, rule in enumerate(self._rules) if rule.in_combined}
+        self._combined = None
+        if branches:
+            try:
+                self._combined = re.compile("|".join(f"(?P<{group}>{source})" for group, source in branches.items()),
+                                            re.S)
+            except re.error: # e.g. clashing group names: evaluate the patterns one by one
+                self._rules = tuple(rule._replace(in_combined=False) for rule in self._rules)
+
+        key = repr([rule._replace(extensions=sorted(rule.extensions or ()),
+                                  pattern=rule.pattern.pattern if rule.pattern else None) for rule in self._rules])
+        self._fingerprint = hashlib.sha1(f"{self._index.fingerprint}:{key}".encode("utf-8")).hexdigest()[:16]
+
+    def __len__(self):
+        return len(self._rules)
+
+    def __repr__(self):
+        return f"RuleSet({len(self._rules)} rules, {len(self._index)} extensions)"
+
+    @property
+    def extension_index(self):
+        """The RuleIndex used when no rule matches."""
+        return self._index
+
+    @property
+    def categories(self):
+        """Top-level folders this rule set can sort into, where known up front."""
+        folders = dict.fromkeys(self._index.categories)
+        for rule in self._rules:
+            top = rule.target.split("/")[0]
+            if "{" not in top:
+                folders[top] = None
+        return tuple(folders)
+
+    @property
+    def fingerprint(self):
+        """Short stable hash of the compiled rules, e.g. to invalidate cached decisions."""
+        return self._fingerprint
+
+    def _suffixes(self, lower_name):
+        parts = lower_name.lstrip(".").rsplit(".", self._max_parts)
+        return {"." + ".".join(parts[start:]) for start in range(1, len(parts))}
+
+    def _evaluate(self, name, entry):
+        lower_name = name.lower()
+        suffixes = None
+        first_named = len(self._rules) # Rank of the first rule whose combined name pattern matches
+        if self._combined is not None:
+            match = self._combined.match(name)
+            if match is not None:
+                first_named = int(match.lastgroup[2:])
+
+        for rank, rule in enumerate(self._rules):
+            if rule.extensions is not None:
+                if suffixes is None:
+                    suffixes = self._suffixes(lower_name)
+                if suffixes.isdisjoint(rule.extensions):
+                    continue
+            if rule.pattern is not None:
+                if rule.in_combined and rank < first_named:
+                    continue
+                if (not rule.in_combined or rank > first_named) and rule.pattern.match(name) is None:
+                    continue
+            st = None
+            if rule.needs_stat:
+                if entry is None:
+                    continue # Name-only classification can't decide this rule
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if rule.min_size is not None and st.st_size < rule.min_size:
+                    continue
+                if rule.max_size is not None and st.st_size > rule.max_size:
+                    continue
+                if rule.after is not None and st.st_mtime < rule.after:
+                    continue
+                if rule.before is not None and st.st_mtime >= rule.before:
+                    continue
+                if rule.older_than is not None or rule.newer_than is not None:
+                    age = (time.time() if self._now is None else self._now) - st.st_mtime
+                    if rule.older_than is not None and age <= rule.older_than:
+                        continue
+                    if rule.newer_than is not None and age > rule.newer_than:
+                        continue
+            return self._render(rule, name, st)
+        return self._index.classify(name)
+
+    def _render(self, rule, name, st):
+        if "{" not in rule.target:
+            return rule.target
+        extension = os.path.splitext(name)[1]
+        values = {"category": self._index.classify(name) or UNCATEGORIZED,
+                  "ext": extension.lstrip(".").lower() or "no extension"}
+        if rule.needs_date:
+            modified = time.localtime(st.st_mtime)
+            values.update(year=f"{modified.tm_year:04d}", month=f"{modified.tm_mon:02d}",
+                          day=f"{modified.tm_mday:02d}")
+        return rule.target.format_map(values)
+
+    def classify(self, filename):
+        """Returns the target folder for a bare file name, or None.
+
+        Rules that need size or date information are skipped.
+        """
+        return self._evaluate(filename, None)
+
+    def classify_entry(self, entry):
+        """Returns the target folder (e.g. "Images/2024/05") for a ScanEntry, or None."""
+        return self._evaluate(entry.name, entry)
+
+
+def load_rules(path):
+    """Loads a JSON rule file.
+
+    Returns:
+        RuleIndex or RuleSet: A RuleIndex for the plain {category: [extensions]} format,
+        a RuleSet for the format with a "rules" list.
+
+    Raises:
+        ValueError: If the file isn't a valid rule file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: not valid JSON: {e}") from None
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: expected a JSON object")
+    if "rules" not in config:
+        return compile_rules(config)
+    unknown = set(config) - {"rules", "categories"}
+    if unknown:
+        raise ValueError(f"{path}: unknown key(s) {', '.join(sorted(unknown))}")
+    return RuleSet(config["rules"], config.get("categories"))
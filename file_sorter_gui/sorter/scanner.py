@@ -0,0 +1,190 @@
+import os
+import stat
+
+
+class ScanEntry:
+    """Lightweight record for one directory entry produced by scan_directory().
+
+    The file type comes from the dirent returned by os.scandir (no extra
+    syscall on most platforms), and stat information is fetched lazily at most
+    once and then cached, so consumers can share it instead of re-stat'ing.
+    """
+
+    __slots__ = ("name", "path", "is_file", "is_dir", "is_symlink", "_stat")
+
+    def __init__(self, name, path, is_file, is_dir, is_symlink=False, stat_result=None):
+        self.name = name
+        self.path = path
+        self.is_file = is_file
+        self.is_dir = is_dir
+        self.is_symlink = is_symlink
+        self._stat = stat_result
+
+    @classmethod
+    def from_dir_entry(cls, dir_entry):
+        """Builds a ScanEntry from an os.DirEntry, reusing its cached type information."""
+        try:
+            is_file = dir_entry.is_file()
+            is_dir = not is_file and dir_entry.is_dir()
+            is_symlink = dir_entry.is_symlink()
+        except OSError:
+            is_file = is_dir = is_symlink = False
+        # On Windows the stat data comes with the directory listing for free.
+        stat_result = dir_entry.stat() if os.name == 'nt' and (is_file or is_dir) else None
+        return cls(dir_entry.name, dir_entry.path, is_file, is_dir, is_symlink, stat_result)
+
+    @classmethod
+    def from_path(cls, path):
+        """Builds a ScanEntry for a single path (types follow symlinks, like os.DirEntry's).
+
+        Raises:
+            OSError: If path doesn't exist.
+        """
+        lstat_result = os.lstat(path)
+        is_symlink = stat.S_ISLNK(lstat_result.st_mode)
+        stat_result = lstat_result
+        if is_symlink:
+            try:
+                stat_result = os.stat(path)
+            except OSError: # Dangling link: neither a file nor a directory
+                return cls(os.path.basename(path), path, False, False, True)
+        is_file = stat.S_ISREG(stat_result.st_mode)
+        is_dir = stat.S_ISDIR(stat_result.st_mode)
+        return cls(os.path.basename(path), path, is_file, is_dir, is_symlink, stat_result)
+
+    def stat(self):
+        """Returns the (cached) os.stat_result for this entry, following symlinks."""
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    @property
+    def has_stat(self):
+        """True if stat information has already been fetched for this entry."""
+        return self._stat is not None
+
+    def __repr__(self):
+        kind = "file" if self.is_file else "dir" if self.is_dir else "other"
+        return f"ScanEntry({self.name!r}, {kind})"
+
+
+def scan_directory(directory):
+    """Yields a ScanEntry for every item directly inside directory.
+
+    Uses a single os.scandir pass; no per-entry isfile/isdir calls are made.
+
+    Args:
+        directory (str): The directory to list.
+
+    Yields:
+        ScanEntry: One record per directory entry, in listing order.
+    """
+    with os.scandir(directory) as it:
+        for dir_entry in it:
+            yield ScanEntry.from_dir_entry(dir_entry)
+
+
+# Reasons walk_directory() gives for not descending into a directory
+PRUNE_EXCLUDED = "excluded"
+PRUNE_DEPTH = "depth"
+PRUNE_SYMLINK = "symlink"
+PRUNE_LOOP = "loop"
+PRUNE_ERROR = "error"
+
+
+def walk_directory(root, max_depth=None, follow_symlinks=False, exclude=None, state=None):
+    """Walks the tree below root, streaming one entry at a time.
+
+    The walk is depth-first with an explicit stack, so memory holds only the
+    directories still waiting to be listed, never the full file list.
+    Directories that are descended into are not yielded themselves.
+
+    Args:
+        root (str): The top directory; its direct children are at depth 0.
+        max_depth (int, optional): Deepest level to descend into (0 = root only).
+            None means unlimited.
+        follow_symlinks (bool, optional): Descend into symlinked directories. Each
+            directory's (st_dev, st_ino) is remembered so a symlink loop prunes that
+            branch instead of recursing forever.
+        exclude (set, optional): Directory paths, as os.path.normcase(os.path.abspath(p)),
+            never to descend into, e.g. the sorter's own category folders.
+        state (ScanStateIndex, optional): Incremental mode. Each directory is stat'ed
+            first; if the index knows it unchanged, it isn't listed at all and only
+            its known subdirectories are walked.
+
+    Yields:
+        tuple: (ScanEntry, prune_reason). prune_reason is None for files and other
+        non-directory entries, and one of the PRUNE_* constants for directories
+        that are not descended into.
+    """
+    exclude = exclude or set()
+    visited = set()
+    if follow_symlinks:
+        root_stat = os.stat(root)
+        visited.add((root_stat.st_dev, root_stat.st_ino))
+
+    def prune_reason(entry, depth):
+        if exclude and os.path.normcase(os.path.abspath(entry.path)) in exclude:
+            return PRUNE_EXCLUDED
+        if max_depth is not None and depth >= max_depth:
+            return PRUNE_DEPTH
+        if entry.is_symlink and not follow_symlinks:
+            return PRUNE_SYMLINK
+        if follow_symlinks:
+            try:
+                dir_stat = entry.stat()
+            except OSError:
+                return PRUNE_ERROR
+            key = (dir_stat.st_dev, dir_stat.st_ino)
+            if key in visited:
+                return PRUNE_LOOP
+            visited.add(key)
+        return None
+
+    stack = [(root, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        subdirectories = []
+
+        if state is not None:
+            try:
+                dir_stat = os.stat(directory)
+            except OSError:
+                if directory == root:
+                    raise
+                yield ScanEntry(os.path.basename(directory), directory, False, True), PRUNE_ERROR
+                continue
+            known = state.known_subdirectories(directory, dir_stat)
+            if known is not None:
+                # Unchanged since the last run: skip the listing, just walk on
+                for path, is_symlink in known:
+                    entry = ScanEntry(os.path.basename(path), path, False, True, is_symlink)
+                    if prune_reason(entry, depth) is None:
+                        subdirectories.append(path)
+                stack.extend((path, depth + 1) for path in reversed(subdirectories))
+                continue
+
+        try:
+            iterator = os.scandir(directory)
+        except OSError:
+            if directory == root:
+                raise
+            yield ScanEntry(os.path.basename(directory), directory, False, True), PRUNE_ERROR
+            continue
+        children = []
+        with iterator:
+            for dir_entry in iterator:
+                entry = ScanEntry.from_dir_entry(dir_entry)
+                if not entry.is_dir:
+                    yield entry, None
+                    continue
+                children.append((entry.path, entry.is_symlink))
+                reason = prune_reason(entry, depth)
+                if reason is None:
+                    subdirectories.append(entry.path)
+                else:
+                    yield entry, reason
+        if state is not None:
+            state.observe_directory(directory, dir_stat, children)
+        # Reversed so sibling directories are walked in listing order
+        stack.extend((path, depth + 1) for path in reversed(subdirectories))
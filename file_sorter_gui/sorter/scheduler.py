@@ -0,0 +1,272 @@
+"""Sorting many source folders at once, scheduled by the disks they live on.
+
+Every job (a source folder and the folder it is sorted into) needs a slot on
+each disk it touches. Jobs on different disks run in parallel; jobs sharing a
+disk are throttled to that disk's limit: one at a time on a spinning disk,
+where parallel streams only add seeks, a few at a time on SSDs. A job that
+can't start doesn't hold up the ones behind it, so an idle disk picks up the
+next job for it right away.
+"""
+import os
+import time
+import logging
+import threading
+import functools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .journal import MoveJournal
+from .state_index import ScanStateIndex, default_state_path
+from .sorter_engine import ensure_logging, sort_files_by_extension
+
+logger = logging.getLogger("FileSorterEngine.scheduler")
+
+# Jobs at once per disk, when no limit is given for it
+ROTATIONAL_CONCURRENCY = 1
+SOLID_STATE_CONCURRENCY = 4
+UNKNOWN_CONCURRENCY = 2 # Network shares, tmpfs, platforms without /sys
+
+# One source folder to sort; target_dir None sorts it in place. plan (optional) is applied
+# instead of planning src_dir, e.g. the items of an edited preview.
+SortJob = namedtuple("SortJob", ["src_dir", "target_dir", "plan"], defaults=(None, None))
+# How one job went. error is None, or why the job didn't run (or stopped).
+SourceReport = namedtuple("SourceReport", [
+    "src_dir", "target_dir", "moved", "skipped", "bytes_moved", "seconds",
+    "files_per_second", "bytes_per_second", "error"])
+# All jobs together; seconds is wall-clock time, so the rates include the gain from parallelism
+BatchReport = namedtuple("BatchReport", [
+    "sources", "moved", "skipped", "bytes_moved", "seconds", "files_per_second", "bytes_per_second"])
+
+
+def _rate(amount, seconds):
+    return amount / seconds if seconds > 0 else 0.0
+
+
+def _existing_ancestor(path):
+    """Returns path, or its closest existing parent (a target folder may not exist yet)."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+@functools.lru_cache(maxsize=None)
+def _disk_of(st_dev):
+    """Maps a st_dev to the disk behind it, so partitions of one disk share their slots (Linux)."""
+    block = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+    if not os.path.isdir(block): # Not a block device (tmpfs, NFS, ...) or no sysfs
+        return f"dev:{st_dev}"
+    if os.path.exists(os.path.join(block, "partition")):
+        block = os.path.dirname(block)
+    return os.path.basename(block)
+
+
+def device_key(path):
+    """Returns an id of the disk holding path (e.g. "sda"); equal ids mean the same disk."""
+    return _disk_of(os.stat(_existing_ancestor(path)).st_dev)
+
+
+def default_concurrency(disk):
+    """Returns how many jobs may use a disk at once, from whether it is rotational."""
+    try:
+        with open(f"/sys/block/{disk}/queue/rotational", "r") as f:
+            rotational = f.read().strip() == "1"
+    except OSError:
+        return UNKNOWN_CONCURRENCY
+    return ROTATIONAL_CONCURRENCY if rotational else SOLID_STATE_CONCURRENCY
+
+
+class DeviceSlots:
+    """Counts the jobs running on each disk against per-disk limits.
+
+    Not locked; the scheduler calls it with its own lock held.
+    """
+
+    def __init__(self, limits=None, default_limit=None):
+        """
+        Args:
+            limits (dict, optional): disk id -> jobs at once on that disk.
+            default_limit (int, optional): Limit for other disks. None picks one per
+                disk with default_concurrency().
+        """
+        self._limits = dict(limits or {})
+        self._default_limit = default_limit
+        self._in_use = {}
+
+    def limit(self, disk):
+        if disk not in self._limits:
+            self._limits[disk] = self._default_limit or default_concurrency(disk)
+        return max(1, self._limits[disk])
+
+    def try_acquire(self, disks):
+        """Takes a slot on every disk in disks, or on none of them; returns whether it did."""
+        if any(self._in_use.get(disk, 0) >= self.limit(disk) for disk in disks):
+            return False
+        for disk in disks:
+            self._in_use[disk] = self._in_use.get(disk, 0) + 1
+        return True
+
+    def release(self, disks):
+        for disk in disks:
+            self._in_use[disk] -= 1
+
+
+def _as_job(job):
+    if isinstance(job, SortJob):
+        return job
+    if isinstance(job, str):
+        return SortJob(job)
+    return SortJob(*job)
+
+
+def _folders(job):
+    return {os.path.normcase(os.path.abspath(path)) for path in (job.src_dir, job.target_dir) if path}
+
+
+def _overlaps(job, other):
+    """True if two jobs read or write the same folders (one inside the other counts)."""
+    for path in _folders(job):
+        for other_path in _folders(other):
+            if path == other_path or path.startswith(other_path + os.sep) or other_path.startswith(path + os.sep):
+                return True
+    return False
+
+
+def _sort_one(job, rules, workers, progress, cancel_event, journal_path, incremental, stats, options):
+    """Runs one job on the calling thread; returns its SourceReport."""
+    last_event = None
+
+    def on_progress(event):
+        nonlocal last_event
+        last_event = event
+        if progress is not None:
+            progress(event)
+
+    started = time.perf_counter()
+    # SQLite connections stay on the thread that opened them
+    journal = MoveJournal(journal_path) if journal_path else None
+    state_index = ScanStateIndex(default_state_path(job.src_dir)) if incremental else None
+    try:
+        moved, skipped = sort_files_by_extension(job.src_dir, rules, workers=workers, progress=on_progress,
+                                                 cancel_event=cancel_event, journal=journal,
+                                                 state_index=state_index, target_dir=job.target_dir, stats=stats,
+                                                 plan=job.plan, **options)
+    finally:
+        for resource in (journal, state_index):
+            if resource is not None:
+                resource.close()
+    seconds = time.perf_counter() - started
+    bytes_moved = last_event.bytes_done if last_event is not None else 0
+    error = "cancelled" if cancel_event.is_set() else None
+    return SourceReport(job.src_dir, job.target_dir, moved, skipped, bytes_moved, seconds,
+                        _rate(moved, seconds), _rate(bytes_moved, seconds), error)
+
+
+def sort_sources(jobs, rules=None, per_device=None, device_limits=None, max_parallel=None, workers=1,
+                 progress=None, cancel_event=None, journal_path=None, incremental=False, log_each_file=True,
+                 recursive=False, max_depth=None, follow_symlinks=False, sniffer=None, dedupe=None, stats=None,
+                 transfer_mode=None):
+    """Sorts several source folders, running jobs on different disks in parallel.
+
+    Jobs start in the order given, as soon as every disk they touch (source and
+    target) has a free slot. Jobs whose folders overlap never run at the same time.
+
+    Args:
+        jobs (list): SortJob instances, (src_dir, target_dir[, plan]) tuples or plain source paths.
+        rules (dict, optional): Mapping of category -> extensions, or a RuleSet. Defaults to DEFAULT_RULES.
+        per_device (int, optional): Jobs at once on any one disk. None picks a limit per
+            disk: 1 for spinning disks, more for SSDs.
+        device_limits (dict, optional): path -> jobs at once on the disk holding that path;
+            overrides per_device for those disks.
+        max_parallel (int, optional): Jobs at once overall. Defaults to the number of jobs.
+        workers (int, optional): Threads moving files within each job.
+        progress (callable, optional): Called as progress(job_index, ProgressEvent) from the
+            job's thread.
+        cancel_event (threading.Event, optional): Set it to stop running jobs and start no more.
+        journal_path (str, optional): Record each job as a run in this move journal.
+        incremental (bool, optional): Keep a state index per source (see default_state_path()).
+        stats (RunStats, optional): Collects the statistics of all jobs together.
+        log_each_file, recursive, max_depth, follow_symlinks, sniffer, dedupe, transfer_mode: See
+            sort_files_by_extension(); they apply to every job.
+
+    Returns:
+        BatchReport: Counts and throughput per source (in job order) and overall.
+    """
+    ensure_logging()
+    jobs = [_as_job(job) for job in jobs]
+    cancel_event = cancel_event if cancel_event is not None else threading.Event()
+    limits = {}
+    for path, limit in (device_limits or {}).items():
+        limits[device_key(path)] = limit
+    slots = DeviceSlots(limits, per_device)
+    options = dict(log_each_file=log_each_file, recursive=recursive, max_depth=max_depth,
+                   follow_symlinks=follow_symlinks, sniffer=sniffer, dedupe=dedupe, transfer_mode=transfer_mode)
+
+    reports = [None] * len(jobs)
+    pending = [] # (index, job, disks), in start order
+    for index, job in enumerate(jobs):
+        if not os.path.isdir(job.src_dir):
+            logger.error(f"Source directory '{job.src_dir}' not found or is not a directory.")
+            reports[index] = SourceReport(job.src_dir, job.target_dir, 0, 0, 0, 0.0, 0.0, 0.0, "not a directory")
+            continue
+        disks = {device_key(job.src_dir), device_key(job.target_dir or job.src_dir)}
+        pending.append((index, job, disks))
+
+    condition = threading.Condition()
+    running = {} # index -> job
+
+    def run(index, job, disks):
+        report = None
+        try:
+            job_progress = functools.partial(progress, index) if progress is not None else None
+            report = _sort_one(job, rules, workers, job_progress, cancel_event, journal_path, incremental, stats,
+                               options)
+        except Exception as e:
+            logger.error(f"Sorting '{job.src_dir}' failed: {e}")
+            report = SourceReport(job.src_dir, job.target_dir, 0, 0, 0, 0.0, 0.0, 0.0, str(e))
+        finally:
+            with condition:
+                reports[index] = report
+                slots.release(disks)
+                del running[index]
+                condition.notify()
+
+    if stats is not None:
+        stats.start()
+    started = time.perf_counter()
+    max_parallel = max(1, max_parallel or len(pending))
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="sorter-source") as pool:
+        with condition:
+            while pending and not cancel_event.is_set():
+                for entry in list(pending):
+                    index, job, disks = entry
+                    if len(running) >= max_parallel:
+                        break
+                    if any(_overlaps(job, other) for other in running.values()):
+                        continue
+                    if slots.try_acquire(disks):
+                        pending.remove(entry)
+                        running[index] = job
+                        pool.submit(run, index, job, disks)
+                if pending:
+                    condition.wait(0.5) # Woken when a job finishes; the timeout notices cancellation
+    seconds = time.perf_counter() - started
+    if stats is not None:
+        stats.finish()
+
+    for index, job, _ in pending: # Never started: cancelled first
+        reports[index] = SourceReport(job.src_dir, job.target_dir, 0, 0, 0, 0.0, 0.0, 0.0, "cancelled")
+    for report in reports:
+        if report.error is None:
+            logger.info(f"'{report.src_dir}': {report.moved} file(s) moved in {report.seconds:.2f}s "
+                        f"({report.files_per_second:.0f} files/s, {report.bytes_per_second / 1024 ** 2:.1f} MB/s).")
+    moved = sum(report.moved for report in reports)
+    skipped = sum(report.skipped for report in reports)
+    bytes_moved = sum(report.bytes_moved for report in reports)
+    logger.info(f"All sources: {moved} file(s) moved, {skipped} item(s) skipped in {seconds:.2f}s "
+                f"({_rate(moved, seconds):.0f} files/s, {_rate(bytes_moved, seconds) / 1024 ** 2:.1f} MB/s).")
+    return BatchReport(reports, moved, skipped, bytes_moved, seconds, _rate(moved, seconds),
+                       _rate(bytes_moved, seconds))
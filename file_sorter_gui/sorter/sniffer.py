@@ -0,0 +1,235 @@
+import os
+import threading
+import itertools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Bytes read from the start of each file; covers every signature below (tar's is at 257)
+HEADER_SIZE = 512
+# Results kept in the LRU cache
+DEFAULT_CACHE_SIZE = 65536
+# Threads reading headers in sniff_many()
+DEFAULT_WORKERS = 8
+# Entries per batch when prefetch() reads ahead of a streamed scan
+PREFETCH_BATCH = 256
+
+# Magic-byte signatures: ((offset, bytes), ...) -> extensions the content is consistent
+# with. The first extension names the type when it has to be classified by content.
+# More specific signatures come first (e.g. RIFF/WAVE before anything shorter).
+# The two-byte WEAK_SIGNATURES ("MZ", gzip's 1f 8b, MP3/AAC frame syncs) also start
+# ordinary files, so they only classify files without an extension.
+SIGNATURES = (
+    (((0, b"\x89PNG\r\n\x1a\n"),), (".png",)),
+    (((0, b"\xff\xd8\xff"),), (".jpg", ".jpeg")),
+    (((0, b"GIF87a"),), (".gif",)),
+    (((0, b"GIF89a"),), (".gif",)),
+    (((0, b"%PDF-"),), (".pdf", ".ai")),
+    (((0, b"%!PS-Adobe"),), (".ai", ".eps", ".ps")),
+    (((0, b"8BPS"),), (".psd",)),
+    (((0, b"RIFF"), (8, b"WAVE")), (".wav",)),
+    (((0, b"RIFF"), (8, b"AVI ")), (".avi",)),
+    (((0, b"ID3"),), (".mp3",)),
+    (((0, b"fLaC"),), (".flac",)),
+    (((4, b"ftypqt"),), (".mov",)),
+    (((4, b"ftyp"),), (".mp4", ".m4a", ".m4v", ".mov", ".3gp")),
+    (((0, b"\x1a\x45\xdf\xa3"),), (".mkv", ".webm")),
+    (((0, b"PK\x03\x04"),), (".zip", ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp", ".jar", ".apk", ".epub")),
+    (((0, b"Rar!\x1a\x07"),), (".rar",)),
+    (((0, b"7z\xbc\xaf\x27\x1c"),), (".7z",)),
+    (((0, b"\x1f\x8b"),), (".gz", ".tgz")),
+    (((257, b"ustar"),), (".tar",)),
+    (((0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"),), (".doc", ".xls", ".ppt", ".msi")),
+    (((0, b"MZ"),), (".exe", ".dll")),
+    (((0, b"\xff\xfb"),), (".mp3",)),
+    (((0, b"\xff\xf3"),), (".mp3",)),
+    (((0, b"\xff\xf2"),), (".mp3",)),
+    (((0, b"\xff\xf1"),), (".aac",)),
+    (((0, b"\xff\xf9"),), (".aac",)),
+)
+WEAK_SIGNATURES = frozenset({b"MZ", b"\x1f\x8b", b"\xff\xfb", b"\xff\xf3", b"\xff\xf2", b"\xff\xf1", b"\xff\xf9"})
+
+# Offset of the DOS header's e_lfanew field: where an executable's "PE\0\0" header starts
+_PE_OFFSET_FIELD = 0x3C
+
+
+class WeakMatch(tuple):
+    """Extensions matched by a short signature: trusted for files without an extension only."""
+
+
+def _has_pe_header(header):
+    if len(header) < _PE_OFFSET_FIELD + 4:
+        return False
+    offset = int.from_bytes(header[_PE_OFFSET_FIELD:_PE_OFFSET_FIELD + 4], "little")
+    return header[offset:offset + 4] == b"PE\0\0"
+
+
+def match_signature(header):
+    """Returns the extensions tuple of the first signature header matches, or None.
+
+    A match on one of the WEAK_SIGNATURES is returned as a WeakMatch; an "MZ"
+    header is a strong match only if the PE header it points to is there too.
+    """
+    for parts, extensions in SIGNATURES:
+        if all(header[offset:offset + len(magic)] == magic for offset, magic in parts):
+            if len(parts) > 1 or parts[0][1] not in WEAK_SIGNATURES:
+                return extensions
+            if parts[0][1] == b"MZ" and _has_pe_header(header):
+                return extensions
+            return WeakMatch(extensions)
+    return None
+
+
+def read_header(path, size=HEADER_SIZE):
+    """Returns up to size bytes from the start of path."""
+    with open(path, "rb", buffering=0) as f:
+        return f.read(size)
+
+
+class ContentSniffer:
+    """Detects file types from their first bytes, with a bounded LRU cache.
+
+    Results are cached by (st_dev, st_ino, st_size, st_mtime_ns), so a file is
+    read again only after it changed, and the cache holds at most max_entries
+    results. The stat comes from the ScanEntry, which the planner shares with
+    the executor, so sniffing costs one header read per file and no extra stat.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, workers=DEFAULT_WORKERS):
+        self.max_entries = max_entries
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def close(self):
+        """Shuts down the header-reading threads."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    @staticmethod
+    def _key(entry):
+        st = entry.stat()
+        return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return True, self._cache[key]
+        return False, None
+
+    def _store(self, key, extensions):
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = extensions
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _read(self, entry, key):
+        try:
+            extensions = match_signature(read_header(entry.path))
+        except OSError:
+            return None # Not cached: it may be readable next time
+        self._store(key, extensions)
+        return extensions
+
+    def sniff(self, entry):
+        """Returns the extensions tuple matching entry's content, or None if unknown or unreadable.
+
+        Args:
+            entry (ScanEntry): A file entry; its cached stat is reused.
+        """
+        try:
+            key = self._key(entry)
+        except OSError:
+            return None
+        found, extensions = self._lookup(key)
+        return extensions if found else self._read(entry, key)
+
+    def sniff_many(self, entries):
+        """Sniffs several entries; only the uncached headers are read, on the thread pool.
+
+        Returns:
+            list: sniff() results, in the order of entries.
+        """
+        results = []
+        misses = [] # (index in results, entry, cache key)
+        for entry in entries:
+            try:
+                key = self._key(entry)
+            except OSError:
+                results.append(None)
+                continue
+            found, extensions = self._lookup(key)
+            if not found:
+                misses.append((len(results), entry, key))
+            results.append(extensions)
+        if self.workers > 1 and len(misses) > 1:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sorter-sniff")
+            read = self._pool.map(lambda miss: self._read(miss[1], miss[2]), misses)
+        else:
+            read = (self._read(entry, key) for _, entry, key in misses)
+        for (index, _, _), extensions in zip(misses, read):
+            results[index] = extensions
+        return results
+
+    def prefetch(self, scanned, batch_size=PREFETCH_BATCH):
+        """Passes (entry, prune_reason) pairs through, sniffing the files of each batch in parallel first.
+
+        Wrap a scan with it so the later sniff() calls for the same entries are cache hits.
+        """
+        scanned = iter(scanned)
+        while True:
+            batch = list(itertools.islice(scanned, batch_size))
+            if not batch:
+                return
+            self.sniff_many(entry for entry, prune_reason in batch if prune_reason is None and entry.is_file)
+            yield from batch
+
+    def classify(self, entry, rule_index, extension_category=None):
+        """Picks the category for a file from its content and its name.
+
+        The name wins when the content is consistent with it (a .docx is a zip
+        archive), when the content is not recognized, or when the file has an
+        extension and the content only matched a short signature (a notes.txt or
+        data.csv starting with "MZ"); otherwise the category
+        of the detected type wins, which also classifies files with no extension.
+
+        Args:
+            entry (ScanEntry): The file.
+            rule_index (RuleIndex): The compiled rules.
+            extension_category (str, optional): The category its name maps to, if any.
+
+        Returns:
+            str: The category, or None if neither name nor content matches a rule.
+        """
+        extensions = self.sniff(entry)
+        if extensions is None:
+            return extension_category
+        name = entry.name.lower()
+        if isinstance(extensions, WeakMatch) and os.path.splitext(name)[1]:
+            return extension_category
+        if extension_category is not None and any(name.endswith(extension) for extension in extensions):
+            return extension_category
+        for extension in extensions:
+            category = rule_index.classify("file" + extension)
+            if category is not None:
+                return category
+        return extension_category
@@ -1,102 +1,468 @@
 import os
-import pathlib
+import queue
+import atexit
 import logging
-import datetime
+import logging.handlers
+import time
+import functools
+import itertools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
 
-# Import DEFAULT_RULES and move_file_safely
-from .file_rules import DEFAULT_RULES
-from .utils import move_file_safely
+# Import the planner and transfer_file_safely
+from .planner import (
+    SKIP_DIRECTORY, SKIP_DUPLICATE, SKIP_EXCLUDED, SKIP_IN_PLACE, SKIP_LOOP, SKIP_NO_EXTENSION, SKIP_UNREADABLE,
+    SkippedItem, SortOperation, SortPlan, iter_plan, plan_sort
+)
+from .dedupe import dedupe_plan
+from .file_rules import UNCATEGORIZED, compile_rules
+from .journal import RUN_CANCELLED, RUN_COMPLETED
+from .stats import COUNT_MKDIRS, NULL_STATS, PHASE_BOOKKEEPING, PHASE_DEDUPE, PHASE_MKDIR
+from .transfer import TRANSFER_MODES, TRANSFER_MOVE
+from .utils import BackgroundLogWriter, BatchedFileHandler, DirectoryHandles, NameRegistry, transfer_file_safely
 
 # --- Logger Setup ---
-def setup_logger():
-    """Sets up the main logger for the sorter engine."""
-    log_directory = "logs"  # Relative to project root (file_sorter_gui/)
-    if not os.path.exists(log_directory):
-        os.makedirs(log_directory)
+DEFAULT_LOG_FILE = os.path.join("logs", "sorter.log") # Relative to project root (file_sorter_gui/)
 
-    log_file_path = os.path.join(log_directory, "sorter.log")
+# Importing the engine has no side effects: handlers (and logs/) are only set up on first use.
+logger = logging.getLogger("FileSorterEngine")
+logger.setLevel(logging.INFO) # Set default logging level
+_log_writer = None # BackgroundLogWriter draining the engine's log queue
+_queue_handler = None # The QueueHandler setup_logger() installed; other handlers (e.g. the GUI's) are left alone
+_logging_configured = False
 
-    logger = logging.getLogger("FileSorterEngine")
-    logger.setLevel(logging.INFO) # Set default logging level
+def setup_logger(log_file=DEFAULT_LOG_FILE):
+    """Sets up the main logger for the sorter engine.
 
-    # Prevent duplicate handlers if this setup is called multiple times (e.g., in tests)
-    if logger.hasHandlers():
-        logger.handlers.clear()
+    Records go through a QueueHandler; a background thread writes them to
+    log_file in batches, so logging never blocks on file I/O.
 
-    # File Handler
-    fh = logging.FileHandler(log_file_path)
-    fh.setLevel(logging.INFO) # Or logging.DEBUG for more verbose logs
+    Args:
+        log_file (str, optional): Where to write the log. None writes no log file
+            (e.g. for the CLI, which logs to the console instead).
+    """
+    global _log_writer, _queue_handler, _logging_configured
+    # Replace our own handler if this setup is called multiple times (e.g., in tests)
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+        _queue_handler = None
+    if _log_writer is not None:
+        _log_writer.stop()
+        _log_writer = None
+    _logging_configured = True
+    if log_file is None:
+        return logger
 
-    # Console Handler (optional, for also seeing logs in console during -m execution)
-    # ch = logging.StreamHandler()
-    # ch.setLevel(logging.INFO)
+    log_directory = os.path.dirname(log_file)
+    if log_directory and not os.path.exists(log_directory):
+        os.makedirs(log_directory)
+
+    # File Handler (flushed once per batch by the background writer)
+    fh = BatchedFileHandler(log_file)
+    fh.setLevel(logging.INFO) # Or logging.DEBUG for more verbose logs
 
     # Formatter
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
     fh.setFormatter(formatter)
-    # ch.setFormatter(formatter)
 
-    logger.addHandler(fh)
-    # logger.addHandler(ch) # Uncomment to also log to console
+    log_queue = queue.SimpleQueue()
+    _log_writer = BackgroundLogWriter(log_queue, [fh])
+    _log_writer.start()
+
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    logger.addHandler(_queue_handler)
 
     return logger
 
-logger = setup_logger()
+def ensure_logging():
+    """Sets up the default log file the first time the engine does any work."""
+    if not _logging_configured:
+        setup_logger()
+
+def shutdown_logging():
+    """Writes out any queued log records and stops the background writer."""
+    global _log_writer
+    if _log_writer is not None:
+        _log_writer.stop()
+        _log_writer = None
+
+atexit.register(shutdown_logging)
 # --- End Logger Setup ---
 
-def sort_files_by_extension(src_dir):
-    """Sorts files in src_dir into subdirectories based on their extension.
+# Plan items handed to the thread pool at a time; keeps memory flat on huge plans
+PARALLEL_CHUNK_SIZE = 256
+
+# Seconds between progress summaries when per-file log lines are switched off
+SUMMARY_LOG_INTERVAL = 5.0
+
+# Structured progress reported to execute_plan's progress callback after every plan item.
+# files_total and bytes_total are None when the plan's size isn't known up front.
+ProgressEvent = namedtuple("ProgressEvent", ["files_total", "files_done", "bytes_total", "bytes_done", "cancelled"])
+
+def _move_planned(item, registry, chunk_size=None, byte_progress=None, stats=None, transfer_mode=TRANSFER_MOVE,
+                  handles=None):
+    """Moves (or copies) one planned operation; returns its TransferResult. Safe to call from worker threads."""
+    # If the planned name was taken meanwhile, the next ' (n)' name is derived from the original name
+    fallback_path = os.path.join(os.path.dirname(item.destination), item.name)
+    # Pass the scan record along so the move helper doesn't re-stat the source
+    progress = functools.partial(byte_progress, item.source) if byte_progress is not None else None
+    return transfer_file_safely(item.source, item.destination, entry=item.entry,
+                                registry=registry, fallback_path=fallback_path,
+                                chunk_size=chunk_size, progress=progress, link_to=item.link_to, stats=stats,
+                                transfer_mode=transfer_mode, handles=handles) # Logs its own errors
+
+def _iter_results(plan, registry, workers, chunk_size=None, byte_progress=None, cancel_event=None, stats=None,
+                  transfer_mode=TRANSFER_MOVE, handles=None, max_in_flight=None, on_dispatch=None):
+    """Yields (item, result) in plan order, running the moves on up to `workers` threads.
+
+    result is a TransferResult, or None for skipped items and failed moves. At most
+    max_in_flight items (default PARALLEL_CHUNK_SIZE) are handed to the pool before
+    their results are taken. An item to be hard-linked to another one's destination
+    (dedupe hardlink mode, which puts originals first) waits for that move to finish.
+    on_dispatch, if given, is called with each batch of items before any of their
+    moves starts. Stops early once cancel_event is set (after the items already
+    handed to the pool).
+    """
+    if workers <= 1:
+        # Read ahead only for on_dispatch; otherwise a streamed plan is pulled one item at a time
+        batch_size = PARALLEL_CHUNK_SIZE if on_dispatch is not None else 1
+        items = iter(plan)
+        while True:
+            batch = list(itertools.islice(items, batch_size))
+            if not batch:
+                return
+            if on_dispatch is not None:
+                on_dispatch(batch)
+            for item in batch:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                if isinstance(item, SkippedItem):
+                    yield item, None
+                else:
+                    yield item, _move_planned(item, registry, chunk_size, byte_progress, stats, transfer_mode,
+                                              handles)
+
+    def run(item, original=None):
+        if isinstance(item, SkippedItem):
+            return None
+        if original is not None:
+            wait([original]) # Its file must be in place before it can be linked to
+        return _move_planned(item, registry, chunk_size, byte_progress, stats, transfer_mode, handles)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sorter-move") as pool:
+        # Not chunk_size: run() passes that on as the copy chunk size
+        window = max(max_in_flight, workers) if max_in_flight else max(PARALLEL_CHUNK_SIZE, workers * 4)
+        items = iter(plan)
+        while cancel_event is None or not cancel_event.is_set():
+            chunk = list(itertools.islice(items, window))
+            if not chunk:
+                break
+            if on_dispatch is not None:
+                on_dispatch(chunk)
+            # Earlier chunks are done; an original in this one was submitted (and so started) first
+            moves = {} # destination -> future of its move
+            futures = []
+            for item in chunk:
+                original = moves.get(item.link_to) if isinstance(item, SortOperation) and item.link_to else None
+                future = pool.submit(run, item, original)
+                if isinstance(item, SortOperation):
+                    moves[item.destination] = future
+                futures.append(future)
+            # Results are taken in submission order, so logging stays deterministic
+            yield from zip(chunk, (future.result() for future in futures))
+
+def execute_plan(plan, registry=None, workers=1, chunk_size=None, byte_progress=None,
+                 progress=None, cancel_event=None, log_each_file=True, journal=None, state_index=None,
+                 stats=None, transfer_mode=None, src_dir=None, on_result=None, max_in_flight=None, folders=None):
+    """Applies a sort plan, moving files and logging every decision in plan order.
+
+    The source folder and every destination folder are opened once and files are
+    renamed relative to them (see utils.DirectoryHandles). The category folders of
+    a SortPlan, or the given folders for a streamed plan, are all created up front,
+    before the first file moves; folders whose names depend on the file (e.g. a
+    rule target like {category}/{year}) are created as they are needed.
 
     Args:
-        src_dir (str): The source directory containing files to sort.
+        plan (SortPlan or iterable): The plan items to apply, e.g. from plan_sort().
+        registry (NameRegistry, optional): Registry that claimed the plan's destinations.
+            Defaults to plan.registry for a SortPlan.
+        workers (int, optional): Number of threads moving files. With more than one,
+            moves overlap but log records and counts are still produced in plan order.
+        chunk_size (int, optional): Bytes per copy call for cross-device moves.
+        byte_progress (callable, optional): Called as byte_progress(source_path, bytes_done, total)
+            while each file moves (from worker threads when workers > 1).
+        progress (callable, optional): Called with a ProgressEvent after every plan item,
+            on the calling thread.
+        cancel_event (threading.Event, optional): Set it to stop the run; items not
+            started yet are left alone and not counted.
+        log_each_file (bool, optional): If False, the per-file INFO lines are dropped and a
+            progress summary is logged every SUMMARY_LOG_INTERVAL seconds instead.
+            Warnings and errors are always logged.
+        journal (MoveJournal, optional): Records every move of the journal's current run, so
+            it can be rolled back later: each batch is written ahead as intents before its
+            moves start, and each completed move confirms its intent.
+        state_index (ScanStateIndex, optional): The index the plan was built with; failed
+            moves make it re-list the source directory next time.
+        stats (RunStats, optional): Records phase times, operation counts and move latencies.
+        transfer_mode (str, optional): transfer.TRANSFER_COPY or TRANSFER_LINK copy the files
+            instead (reflinked or hard-linked where the filesystem allows) and leave the
+            sources in place. Defaults to TRANSFER_MOVE.
+        src_dir (str, optional): The folder the sources are in, when plan isn't a SortPlan;
+            sources elsewhere are named by their full paths.
+        on_result (callable, optional): Called as on_result(item, result) for every plan item,
+            in plan order on the calling thread; result is the TransferResult, or None for
+            skipped items and failed moves. The run waits while it blocks.
+        max_in_flight (int, optional): Moves handed to the worker threads ahead of the
+            results being taken (workers > 1). Defaults to PARALLEL_CHUNK_SIZE.
+        folders (iterable, optional): Folders to create up front when plan isn't a SortPlan,
+            e.g. every category folder the rules know. Those this run created and left
+            empty are removed again, except with a state_index: removing them would change
+            the folder's listing, which the next run then has to read again.
+
+    Returns:
+        tuple: (files_moved_count, files_skipped_count); in copy modes the first counts copies.
     """
-    if not os.path.isdir(src_dir):
-        logger.error(f"Source directory '{src_dir}' not found or is not a directory.")
-        return 0, 0 # Return counts on error
+    ensure_logging()
+    if stats is None:
+        stats = NULL_STATS
+    stats.start()
+    handles = DirectoryHandles(plan.src_dir if isinstance(plan, SortPlan) else src_dir)
+    speculative = [] # Created for a streamed plan that may not need them
+    try:
+        # Failures are logged per file when its move tries again
+        if isinstance(plan, SortPlan):
+            with stats.phase(PHASE_MKDIR):
+                handles.prepare(os.path.dirname(op.destination) for op in plan.operations)
+        elif folders:
+            speculative = [folder for folder in folders if not os.path.isdir(folder)]
+            with stats.phase(PHASE_MKDIR):
+                handles.prepare(speculative, quiet=True)
+        return _execute_plan(plan, registry, workers, chunk_size, byte_progress, progress, cancel_event,
+                             log_each_file, journal, state_index, stats, transfer_mode or TRANSFER_MOVE, handles,
+                             on_result, max_in_flight)
+    finally:
+        handles.close()
+        stats.count(COUNT_MKDIRS, handles.created)
+        for folder in reversed(speculative): # Nested folders before their parents
+            if state_index is None:
+                try:
+                    os.rmdir(folder)
+                    continue
+                except OSError: # Not empty: it was used
+                    pass
+            logger.info(f"Created directory: '{folder}'")
+        stats.finish()
 
-    logger.info(f"Starting to sort files in: {src_dir}")
+def _execute_plan(plan, registry, workers, chunk_size, byte_progress, progress, cancel_event, log_each_file,
+                  journal, state_index, stats, transfer_mode, handles, on_result, max_in_flight):
+    if registry is None:
+        registry = plan.registry if isinstance(plan, SortPlan) else NameRegistry()
     files_moved_count = 0
     files_skipped_count = 0
+    files_total = bytes_total = None
+    if progress is not None and isinstance(plan, SortPlan):
+        files_total = len(plan)
+        with stats.phase(PHASE_BOOKKEEPING):
+            bytes_total = plan.total_bytes() # Stats are cached on the entries and reused by the moves
+    bytes_done = 0
+    next_summary_at = time.monotonic() + SUMMARY_LOG_INTERVAL
+    copying = transfer_mode != TRANSFER_MOVE
+    verb = "copied" if copying else "moved"
+    strategies = {} # Copy modes: strategy -> files
+
+    on_dispatch = None
+    if journal is not None and not copying:
+        # Write-ahead: a batch's moves are in the journal before any of them starts
+        def on_dispatch(batch):
+            with stats.phase(PHASE_BOOKKEEPING):
+                journal.intend((item.source, item.destination) for item in batch if not isinstance(item, SkippedItem))
 
-    for item_name in os.listdir(src_dir):
-        item_path = os.path.join(src_dir, item_name)
+    for item, result in _iter_results(plan, registry, workers, chunk_size, byte_progress, cancel_event, stats,
+                                      transfer_mode, handles, max_in_flight, on_dispatch):
+        if on_result is not None:
+            on_result(item, result)
+        # Everything but the planning and moving that _iter_results() did
+        with stats.phase(PHASE_BOOKKEEPING):
+            final_path = result.path if result is not None else None
+            if progress is not None:
+                if final_path and item.entry is not None:
+                    bytes_done += item.entry.stat().st_size
+                progress(ProgressEvent(files_total, files_moved_count + files_skipped_count + 1,
+                                       bytes_total, bytes_done, False))
+            if not log_each_file and time.monotonic() >= next_summary_at:
+                logger.info(f"Progress: {files_moved_count} file(s) {verb}, {files_skipped_count} item(s) skipped so far.")
+                next_summary_at = time.monotonic() + SUMMARY_LOG_INTERVAL
 
-        if os.path.isfile(item_path):
-            file_extension = pathlib.Path(item_name).suffix.lower()
-            if not file_extension: # Skip files with no extension
-                logger.info(f"Skipping '{item_name}': no file extension.")
+            if isinstance(item, SkippedItem):
+                if item.reason == SKIP_NO_EXTENSION:
+                    if log_each_file:
+                        logger.info(f"Skipping '{item.name}': no file extension.")
+                elif item.reason == SKIP_DIRECTORY:
+                    if log_each_file:
+                        logger.info(f"Skipping directory: '{item.name}'")
+                elif item.reason == SKIP_DUPLICATE:
+                    if log_each_file:
+                        logger.info(f"Skipping '{item.name}': an identical file is already sorted.")
+                elif item.reason == SKIP_EXCLUDED:
+                    if log_each_file:
+                        logger.info(f"Skipping '{item.name}': excluded from the sort.")
+                elif item.reason == SKIP_IN_PLACE:
+                    if log_each_file:
+                        logger.info(f"Skipping '{item.name}': already sorted.")
+                elif item.reason == SKIP_LOOP:
+                    logger.warning(f"Skipping directory '{item.source}': already visited (symlink loop).")
+                elif item.reason == SKIP_UNREADABLE:
+                    logger.warning(f"Skipping directory '{item.source}': it could not be read.")
+                else:
+                    logger.warning(f"Skipping unknown item: '{item.name}' at path '{item.source}'")
                 files_skipped_count += 1
                 continue
 
-            destination_category = "Uncategorized" # Default if no rule matches
-            for category, extensions in DEFAULT_RULES.items():
-                if file_extension in extensions:
-                    destination_category = category
-                    break
-
-            destination_folder_path = os.path.join(src_dir, destination_category)
-            destination_file_path = os.path.join(destination_folder_path, item_name)
-
-            logger.debug(f"Identified file: '{item_name}', extension: '{file_extension}', category: '{destination_category}'")
-            
-            final_path = move_file_safely(item_path, destination_file_path) # move_file_safely prints its own info/errors
-            if final_path:
-                logger.info(f"Moved '{item_name}' -> '{destination_category}/'")
+            logger.debug("Identified file: '%s', category: '%s', destination: '%s'",
+                         item.name, item.category, item.destination)
+            if final_path and copying:
+                strategies[result.strategy] = strategies.get(result.strategy, 0) + 1
+                if log_each_file:
+                    logger.info(f"Copied '{item.name}' -> '{item.category}/' ({result.strategy})")
+                files_moved_count += 1
+            elif final_path:
+                if journal is not None:
+                    journal.record(item.source, final_path)
+                if log_each_file:
+                    logger.info(f"Moved '{item.name}' -> '{item.category}/'")
                 files_moved_count += 1
             else:
-                # move_file_safely would have printed an error, here we log the failure from sorter's perspective
-                logger.warning(f"Failed to move '{item_name}' (destination: '{destination_file_path}'). Check previous logs for details from move_file_safely.")
+                # transfer_file_safely has logged the cause, here we log the failure from sorter's perspective
+                if state_index is not None:
+                    state_index.invalidate(item.source)
+                logger.warning(f"Failed to {'copy' if copying else 'move'} '{item.name}' (destination: '{item.destination}'). Check previous logs for details from transfer_file_safely.")
                 files_skipped_count += 1
 
-        elif os.path.isdir(item_path):
-            logger.info(f"Skipping directory: '{item_name}'")
-            files_skipped_count += 1
-        else:
-            logger.warning(f"Skipping unknown item: '{item_name}' at path '{item_path}'")
-            files_skipped_count += 1
+    if cancel_event is not None and cancel_event.is_set():
+        logger.warning(f"Sort cancelled after {files_moved_count + files_skipped_count} item(s).")
+        if progress is not None:
+            progress(ProgressEvent(files_total, files_moved_count + files_skipped_count,
+                                   bytes_total, bytes_done, True))
+    if strategies:
+        logger.info("Copied by: " + ", ".join(f"{strategy} {count}" for strategy, count in sorted(strategies.items())))
+    return files_moved_count, files_skipped_count
+
+def sort_files_by_extension(src_dir, rules=None, workers=1, progress=None, cancel_event=None,
+                            log_each_file=True, recursive=False, max_depth=None, follow_symlinks=False,
+                            journal=None, state_index=None, sniffer=None, dedupe=None, target_dir=None,
+                            stats=None, plan=None, transfer_mode=None, on_result=None, max_in_flight=None):
+    """Sorts files in src_dir into subdirectories based on their extension.
+
+    Args:
+        src_dir (str): The source directory containing files to sort.
+        rules (dict, optional): Mapping of category -> extensions. Defaults to DEFAULT_RULES.
+        workers (int, optional): Number of threads moving files (1 = serial).
+        progress (callable, optional): Receives a ProgressEvent after every item.
+        cancel_event (threading.Event, optional): Set it to stop the run early.
+        log_each_file (bool, optional): False logs periodic summaries instead of a line per file.
+        recursive (bool, optional): Also sort files in subdirectories into src_dir's category
+            folders. The tree is planned and executed as a stream, never listed up front,
+            so progress events carry no totals in this mode.
+        max_depth (int, optional): Levels below src_dir to descend in recursive mode (None = all).
+        follow_symlinks (bool, optional): Descend into symlinked directories in recursive mode.
+        journal (MoveJournal, optional): Records this run's moves as a new journal run,
+            for later rollback with journal.rollback_run().
+        state_index (ScanStateIndex, optional): Incremental mode: only changed directories
+            and new or changed entries are looked at; the index is updated after the run.
+        sniffer (ContentSniffer, optional): Also classify files by their first bytes
+            (files with no or a misleading extension).
+        dedupe (str, optional): What to do with files whose content is already sorted:
+            dedupe.DEDUPE_SKIP, DEDUPE_HARDLINK or DEDUPE_MOVE (to Duplicates/). The whole
+            plan is built before anything moves, also in recursive mode.
+        target_dir (str, optional): Create the category folders in this directory instead
+            of in src_dir (created if missing), e.g. to sort an inbox into an archive drive.
+        stats (RunStats, optional): Filled with per-phase times, operation counters and move
+            latencies; its hooks (e.g. stats.ProfileHook) run around the sort.
+        plan (iterable, optional): Apply these plan items instead of planning src_dir, e.g. a
+            preview the user edited (preview.PlanPreview.iter_items()). recursive, max_depth,
+            follow_symlinks, state_index, sniffer and dedupe don't apply then.
+        transfer_mode (str, optional): transfer.TRANSFER_COPY to organise a copy and leave
+            src_dir as it is (copy-on-write clones where the filesystem supports them, byte
+            copies otherwise), TRANSFER_LINK to also allow hard links to the originals.
+            Copies aren't recorded in the journal; sorting the same folder again copies
+            everything again (as ' (n)' names) unless dedupe is used.
+        on_result, max_in_flight: See execute_plan(), e.g. to stream per-file results
+            (sorter.aio.sort_async() does).
+    """
+    if transfer_mode not in (None,) + TRANSFER_MODES:
+        raise ValueError(f"Unknown transfer mode: {transfer_mode!r}")
+    ensure_logging()
+    if not os.path.isdir(src_dir):
+        logger.error(f"Source directory '{src_dir}' not found or is not a directory.")
+        return 0, 0 # Return counts on error
+    if stats is None:
+        stats = NULL_STATS
+    stats.start()
+    try:
+        return _sort_files(src_dir, rules, workers, progress, cancel_event, log_each_file, recursive, max_depth,
+                           follow_symlinks, journal, state_index, sniffer, dedupe, target_dir, stats, plan,
+                           transfer_mode or TRANSFER_MOVE, on_result, max_in_flight)
+    finally:
+        stats.finish()
+
+def _sort_files(src_dir, rules, workers, progress, cancel_event, log_each_file, recursive, max_depth,
+                follow_symlinks, journal, state_index, sniffer, dedupe, target_dir, stats, plan, transfer_mode,
+                on_result, max_in_flight):
+    logger.info(f"Starting to sort files in: {src_dir}")
+    if target_dir is not None and os.path.abspath(target_dir) != os.path.abspath(src_dir):
+        logger.info(f"Sorting into: {target_dir}")
+    copying = transfer_mode != TRANSFER_MOVE
+    if copying:
+        logger.info(f"Copying instead of moving ({transfer_mode} mode); the originals stay in place.")
+        journal = None # Nothing to roll back: delete the copies instead
+    if journal is not None:
+        run_id = journal.start_run(src_dir)
+        logger.info(f"Recording moves as journal run {run_id}.")
+    folders = None
+    if plan is not None:
+        # Planned (and maybe edited) elsewhere; destinations are reserved as the files move
+        registry = None
+        state_index = None
+    elif recursive and not dedupe:
+        # Stream the plan straight into the executor: memory stays flat on huge trees
+        registry = NameRegistry()
+        # Create the category folders before the walk starts: folders appearing while a
+        # directory is listed may or may not show up in that listing
+        rule_index = compile_rules(rules)
+        output_dir = target_dir if target_dir is not None else src_dir
+        folders = [os.path.join(output_dir, *category.split("/"))
+                   for category in sorted({*rule_index.categories, UNCATEGORIZED})]
+        plan = iter_plan(src_dir, rule_index, registry, recursive=True, max_depth=max_depth,
+                         follow_symlinks=follow_symlinks, state=state_index, sniffer=sniffer,
+                         target_dir=target_dir, stats=stats)
+    else:
+        # Plan first (pure, in memory), then apply the plan
+        plan = plan_sort(src_dir, rules, recursive=recursive, max_depth=max_depth,
+                         follow_symlinks=follow_symlinks, state=state_index, sniffer=sniffer,
+                         target_dir=target_dir, stats=stats)
+        if dedupe:
+            with stats.phase(PHASE_DEDUPE):
+                plan, _ = dedupe_plan(plan, dedupe)
+        registry = plan.registry
+    try:
+        files_moved_count, files_skipped_count = execute_plan(plan, registry=registry, workers=workers,
+                                                              progress=progress, cancel_event=cancel_event,
+                                                              log_each_file=log_each_file, journal=journal,
+                                                              state_index=state_index, stats=stats,
+                                                              transfer_mode=transfer_mode, src_dir=src_dir,
+                                                              on_result=on_result, max_in_flight=max_in_flight,
+                                                              folders=folders)
+    finally:
+        if journal is not None:
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            journal.finish_run(RUN_CANCELLED if cancelled else RUN_COMPLETED)
+    # A cancelled run may have listed directories it never finished; don't vouch for them
+    if state_index is not None and not (cancel_event is not None and cancel_event.is_set()):
+        state_index.commit()
 
     logger.info(f"Finished sorting files in: {src_dir}")
-    logger.info(f"Summary: {files_moved_count} file(s) moved, {files_skipped_count} item(s) skipped.")
+    logger.info(f"Summary: {files_moved_count} file(s) {'copied' if copying else 'moved'}, "
+                f"{files_skipped_count} item(s) skipped.")
     return files_moved_count, files_skipped_count # Return the counts
 
 if __name__ == '__main__':
@@ -105,6 +471,7 @@ if __name__ == '__main__':
     # logger.setLevel(logging.DEBUG) # Optional: for more verbose output during this test
     
     print("--- Main execution started. Logging to logs/sorter.log ---")
+    ensure_logging()
     logger.info("--- sorter_engine.py executed directly via __main__ ---")
 
     base_test_dir = "test_sorting_engine_integration_with_logging"
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+DEFAULT_STATE_DIRECTORY = os.path.join("logs", "state") # Relative to project root, next to sorter.log
+
+# Coarsest mtime resolution to allow for (FAT's 2 s): a directory modified this close
+# to its listing may change again without its mtime moving, so it is listed again next run
+TIMESTAMP_GRANULARITY_NS = 2 * 10**9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    ino INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    subdirs TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS files (
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    decision TEXT NOT NULL,
+    PRIMARY KEY (dir, name)
+) WITHOUT ROWID;
+"""
+
+
+def default_state_path(src_dir):
+    """Returns the default index location for src_dir: one database per source directory."""
+    digest = hashlib.sha1(os.path.normcase(os.path.abspath(src_dir)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(DEFAULT_STATE_DIRECTORY, f"{digest}.sqlite3")
+
+
+class ScanStateIndex:
+    """Persistent per-source-directory record of what earlier runs saw and decided.
+
+    For each listed directory it stores (inode, mtime) and its subdirectories;
+    for each entry that was left in place it stores (inode, size, mtime) and the
+    decision. On the next run an unchanged directory isn't listed at all, and an
+    unchanged entry in a changed directory is skipped without re-classifying it.
+
+    A directory's state is only saved if its mtime at the end of the run still
+    matches what was listed, so anything created or removed during a run (by
+    the sorter itself or anyone else) is picked up on the next run. Nor is it
+    saved if that mtime is within TIMESTAMP_GRANULARITY_NS of the listing: a file
+    created in the same clock tick, just after the listing, wouldn't change it.
+
+    The index is cleared whenever its fingerprint (rules and walk options) differs
+    from the one it was built with, since earlier decisions may no longer hold.
+    """
+
+    def __init__(self, path, fingerprint=None):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._observed = {} # directory -> (ino, mtime_ns, children, racy) listed during this run
+        self._remembered = {} # directory -> {name: (ino, size, mtime_ns, decision)} seen during this run
+        self._loaded_dir = None # Directory whose stored file records are cached in _loaded_files
+        self._loaded_files = {}
+        if fingerprint is not None:
+            self.rebind(fingerprint)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def rebind(self, fingerprint):
+        """Clears the index if it was built with a different fingerprint."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is not None and row[0] == fingerprint:
+            return
+        with self._conn:
+            self._conn.execute("DELETE FROM dirs")
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,))
+        self._loaded_dir = None
+
+    # --- Directory level (used by scanner.walk_directory) ---
+    def known_subdirectories(self, directory, dir_stat):
+        """Returns [(path, is_symlink), ...] if directory is unchanged since it was recorded, else None."""
+        row = self._conn.execute("SELECT ino, mtime_ns, subdirs FROM dirs WHERE path = ?", (directory,)).fetchone()
+        if row is None or row[0] != dir_stat.st_ino or row[1] != dir_stat.st_mtime_ns:
+            return None
+        return [tuple(child) for child in json.loads(row[2])]
+
+    def observe_directory(self, directory, dir_stat, children):
+        """Notes that directory was listed this run, with its (path, is_symlink) subdirectories."""
+        racy = dir_stat.st_mtime_ns > time.time_ns() - TIMESTAMP_GRANULARITY_NS
+        self._observed[directory] = (dir_stat.st_ino, dir_stat.st_mtime_ns, children, racy)
+
+    # --- Entry level (used by the planner) ---
+    def known_decision(self, entry):
+        """Returns the stored decision for an unchanged entry, or None if it is new or changed."""
+        directory, name = os.path.split(entry.path)
+        if directory != self._loaded_dir:
+            rows = self._conn.execute(
+                "SELECT name, ino, size, mtime_ns, decision FROM files WHERE dir = ?", (directory,))
+            self._loaded_files = {row[0]: row[1:] for row in rows}
+            self._loaded_dir = directory
+        record = self._loaded_files.get(name)
+        if record is None:
+            return None
+        try:
+            st = entry.stat()
+        except OSError:
+            return None
+        if record[:3] != (st.st_ino, st.st_size, st.st_mtime_ns):
+            return None
+        return record[3]
+
+    def remember(self, entry, decision):
+        """Records the decision for an entry that stays where it is."""
+        try:
+            st = entry.stat()
+        except OSError:
+            return
+        directory, name = os.path.split(entry.path)
+        self._remembered.setdefault(directory, {})[name] = (st.st_ino, st.st_size, st.st_mtime_ns, decision)
+
+    def invalidate(self, path):
+        """Makes the next run list path's directory again, e.g. after a move from it failed."""
+        self._observed.pop(os.path.dirname(path), None)
+
+    def commit(self):
+        """Saves what this run observed; call once the run's moves are done."""
+        with self._conn:
+            for directory, (ino, mtime_ns, children, racy) in self._observed.items():
+                files = self._remembered.pop(directory, {})
+                self._conn.execute("DELETE FROM files WHERE dir = ?", (directory,))
+                self._conn.executemany(
+                    "INSERT INTO files (dir, name, ino, size, mtime_ns, decision) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(directory, name) + record for name, record in files.items()])
+                try:
+                    st = os.stat(directory)
+                    unchanged = (st.st_ino, st.st_mtime_ns) == (ino, mtime_ns)
+                except OSError:
+                    unchanged = False
+                if unchanged and not racy:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO dirs (path, ino, mtime_ns, subdirs) VALUES (?, ?, ?, ?)",
+                        (directory, ino, mtime_ns, json.dumps(children)))
+                else: # Changed during the run, or maybe in the tick it was listed: list it again next time
+                    self._conn.execute("DELETE FROM dirs WHERE path = ?", (directory,))
+        self._observed.clear()
+        self._remembered.clear()
+        self._loaded_dir = None
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,374 @@
+"""Run statistics for the sort engine: phase times, operation counters and move latencies.
+
+Pass a RunStats to sort_files_by_extension() (or execute_plan(), sort_sources())
+and it is filled in as the run goes; without one the engine records nothing.
+
+Phase times are exclusive: while a nested phase runs (collision probing inside
+classification, say) its parent's clock is paused, so on one thread the phases
+add up to the time spent in the engine. Moves running on worker threads are
+timed on their own threads, so with workers > 1 the move phases add up the
+time of all threads and can exceed the wall time.
+
+Hooks (RunHooks subclasses) see the start and end of a run, e.g. ProfileHook
+to run it under cProfile and MetricsFileHook to append the results to a file.
+"""
+import io
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+
+logger = logging.getLogger("FileSorterEngine.stats")
+
+# Phases
+PHASE_SCAN = "scan" # Listing directories
+PHASE_SNIFF = "sniff" # Reading file headers (content sniffing)
+PHASE_CLASSIFY = "classify" # Rules and planning
+PHASE_DEDUPE = "dedupe" # Hashing for duplicate detection
+PHASE_COLLISIONS = "collisions" # Picking and reserving free destination names
+PHASE_MKDIR = "mkdir" # Creating category folders
+PHASE_MOVE = "move" # Renames, copies and hard links
+PHASE_BOOKKEEPING = "bookkeeping" # Logging, journal and progress reporting
+PHASES = (PHASE_SCAN, PHASE_SNIFF, PHASE_CLASSIFY, PHASE_DEDUPE, PHASE_COLLISIONS, PHASE_MKDIR, PHASE_MOVE,
+          PHASE_BOOKKEEPING)
+
+# Counters
+COUNT_ENTRIES = "entries" # Directory entries scanned
+COUNT_STATS = "stats" # stat() calls made while moving (cached stats aren't counted)
+COUNT_MKDIRS = "mkdirs"
+COUNT_RESERVES = "reserves" # Exclusive creates of destination placeholders
+COUNT_COLLISIONS = "collisions" # Destinations that got a ' (n)' name
+COUNT_RENAMES = "renames"
+COUNT_COPIES = "copies" # Streamed byte copies (cross-device moves, copy mode)
+COUNT_REFLINKS = "reflinks" # Copy mode: copy-on-write clones
+COUNT_HARDLINKS = "hardlinks" # Copy mode: hard links to the source
+COUNT_LINKS = "links" # Dedupe hard links
+COUNT_FAILURES = "failures"
+COUNT_BYTES = "bytes_moved"
+
+
+class LatencyHistogram:
+    """Histogram of durations in power-of-two microsecond buckets, plus exact count, total, min and max."""
+
+    def __init__(self):
+        self.buckets = {} # bucket -> count; bucket b holds durations below 2**b microseconds
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        bucket = int(seconds * 1e6).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other):
+        for bucket, count in list(other.buckets.items()): # Another thread may be recording
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction):
+        """Returns the upper bound (seconds) of the bucket holding the given fraction of durations, or None."""
+        if not self.count:
+            return None
+        wanted = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= wanted:
+                return min((2 ** bucket) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min, "max": self.max,
+            "p50": self.percentile(0.5), "p90": self.percentile(0.9), "p99": self.percentile(0.99),
+            "buckets_us": {str(2 ** bucket): count for bucket, count in sorted(self.buckets.items())},
+        }
+
+
+class RunHooks:
+    """Base class for run hooks; override what you need. Called on the thread that starts the run."""
+
+    def on_run_start(self, stats):
+        pass
+
+    def on_run_end(self, stats):
+        pass
+
+
+class ProfileHook(RunHooks):
+    """Runs the engine under cProfile and writes the profile to path (or logs the top functions).
+
+    cProfile only sees the thread that starts the run, so profile with workers=1
+    and a single source to cover everything.
+    """
+
+    def __init__(self, path=None, top=25):
+        self.path = path
+        self.top = top
+        self._profile = None
+
+    def on_run_start(self, stats):
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError as e: # Another profiler is active
+            logger.warning(f"Not profiling: {e}")
+            self._profile = None
+
+    def on_run_end(self, stats):
+        if self._profile is None:
+            return
+        self._profile.disable()
+        if self.path:
+            self._profile.dump_stats(self.path)
+            logger.info(f"Profile written to '{self.path}' (view with python -m pstats).")
+        else:
+            report = io.StringIO()
+            pstats.Stats(self._profile, stream=report).sort_stats("cumulative").print_stats(self.top)
+            logger.info(f"Profile:\n{report.getvalue()}")
+        self._profile = None
+
+
+class MetricsFileHook(RunHooks):
+    """Appends every run's statistics to a file as one JSON object per line."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def on_run_end(self, stats):
+        record = dict(stats.to_dict(), finished_at=time.time())
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def _duration(seconds):
+    return f"{seconds:.2f}s" if seconds >= 1 else f"{seconds * 1e3:.2f}ms"
+
+
+class _Shard:
+    """One thread's numbers. Only that thread writes them, so recording takes no lock."""
+
+    __slots__ = ("phases", "counters", "move_latency", "stack", "timers")
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self.move_latency = LatencyHistogram()
+        self.stack = [] # [phase name, time its clock (re)started] of the open phases
+        self.timers = {} # phase name -> its reusable _PhaseTimer
+
+
+class _PhaseTimer:
+    """Context manager timing one phase on one thread; reused, so timing a block allocates nothing."""
+
+    __slots__ = ("_shard", "_name")
+
+    def __init__(self, shard, name):
+        self._shard = shard
+        self._name = name
+
+    def __enter__(self):
+        now = time.perf_counter()
+        stack = self._shard.stack
+        if stack:
+            parent = stack[-1]
+            phases = self._shard.phases
+            phases[parent[0]] = phases.get(parent[0], 0.0) + now - parent[1]
+        stack.append([self._name, now])
+
+    def __exit__(self, exc_type, exc, tb):
+        now = time.perf_counter()
+        stack = self._shard.stack
+        name, started = stack.pop()
+        phases = self._shard.phases
+        phases[name] = phases.get(name, 0.0) + now - started
+        if stack:
+            stack[-1][1] = now # The parent's clock resumes
+
+
+class RunStats:
+    """Statistics of one run. Thread-safe; see the module docstring for how phases are timed.
+
+    Each thread records into its own shard without locking; phases, counters and
+    move_latency add the shards up when read.
+    """
+
+    enabled = True
+
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self.wall_time = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._merged = _Shard() # Numbers added with merge()
+        self._depth = 0 # Nested start() calls, e.g. sort_sources() around sort_files_by_extension()
+        self._started_at = None
+
+    # --- Run lifecycle ---
+    def start(self):
+        """Marks the start of a run; only the outermost start() calls the hooks."""
+        with self._lock:
+            self._depth += 1
+            outermost = self._depth == 1
+            if outermost:
+                self._started_at = time.perf_counter()
+        if outermost:
+            for hook in self.hooks:
+                hook.on_run_start(self)
+
+    def finish(self):
+        """Marks the end of a run started with start()."""
+        with self._lock:
+            self._depth -= 1
+            outermost = self._depth == 0
+            if outermost:
+                self.wall_time += time.perf_counter() - self._started_at
+        if outermost:
+            for hook in self.hooks:
+                hook.on_run_end(self)
+
+    # --- Recording ---
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def phase(self, name):
+        """Returns a context manager timing its block as phase name (exclusive of nested phases)."""
+        shard = self._shard()
+        timer = shard.timers.get(name)
+        if timer is None:
+            timer = shard.timers[name] = _PhaseTimer(shard, name)
+        return timer
+
+    def timed(self, name, iterable):
+        """Yields from iterable, timing each step as phase name."""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name, amount=1):
+        counters = self._shard().counters
+        counters[name] = counters.get(name, 0) + amount
+
+    def record_move(self, seconds):
+        self._shard().move_latency.record(seconds)
+
+    def merge(self, other):
+        """Adds another RunStats' numbers to these (e.g. to total several runs)."""
+        phases, counters, move_latency = other.phases, other.counters, other.move_latency
+        with self._lock:
+            for name, seconds in phases.items():
+                self._merged.phases[name] = self._merged.phases.get(name, 0.0) + seconds
+            for name, amount in counters.items():
+                self._merged.counters[name] = self._merged.counters.get(name, 0) + amount
+            self._merged.move_latency.merge(move_latency)
+            self.wall_time += other.wall_time
+
+    def _all_shards(self):
+        with self._lock:
+            return self._shards + [self._merged]
+
+    @property
+    def phases(self):
+        """Seconds per phase, in PHASES order (phases that never ran are 0)."""
+        totals = dict.fromkeys(PHASES, 0.0)
+        for shard in self._all_shards():
+            for name, seconds in list(shard.phases.items()):
+                totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    @property
+    def counters(self):
+        totals = {}
+        for shard in self._all_shards():
+            for name, amount in list(shard.counters.items()):
+                totals[name] = totals.get(name, 0) + amount
+        return totals
+
+    @property
+    def move_latency(self):
+        """LatencyHistogram of the successful moves (a snapshot)."""
+        histogram = LatencyHistogram()
+        for shard in self._all_shards():
+            histogram.merge(shard.move_latency)
+        return histogram
+
+    # --- Reporting ---
+    def to_dict(self):
+        return {
+            "wall_time": self.wall_time,
+            "phases": {name: seconds for name, seconds in self.phases.items() if seconds},
+            "counters": dict(self.counters),
+            "move_latency": self.move_latency.to_dict(),
+        }
+
+    def format(self):
+        """Returns a short human-readable report (several lines)."""
+        lines = [f"Wall time: {_duration(self.wall_time)}"]
+        phases = [f"{name} {_duration(seconds)}" for name, seconds in self.phases.items() if seconds]
+        if phases:
+            lines.append("Phases: " + ", ".join(phases))
+        counters = dict(self.counters)
+        bytes_moved = counters.pop(COUNT_BYTES, 0)
+        if counters:
+            lines.append("Operations: " + ", ".join(f"{name} {amount}" for name, amount in sorted(counters.items())))
+        lines.append(f"Moved: {bytes_moved / 1024 ** 2:.2f} MB")
+        latency = self.move_latency
+        if latency.count:
+            lines.append(f"Move latency: mean {_duration(latency.total / latency.count)}, "
+                         f"p50 <{_duration(latency.percentile(0.5))}, p90 <{_duration(latency.percentile(0.9))}, "
+                         f"p99 <{_duration(latency.percentile(0.99))}, max {_duration(latency.max)}")
+        return "\n".join(lines)
+
+
+class _NullStats:
+    """Stand-in used when no RunStats is given: records nothing, at the cost of a method call."""
+
+    enabled = False
+    _NO_PHASE = type("_NoPhase", (), {"__enter__": lambda self: None, "__exit__": lambda self, *exc: None})()
+
+    def start(self):
+        pass
+
+    def finish(self):
+        pass
+
+    def phase(self, name):
+        return self._NO_PHASE
+
+    def timed(self, name, iterable):
+        return iterable
+
+    def count(self, name, amount=1):
+        pass
+
+    def record_move(self, seconds):
+        pass
+
+
+NULL_STATS = _NullStats()
@@ -0,0 +1,301 @@
+import os
+import errno
+import shutil
+import stat
+from collections import namedtuple
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+# How a file got to its destination
+STRATEGY_RENAME = "rename"
+STRATEGY_COPY = "copy" # Streamed byte copy
+STRATEGY_REFLINK = "reflink" # Copy-on-write clone sharing the source's blocks (btrfs, XFS, ...)
+STRATEGY_HARDLINK = "hardlink" # A second name for the source file itself
+
+# What the sorter does with each file
+TRANSFER_MOVE = "move"
+TRANSFER_COPY = "copy" # Leave the source in place: reflink where possible, else a byte copy
+TRANSFER_LINK = "link" # Like TRANSFER_COPY, but hard-link before falling back to a byte copy
+TRANSFER_MODES = (TRANSFER_MOVE, TRANSFER_COPY, TRANSFER_LINK)
+
+# ioctl(dest_fd, FICLONE, src_fd) clones a whole file (Linux; _IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+# Bytes per copy_file_range/sendfile/read call on the cross-device path
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+TransferResult = namedtuple("TransferResult", ["path", "strategy", "bytes"])
+
+# Errors meaning "this zero-copy syscall can't do this pair of files", not "the copy failed"
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+
+# Errors meaning "this filesystem (pair) can't clone", so a clone is never tried there again
+_NO_CLONE_ERRNOS = _UNSUPPORTED_ERRNOS | {errno.ENOTTY}
+
+
+
+def device_of_dir(directory):
+    """Returns st_dev for directory. Runs cache it per folder (see utils.DirectoryHandles.device())."""
+    return os.stat(directory).st_dev
+
+
+class SourceChangedError(OSError):
+    """The source's size changed while it was copied; the copy isn't trustworthy."""
+
+
+def _copy_with(copy_chunk, src_fd, dst_fd, total, chunk_size, progress):
+    # Copy up to EOF, not up to total: the file may have grown since it was stat'ed
+    copied = 0
+    while True:
+        sent = copy_chunk(src_fd, dst_fd, chunk_size, copied)
+        if sent == 0:
+            return copied
+        copied += sent
+        if progress is not None:
+            progress(copied, max(total, copied))
+
+
+def _copy_file_range_chunk(src_fd, dst_fd, count, offset):
+    return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+
+
+def _sendfile_chunk(src_fd, dst_fd, count, offset):
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+def _read_write_chunk(src_fd, dst_fd, count, offset):
+    data = os.pread(src_fd, count, offset) if hasattr(os, "pread") else os.read(src_fd, count)
+    view = memoryview(data)
+    while view:
+        written = os.write(dst_fd, view)
+        view = view[written:]
+    return len(data)
+
+
+def _zero_copy_candidates():
+    candidates = []
+    if hasattr(os, "copy_file_range"):
+        candidates.append(_copy_file_range_chunk)
+    if hasattr(os, "sendfile") and os.name != 'nt':
+        candidates.append(_sendfile_chunk)
+    return candidates
+
+
+def stream_copy(src_path, dest_path, total=None, chunk_size=None, progress=None):
+    """Copies src_path over dest_path in chunks, using kernel-side copies where possible.
+
+    Tries copy_file_range, then sendfile, then plain reads and writes, falling back
+    whenever the kernel rejects a zero-copy call for this pair of files. The source
+    is copied to its end, whatever its size was when it was stat'ed.
+
+    Args:
+        src_path (str): The file to copy.
+        dest_path (str): The destination file; created or truncated.
+        total (int, optional): Size of src_path, if already known from a stat.
+        chunk_size (int, optional): Bytes per call. Defaults to DEFAULT_CHUNK_SIZE.
+        progress (callable, optional): Called as progress(bytes_copied, total) after each chunk.
+
+    Returns:
+        int: Number of bytes copied.
+
+    Raises:
+        SourceChangedError: If the source's size differs from the bytes copied once
+            done (it was written to meanwhile); dest_path then holds a partial copy.
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    flags = getattr(os, "O_BINARY", 0)
+    src_fd = os.open(src_path, os.O_RDONLY | flags)
+    try:
+        if total is None:
+            total = os.fstat(src_fd).st_size
+        dst_fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | flags, 0o666)
+        try:
+            copied = None
+            for copy_chunk in _zero_copy_candidates():
+                try:
+                    copied = _copy_with(copy_chunk, src_fd, dst_fd, total, chunk_size, progress)
+                    break
+                except OSError as e:
+                    if e.errno not in _UNSUPPORTED_ERRNOS:
+                        raise
+                    # Nothing usable was written, or the fallback simply overwrites it from the start
+                    os.ftruncate(dst_fd, 0)
+                    os.lseek(dst_fd, 0, os.SEEK_SET)
+            if copied is None:
+                os.lseek(src_fd, 0, os.SEEK_SET)
+                copied = _copy_with(_read_write_chunk, src_fd, dst_fd, total, chunk_size, progress)
+        finally:
+            os.close(dst_fd)
+        size = os.fstat(src_fd).st_size
+        if size != copied:
+            raise SourceChangedError(f"'{src_path}' changed while it was copied ({copied} of {size} bytes)")
+        return copied
+    finally:
+        os.close(src_fd)
+
+
+def move_file(src_path, dest_path, src_stat=None, chunk_size=None, progress=None, src_at=None, dest_at=None,
+              dest_device=None):
+    """Moves src_path to dest_path, by atomic rename when both are on the same device.
+
+    The device check happens up front (source stat vs. destination directory), so a
+    cross-device move goes straight to a chunked copy followed by deleting the source;
+    a source written to during the copy is kept (SourceChangedError is raised).
+    A symbolic link is moved itself, never its target: renamed, or recreated at
+    dest_path across devices. dest_path is overwritten if it exists (callers reserve it first).
+
+    Args:
+        src_path (str): The file to move.
+        dest_path (str): The destination path.
+        src_stat (os.stat_result, optional): Cached stat of src_path, e.g. from a ScanEntry;
+            for a symbolic link, its lstat. Looked up with lstat when not given.
+        chunk_size (int, optional): Bytes per call on the copy path.
+        progress (callable, optional): Called as progress(bytes_done, total).
+        src_at, dest_at (tuple, optional): (dir_fd, relative path) naming src_path and
+            dest_path relative to open directories; used for the stat and the rename
+            when both are given (see utils.DirectoryHandles).
+        dest_device (int, optional): st_dev of dest_path's folder, if already known.
+
+    Returns:
+        TransferResult: (path, strategy, bytes) describing what was done.
+    """
+    relative = src_at is not None and dest_at is not None
+    if src_stat is None:
+        src_stat = os.stat(src_at[1], dir_fd=src_at[0], follow_symlinks=False) if relative else os.lstat(src_path)
+    total = src_stat.st_size
+    is_link = stat.S_ISLNK(src_stat.st_mode)
+    if dest_device is None:
+        dest_device = device_of_dir(os.path.dirname(dest_path) or ".")
+
+    if src_stat.st_dev == dest_device or is_link:
+        try:
+            if relative:
+                os.replace(src_at[1], dest_at[1], src_dir_fd=src_at[0], dst_dir_fd=dest_at[0])
+            else:
+                os.replace(src_path, dest_path)
+            if progress is not None:
+                progress(total, total)
+            return TransferResult(dest_path, STRATEGY_RENAME, total)
+        except OSError as e:
+            if e.errno != errno.EXDEV: # e.g. bind mounts report one st_dev for two mounts
+                raise
+        if is_link:
+            _relink(src_path, dest_path)
+            if progress is not None:
+                progress(total, total)
+            return TransferResult(dest_path, STRATEGY_RENAME, total)
+
+    copied = stream_copy(src_path, dest_path, total=total, chunk_size=chunk_size, progress=progress)
+    shutil.copystat(src_path, dest_path)
+    os.remove(src_path)
+    return TransferResult(dest_path, STRATEGY_COPY, copied)
+
+
+def _relink(src_path, dest_path):
+    # Moves the symbolic link src_path to another filesystem: the same link, recreated over dest_path
+    temp_path = f"{dest_path}.{os.getpid()}.link"
+    os.symlink(os.readlink(src_path), temp_path)
+    try:
+        os.replace(temp_path, dest_path)
+    except OSError:
+        os.remove(temp_path)
+        raise
+    os.remove(src_path)
+
+
+def link_over(link_target, dest_path):
+    """Atomically replaces dest_path (e.g. a reserved placeholder) with a hard link to link_target."""
+    temp_path = f"{dest_path}.{os.getpid()}.link"
+    os.link(link_target, temp_path)
+    try:
+        os.replace(temp_path, dest_path)
+    except OSError:
+        os.remove(temp_path)
+        raise
+
+
+def clone_file(src_path, dest_path, no_clone_devices=None):
+    """Makes dest_path a copy-on-write clone of src_path with FICLONE; no data is copied.
+
+    no_clone_devices, if given, is a set of st_devs known not to clone: they aren't
+    tried, and a filesystem that rejects the clone is added. Share one per run
+    (see utils.DirectoryHandles), so a remounted filesystem is tried again later.
+
+    Returns:
+        bool: False if cloning isn't supported here (other OS, filesystem without
+        reflinks, different filesystems); dest_path may then be left empty.
+    """
+    if fcntl is None or not hasattr(fcntl, "ioctl"):
+        return False
+    src_fd = os.open(src_path, os.O_RDONLY)
+    try:
+        device = os.fstat(src_fd).st_dev
+        if no_clone_devices is not None and device in no_clone_devices:
+            return False
+        dst_fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        except OSError as e:
+            if e.errno not in _NO_CLONE_ERRNOS:
+                raise
+            if e.errno != errno.EXDEV and no_clone_devices is not None: # Across filesystems says nothing
+                no_clone_devices.add(device)
+            return False
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    return True
+
+
+def copy_file(src_path, dest_path, src_stat=None, chunk_size=None, progress=None, allow_hardlink=False,
+              dest_device=None, no_clone_devices=None):
+    """Copies src_path to dest_path, as cheaply as the filesystem allows; src_path is left alone.
+
+    Tries, in order: a copy-on-write clone (reflink), a hard link if allowed
+    (both only within one filesystem), and a streamed byte copy. A clone or a
+    copy gets the source's timestamps and permission bits. dest_path is
+    overwritten if it exists (callers reserve it first).
+
+    Args:
+        src_path (str): The file to copy.
+        dest_path (str): The destination path.
+        src_stat (os.stat_result, optional): Cached stat of src_path, e.g. from a ScanEntry.
+        chunk_size (int, optional): Bytes per call on the byte-copy path.
+        progress (callable, optional): Called as progress(bytes_done, total).
+        allow_hardlink (bool, optional): Allow a hard link, which shares the file itself:
+            changing the copy changes the original.
+        dest_device (int, optional): st_dev of dest_path's folder, if already known.
+        no_clone_devices (set, optional): Filesystems known not to clone (see clone_file()).
+
+    Returns:
+        TransferResult: (path, strategy, bytes); bytes is the file size for clones and links too.
+    """
+    if src_stat is None:
+        src_stat = os.stat(src_path)
+    total = src_stat.st_size
+    if dest_device is None:
+        dest_device = device_of_dir(os.path.dirname(dest_path) or ".")
+    same_device = src_stat.st_dev == dest_device
+
+    strategy = None
+    if same_device and clone_file(src_path, dest_path, no_clone_devices):
+        shutil.copystat(src_path, dest_path)
+        strategy = STRATEGY_REFLINK
+    elif same_device and allow_hardlink:
+        try:
+            link_over(src_path, dest_path)
+            strategy = STRATEGY_HARDLINK
+        except OSError: # No hard links on this filesystem, or too many links to the file already
+            pass
+    if strategy is not None:
+        if progress is not None:
+            progress(total, total)
+        return TransferResult(dest_path, strategy, total)
+
+    copied = stream_copy(src_path, dest_path, total=total, chunk_size=chunk_size, progress=progress)
+    shutil.copystat(src_path, dest_path)
+    return TransferResult(dest_path, STRATEGY_COPY, copied)
@@ -1,52 +1,521 @@
 import os
+import stat
+import queue
 import shutil
+import logging
 import pathlib
+import datetime
+import threading
+import time
 
-def move_file_safely(src_path, dest_path):
+from .stats import (
+    COUNT_BYTES, COUNT_COLLISIONS, COUNT_COPIES, COUNT_FAILURES, COUNT_HARDLINKS, COUNT_LINKS, COUNT_MKDIRS,
+    COUNT_REFLINKS, COUNT_RENAMES, COUNT_RESERVES, COUNT_STATS, NULL_STATS, PHASE_COLLISIONS, PHASE_MKDIR, PHASE_MOVE
+)
+from .transfer import (
+    STRATEGY_COPY, STRATEGY_HARDLINK, STRATEGY_REFLINK, STRATEGY_RENAME, TRANSFER_LINK, TRANSFER_MOVE,
+    TransferResult, copy_file, link_over, move_file
+)
+
+# Child of the engine logger, so these records go through the same (queued) handlers
+logger = logging.getLogger("FileSorterEngine.utils")
+
+# --- Logging helpers ---
+class BatchedFileHandler(logging.FileHandler):
+    """FileHandler that doesn't flush after every record.
+
+    Meant to be driven by BackgroundLogWriter, which flushes once per batch.
+    """
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+class BackgroundLogWriter:
+    """Drains a queue of log records on a daemon thread and hands them to handlers in batches.
+
+    Pair it with a logging.handlers.QueueHandler on the logger: emitting a record then
+    costs a queue put, and file writes and flushes happen off the hot path, once
+    per batch of up to `batch_size` records.
+    """
+
+    _STOP = object()
+
+    def __init__(self, log_queue, handlers, batch_size=512):
+        self.queue = log_queue
+        self.handlers = list(handlers)
+        self.batch_size = batch_size
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sorter-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Writes everything still queued, flushes, and stops the thread."""
+        if self._thread is None:
+            return
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+        for handler in self.handlers:
+            handler.close()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            stopping = False
+            for record in batch:
+                if record is self._STOP:
+                    stopping = True
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+            if stopping:
+                return
+# --- End Logging helpers ---
+
+_EXCLUSIVE_CREATE_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+
+class NameRegistry:
+    """Tracks the file names taken in destination directories, in memory.
+
+    Each directory is listed once, the first time it is used, and then kept up to
+    date as names are claimed. A per-(stem, extension) counter remembers where the
+    last ' (n)' search stopped, so handing out the next free name is O(1) amortized
+    instead of one os.path.exists probe per existing copy.
+
+    Instances are thread-safe.
+    """
+
+    def __init__(self):
+        self._taken = {} # directory -> set of normcased names
+        self._next_index = {} # (directory, normcased stem, normcased extension) -> next counter to try
+        self._lock = threading.Lock()
+
+    def _names_in(self, directory):
+        names = self._taken.get(directory)
+        if names is None:
+            try:
+                names = {os.path.normcase(name) for name in os.listdir(directory)}
+            except OSError: # Directory doesn't exist yet (or isn't readable): nothing taken
+                names = set()
+            self._taken[directory] = names
+        return names
+
+    def claim(self, dest_path):
+        """Picks a free path for dest_path, appending ' (n)' to the name if needed.
+
+        This only consults memory (plus one listing per directory); use reserve()
+        to also guard against files created by other processes.
+
+        Args:
+            dest_path (str): The desired destination path, including filename.
+
+        Returns:
+            str: The path that was claimed; it won't be handed out again.
+        """
+        directory, name = os.path.split(dest_path)
+        with self._lock:
+            names = self._names_in(directory)
+            if os.path.normcase(name) not in names:
+                names.add(os.path.normcase(name))
+                return dest_path
+
+            base_name = pathlib.Path(name).stem
+            extension = pathlib.Path(name).suffix
+            key = (directory, os.path.normcase(base_name), os.path.normcase(extension))
+            counter = self._next_index.get(key, 1)
+            final_name = f"{base_name} ({counter}){extension}"
+            # Only skips names that exist already; the counter never moves backwards.
+            while os.path.normcase(final_name) in names:
+                counter += 1
+                final_name = f"{base_name} ({counter}){extension}"
+            self._next_index[key] = counter + 1
+            names.add(os.path.normcase(final_name))
+            return os.path.join(directory, final_name)
+
+    def release(self, path):
+        """Gives back a claimed name that won't be used after all."""
+        directory, name = os.path.split(path)
+        with self._lock:
+            self._names_in(directory).discard(os.path.normcase(name))
+
+    def mark_taken(self, path):
+        """Records that path exists, e.g. because another process created it."""
+        directory, name = os.path.split(path)
+        with self._lock:
+            self._names_in(directory).add(os.path.normcase(name))
+
+    def reserve(self, dest_path, fallback_path=None, dir_fd=None):
+        """Atomically reserves dest_path on disk by exclusively creating an empty placeholder.
+
+        If the name turns out to be taken (another process got there first), the
+        next free name derived from fallback_path is claimed and tried instead.
+
+        Args:
+            dest_path (str): The path to reserve, typically returned by claim().
+            fallback_path (str, optional): The originally desired path, used to derive
+                ' (n)' names on conflict. Defaults to dest_path.
+            dir_fd (int, optional): An open descriptor of dest_path's directory; names in it
+                are then created relative to it instead of resolving the whole path.
+
+        Returns:
+            str: The reserved path. The caller must replace or remove the placeholder.
+        """
+        directory = os.path.dirname(dest_path)
+        candidate = dest_path
+        while True:
+            try:
+                if dir_fd is not None and os.path.dirname(candidate) == directory:
+                    os.close(os.open(os.path.basename(candidate), _EXCLUSIVE_CREATE_FLAGS, 0o666, dir_fd=dir_fd))
+                else:
+                    os.close(os.open(candidate, _EXCLUSIVE_CREATE_FLAGS, 0o666))
+                return candidate
+            except FileExistsError:
+                self.mark_taken(candidate)
+                candidate = self.claim(fallback_path or dest_path)
+
+# Directories DirectoryHandles keeps open at most; others are used by path
+DEFAULT_MAX_DIR_HANDLES = 256
+_DIRECTORY_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+
+class DirectoryHandles:
+    """Open descriptors of a run's source folder and destination folders.
+
+    Files are then renamed and created relative to these descriptors, so the
+    kernel only resolves their names instead of every component of long paths
+    again, and a source folder renamed or moved mid-run is still found. Each
+    destination folder is created (if missing) and opened once, the first time
+    it is needed or up front with prepare(); per file no existence check is left.
+
+    At most max_open folders are held open; beyond that, and on platforms whose
+    os.replace() takes no dir_fd (Windows), paths are used as before.
+    Thread-safe. Call close() (or use it as a context manager) when done.
+    """
+
+    # os.replace() isn't listed in supports_dir_fd, but shares os.rename()'s implementation
+    supported = {os.open, os.rename} <= os.supports_dir_fd
+
+    def __init__(self, src_dir=None, max_open=DEFAULT_MAX_DIR_HANDLES):
+        """
+        Args:
+            src_dir (str, optional): The folder the sources are in (or below).
+            max_open (int, optional): Descriptors held open at most.
+        """
+        self.max_open = max_open
+        self.created = 0 # Folders created by directory()/prepare()
+        self._fds = {} # directory path -> fd, or None if it isn't held open
+        self._devices = {} # directory path -> st_dev, for this run only
+        self.no_clone_devices = set() # st_devs that rejected a reflink this run (see transfer.clone_file())
+        self._lock = threading.Lock()
+        self._src_prefix = None
+        self._src_fd = None
+        if src_dir is not None and self.supported:
+            try:
+                self._src_fd = self._open(src_dir)
+                self._src_prefix = os.path.join(src_dir, "")
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self, directory):
+        return os.open(directory, _DIRECTORY_OPEN_FLAGS)
+
+    def directory(self, directory, quiet=False):
+        """Creates directory if needed (once) and returns its open descriptor, or None to use its path.
+
+        quiet doesn't log the creation, e.g. for folders created just in case.
+
+        Raises:
+            OSError: If the directory can't be created.
+        """
+        try:
+            return self._fds[directory]
+        except KeyError:
+            pass
+        with self._lock:
+            if directory in self._fds:
+                return self._fds[directory]
+            if not os.path.isdir(directory):
+                os.makedirs(directory, exist_ok=True)
+                self.created += 1
+                if not quiet:
+                    logger.info(f"Created directory: '{directory}'")
+            fd = None
+            if self.supported and len(self._fds) < self.max_open:
+                try:
+                    fd = self._open(directory)
+                except OSError: # Not readable: fall back to paths
+                    pass
+            self._fds[directory] = fd
+            return fd
+
+    def prepare(self, directories, quiet=False):
+        """Creates and opens every directory up front; returns the ones that failed as {directory: error}."""
+        errors = {}
+        for directory in sorted(set(directories)):
+            try:
+                self.directory(directory, quiet)
+            except OSError as e:
+                errors[directory] = e
+        return errors
+
+    def device(self, directory):
+        """Returns st_dev of directory, stat'ing it once per run (through its descriptor if open)."""
+        device = self._devices.get(directory)
+        if device is None:
+            fd = self._fds.get(directory)
+            device = os.fstat(fd).st_dev if fd is not None else os.stat(directory).st_dev
+            self._devices[directory] = device
+        return device
+
+    def source(self, path):
+        """Returns (dir_fd, relative path) naming path relative to the source folder, or None."""
+        if self._src_prefix is not None and path.startswith(self._src_prefix):
+            return self._src_fd, path[len(self._src_prefix):]
+        return None
+
+    def close(self):
+        with self._lock:
+            fds = [fd for fd in self._fds.values() if fd is not None]
+            if self._src_fd is not None:
+                fds.append(self._src_fd)
+            self._fds = {}
+            self._devices = {}
+            self.no_clone_devices = set()
+            self._src_fd = self._src_prefix = None
+        for fd in fds:
+            os.close(fd)
+
+# The stats counter of each transfer strategy
+_STRATEGY_COUNTERS = {
+    STRATEGY_RENAME: COUNT_RENAMES, STRATEGY_COPY: COUNT_COPIES, STRATEGY_REFLINK: COUNT_REFLINKS,
+    STRATEGY_HARDLINK: COUNT_HARDLINKS,
+}
+
+def move_file_safely(src_path, dest_path, entry=None, registry=None, fallback_path=None,
+                     chunk_size=None, progress=None, link_to=None, stats=None, handles=None):
     """Moves a file from src_path to dest_path, handling directory creation
     and avoiding overwrites by appending a number to the filename if needed.
 
     Args:
         src_path (str): The full path to the source file.
         dest_path (str): The full path to the desired destination, including filename.
+        entry (ScanEntry, optional): Scan record for src_path. When given, its cached
+            type information is trusted and the source is not stat'ed again.
+        registry (NameRegistry, optional): Registry used to pick a new name if dest_path
+            is taken. Share one across calls to avoid re-listing the destination.
+        fallback_path (str, optional): Path to derive ' (n)' names from when dest_path is
+            taken. Defaults to dest_path; the engine passes the unsuffixed name when
+            dest_path was already claimed during planning.
+        chunk_size (int, optional): Bytes per copy call when moving across devices.
+        progress (callable, optional): Called as progress(bytes_done, total) while the file moves.
+        link_to (str, optional): A file with the same content (dedupe hardlink mode). The
+            destination is created as a hard link to it and the source removed, so no
+            second copy is stored. Falls back to a normal move if linking fails.
+        stats (RunStats, optional): Records the time and operations this move takes.
+        handles (DirectoryHandles, optional): Open source and destination folders. The
+            destination folder is then created and checked once per run, not per file,
+            and the file is reserved and renamed relative to the open folders.
 
     Returns:
         str: The final destination path of the moved file, or None if move failed.
     """
-    if not os.path.isfile(src_path):
-        print(f"Error: Source file '{src_path}' not found or is not a file.")
+    result = transfer_file_safely(src_path, dest_path, entry, registry, fallback_path, chunk_size, progress, link_to,
+                                  stats, handles=handles)
+    return result.path if result is not None else None
+
+def transfer_file_safely(src_path, dest_path, entry=None, registry=None, fallback_path=None,
+                         chunk_size=None, progress=None, link_to=None, stats=None, transfer_mode=TRANSFER_MOVE,
+                         handles=None):
+    """Moves or copies a file like move_file_safely() does, and reports how.
+
+    Args:
+        src_path, dest_path, entry, registry, fallback_path, chunk_size, progress, link_to, stats, handles:
+            See move_file_safely(). In copy modes a dedupe link_to doesn't remove the source.
+        transfer_mode (str, optional): transfer.TRANSFER_MOVE, or TRANSFER_COPY / TRANSFER_LINK
+            to leave the source in place (see transfer.copy_file()).
+
+    Returns:
+        TransferResult: (final destination path, strategy, bytes), or None if it failed.
+    """
+    if stats is None or not stats.enabled:
+        return _transfer_file_safely(src_path, dest_path, entry, registry, fallback_path, chunk_size, progress,
+                                     link_to, NULL_STATS, transfer_mode, handles)
+    started = time.perf_counter()
+    result = _transfer_file_safely(src_path, dest_path, entry, registry, fallback_path, chunk_size, progress,
+                                   link_to, stats, transfer_mode, handles)
+    if result is None:
+        stats.count(COUNT_FAILURES)
+    else:
+        stats.record_move(time.perf_counter() - started)
+    return result
+
+def _transfer_file_safely(src_path, dest_path, entry, registry, fallback_path, chunk_size, progress, link_to, stats,
+                          transfer_mode, handles):
+    copying = transfer_mode != TRANSFER_MOVE
+    src_at = handles.source(src_path) if handles is not None else None
+    src_stat = None
+    if entry is not None:
+        is_file = entry.is_file
+    else:
+        stats.count(COUNT_STATS)
+        try:
+            if src_at is not None:
+                src_stat = os.stat(src_at[1], dir_fd=src_at[0], follow_symlinks=False)
+            else:
+                src_stat = os.lstat(src_path)
+            if stat.S_ISLNK(src_stat.st_mode): # Sorted by its target, moved as a link (see move_file())
+                is_file = os.path.isfile(src_path)
+                src_stat = None
+            else:
+                is_file = stat.S_ISREG(src_stat.st_mode)
+        except OSError:
+            is_file = False
+    if not is_file:
+        logger.error(f"Source file '{src_path}' not found or is not a file.")
         return None
 
     dest_dir = os.path.dirname(dest_path)
-    base_name = pathlib.Path(dest_path).stem
-    extension = pathlib.Path(dest_path).suffix
-    final_dest_path = dest_path
+    dest_fd = None
 
-    # Create destination directory if it doesn't exist
-    if not os.path.exists(dest_dir):
+    if handles is not None:
+        # Created and opened once per run (usually up front, by the engine)
         try:
-            os.makedirs(dest_dir)
-            print(f"Created directory: '{dest_dir}'")
+            dest_fd = handles.directory(dest_dir)
         except OSError as e:
-            print(f"Error creating directory '{dest_dir}': {e}")
+            logger.error(f"Error creating directory '{dest_dir}': {e}")
             return None
+    else:
+        # Create destination directory if it doesn't exist
+        stats.count(COUNT_STATS)
+        if not os.path.exists(dest_dir):
+            try:
+                with stats.phase(PHASE_MKDIR):
+                    os.makedirs(dest_dir, exist_ok=True)
+                stats.count(COUNT_MKDIRS)
+                logger.info(f"Created directory: '{dest_dir}'")
+            except OSError as e:
+                logger.error(f"Error creating directory '{dest_dir}': {e}")
+                return None
 
-    # Handle potential overwrites
-    counter = 1
-    while os.path.exists(final_dest_path):
-        final_dest_path = os.path.join(dest_dir, f"{base_name} ({counter}){extension}")
-        counter += 1
+    # Handle potential overwrites: exclusive-create the final name, so a file created
+    # concurrently by someone else is never clobbered.
+    if registry is None:
+        registry = NameRegistry()
+    try:
+        with stats.phase(PHASE_COLLISIONS):
+            final_dest_path = registry.reserve(dest_path, fallback_path, dir_fd=dest_fd)
+    except OSError as e:
+        logger.error(f"Error reserving destination '{dest_path}': {e}")
+        return None
+    stats.count(COUNT_RESERVES)
+    if final_dest_path != dest_path:
+        stats.count(COUNT_COLLISIONS)
 
-    # Move the file
+    if link_to is not None:
+        try:
+            with stats.phase(PHASE_MOVE):
+                link_over(link_to, final_dest_path)
+        except OSError as e: # No hard links here (FAT, across devices), or link_to's own move failed
+            logger.debug("Could not link '%s' to '%s' (%s); moving instead", final_dest_path, link_to, e)
+        else:
+            if not copying:
+                try:
+                    os.remove(src_path)
+                except OSError as e:
+                    logger.error(f"Error removing '{src_path}' after linking it to '{link_to}': {e}")
+                    os.remove(final_dest_path)
+                    return None
+            stats.count(COUNT_LINKS)
+            logger.debug("Linked '%s' to identical '%s' instead of sorting '%s'", final_dest_path, link_to, src_path)
+            return TransferResult(final_dest_path, STRATEGY_HARDLINK, 0)
+
+    # Move the file over the placeholder we own: a rename on the same device, a streamed copy otherwise.
+    # Copies try a clone or hard link first.
     try:
-        shutil.move(src_path, final_dest_path)
-        print(f"Moved '{os.path.basename(src_path)}' to '{final_dest_path}'")
-        return final_dest_path
+        with stats.phase(PHASE_MOVE):
+            if entry is not None and (copying or not entry.is_symlink): # A moved link is lstat'ed by move_file()
+                if not entry.has_stat:
+                    stats.count(COUNT_STATS)
+                src_stat = entry.stat()
+            dest_device = handles.device(dest_dir) if handles is not None else None
+            if copying:
+                result = copy_file(src_path, final_dest_path, src_stat=src_stat, chunk_size=chunk_size,
+                                   progress=progress, allow_hardlink=transfer_mode == TRANSFER_LINK,
+                                   dest_device=dest_device,
+                                   no_clone_devices=handles.no_clone_devices if handles is not None else None)
+            else:
+                dest_at = (dest_fd, os.path.basename(final_dest_path)) if dest_fd is not None else None
+                result = move_file(src_path, final_dest_path, src_stat=src_stat, chunk_size=chunk_size,
+                                   progress=progress, src_at=src_at, dest_at=dest_at, dest_device=dest_device)
+        stats.count(_STRATEGY_COUNTERS[result.strategy])
+        stats.count(COUNT_BYTES, result.bytes)
+        logger.debug("%s '%s' to '%s' (%s)", "Copied" if copying else "Moved", os.path.basename(src_path),
+                     final_dest_path, result.strategy)
+        return result
     except Exception as e:
-        print(f"Error moving file '{src_path}' to '{final_dest_path}': {e}")
+        logger.error(f"Error {'copying' if copying else 'moving'} file '{src_path}' to '{final_dest_path}': {e}")
+        try:
+            os.remove(final_dest_path) # Drop the placeholder (or partial copy); the source is still in place
+        except OSError:
+            pass
         return None
 
+# --- Size/date filter helpers ---
+_SIZE_UNITS = {
+    "b": 1, "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3, "tb": 1000 ** 4,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3, "tib": 1024 ** 4,
+}
+
+def parse_size(value):
+    """Parses a size such as 1048576, "10MB" or "1.5 GiB" into a number of bytes.
+
+    Raises:
+        ValueError: If value isn't a size.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    text = str(value).strip().lower().replace(" ", "")
+    number = text.rstrip("abcdefghijklmnopqrstuvwxyz")
+    unit = text[len(number):] or "b"
+    if unit not in _SIZE_UNITS:
+        raise ValueError(f"Unknown size unit in {value!r}")
+    try:
+        return int(float(number) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError(f"Invalid size: {value!r}") from None
+
+def parse_date(value):
+    """Parses an ISO date or date-time ("2024-05-01", "2024-05-01T12:00") into a local-time timestamp.
+
+    Raises:
+        ValueError: If value isn't an ISO date.
+    """
+    return datetime.datetime.fromisoformat(str(value)).timestamp()
+
 if __name__ == '__main__':
+    # Show the helper's log records on the console while running these checks
+    logging.basicConfig(level=logging.DEBUG, format='%(levelname)s - %(message)s')
+
     # Setup a test environment
     test_src_dir = "test_utils_src"
     test_dest_dir = "test_utils_dest"
@@ -0,0 +1,333 @@
+import os
+import stat
+import time
+import logging
+import threading
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError: # watchdog is optional; without it the watcher polls
+    FileSystemEventHandler = object
+    Observer = None
+
+from .file_rules import compile_rules
+from .journal import RUN_CANCELLED, RUN_COMPLETED, MoveJournal
+from .planner import category_folders, plan_paths
+from .scanner import scan_directory
+from .sorter_engine import ensure_logging, execute_plan
+
+logger = logging.getLogger("FileSorterEngine.watcher")
+
+# Seconds a file's size and mtime must stay unchanged before it is sorted
+DEFAULT_SETTLE_TIME = 2.0
+# Seconds between directory checks when no event source is available
+DEFAULT_POLL_INTERVAL = 5.0
+
+MODE_EVENTS = "events"
+MODE_POLLING = "polling"
+
+
+def _signature(path):
+    """Returns (size, mtime_ns) for path, or None if it is gone or not a regular file."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards watchdog events to a FolderWatcher (called on the observer thread)."""
+
+    def __init__(self, watcher):
+        super().__init__()
+        self._watcher = watcher
+
+    def on_created(self, event):
+        self._watcher.notify(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._watcher.notify(event.src_path)
+
+    def on_moved(self, event):
+        self._watcher.notify(event.dest_path)
+
+    def on_deleted(self, event):
+        self._watcher.forget(event.src_path)
+
+
+class FolderWatcher:
+    """Keeps a folder sorted: files are sorted shortly after they appear.
+
+    Changes come from watchdog (inotify, FSEvents, ReadDirectoryChangesW) when it
+    is installed, otherwise from polling: every poll_interval each watched
+    directory is stat'ed once and only directories whose mtime changed are listed.
+    With events the watch thread sleeps until something happens, so an idle
+    folder costs no CPU.
+
+    A new or changed file is only sorted once its size and mtime have been stable
+    for settle_time seconds, so files still being written or downloaded are left
+    alone. Files that settle around the same time are sorted in one pass.
+    Files the sorter leaves in place (no extension, ...) aren't planned again
+    until they change.
+    """
+
+    def __init__(self, src_dir, rules=None, recursive=False, settle_time=DEFAULT_SETTLE_TIME,
+                 poll_interval=DEFAULT_POLL_INTERVAL, use_polling=False, workers=1,
+                 journal_path=None, on_pass=None):
+        """
+        Args:
+            src_dir (str): The folder to keep sorted.
+            rules (dict, optional): Mapping of category -> extensions. Defaults to DEFAULT_RULES.
+            recursive (bool, optional): Also sort files that appear in subdirectories.
+            settle_time (float, optional): Seconds a file must stay unchanged before it is sorted.
+            poll_interval (float, optional): Seconds between checks in polling mode.
+            use_polling (bool, optional): Poll even if watchdog is available (e.g. network shares).
+            workers (int, optional): Threads moving files in each pass.
+            journal_path (str, optional): Record every pass as a run in this move journal.
+            on_pass (callable, optional): Called as on_pass(moved, skipped) after every pass,
+                on the watch thread.
+        """
+        self.src_dir = os.path.abspath(src_dir)
+        self.rules = compile_rules(rules)
+        self.recursive = recursive
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling or Observer is None
+        self.workers = workers
+        self.journal_path = journal_path
+        self.on_pass = on_pass
+        self.passes = 0
+
+        self._root = os.path.normcase(self.src_dir)
+        self._exclude = category_folders(self.src_dir, self.rules)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._pending = {} # path -> (signature, monotonic time of the last change)
+        self._settled = {} # path -> signature of files left in place by an earlier pass
+        self._dir_mtimes = {} # Polling: watched directory -> st_mtime_ns when it was last listed
+        self._observer = None
+        self._thread = None
+
+    @property
+    def mode(self):
+        """MODE_EVENTS or MODE_POLLING."""
+        return MODE_POLLING if self.use_polling else MODE_EVENTS
+
+    # --- Change intake (any thread) ---
+    def _is_watched(self, path):
+        """True if path lies where this watcher sorts files (never inside category folders)."""
+        directory = os.path.dirname(os.path.normcase(os.path.abspath(path)))
+        if not self.recursive:
+            return directory == self._root
+        while directory != self._root:
+            if directory in self._exclude or len(directory) <= len(self._root):
+                return False
+            directory = os.path.dirname(directory)
+        return True
+
+    def _queue(self, path, signature, restart):
+        """Adds path to the pending files. restart=False keeps an already pending file's timer."""
+        with self._lock:
+            if path in self._pending and not restart:
+                return
+            if self._settled.get(path) == signature:
+                return
+            self._pending[path] = (signature, time.monotonic())
+        self._wakeup.set()
+
+    def notify(self, path):
+        """Reports that path was created or changed. Thread-safe."""
+        if not self._is_watched(path):
+            return
+        if os.path.isdir(path):
+            if self.recursive: # A directory moved in brings files no event was sent for
+                self._scan(path)
+            return
+        signature = _signature(path)
+        if signature is None:
+            self.forget(path)
+        else:
+            self._queue(path, signature, restart=True)
+
+    def forget(self, path):
+        """Reports that path was removed. Thread-safe."""
+        with self._lock:
+            self._pending.pop(path, None)
+            self._settled.pop(path, None)
+
+    def _scan(self, directory):
+        """Lists directory, queueing files not seen yet (and, recursively, new subdirectories)."""
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns # Before listing, so changes made meanwhile aren't missed
+            entries = list(scan_directory(directory))
+        except OSError:
+            self._dir_mtimes.pop(directory, None)
+            return
+        self._dir_mtimes[directory] = mtime_ns
+        for entry in entries:
+            if entry.is_file:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                self._queue(entry.path, (st.st_size, st.st_mtime_ns), restart=False)
+            elif (entry.is_dir and self.recursive and not entry.is_symlink
+                  and entry.path not in self._dir_mtimes
+                  and os.path.normcase(entry.path) not in self._exclude):
+                self._scan(entry.path)
+
+    def _poll(self):
+        """Polling mode: lists only the watched directories whose mtime changed."""
+        for directory, mtime_ns in list(self._dir_mtimes.items()):
+            try:
+                changed = os.stat(directory).st_mtime_ns != mtime_ns
+            except OSError:
+                del self._dir_mtimes[directory]
+                continue
+            if changed:
+                self._scan(directory)
+
+    # --- Watch loop (watch thread) ---
+    def _next_timeout(self):
+        """Seconds until the watch loop has something to do, or None to sleep until woken."""
+        timeout = self.poll_interval if self.use_polling else None
+        with self._lock:
+            if self._pending:
+                due = min(changed_at for _, changed_at in self._pending.values()) + self.settle_time
+                wait = max(0.0, due - time.monotonic())
+                timeout = wait if timeout is None else min(timeout, wait)
+        return timeout
+
+    def _collect_ready(self):
+        """Removes and returns the pending files that have been stable for settle_time."""
+        ready = []
+        now = time.monotonic()
+        with self._lock:
+            pending = list(self._pending.items())
+        for path, record in pending:
+            signature, changed_at = record
+            if now - changed_at < self.settle_time:
+                continue
+            current = _signature(path)
+            with self._lock:
+                if self._pending.get(path) is not record: # Changed again meanwhile
+                    continue
+                if current is None:
+                    del self._pending[path]
+                elif current != signature: # Still being written: restart its timer
+                    self._pending[path] = (current, now)
+                else:
+                    del self._pending[path]
+                    ready.append(path)
+        return ready
+
+    def _sort_pass(self, paths, journal):
+        """Plans and executes one batch of settled files."""
+        plan = plan_paths(self.src_dir, sorted(paths), self.rules)
+        if journal is not None:
+            journal.start_run(self.src_dir)
+        try:
+            moved, skipped = execute_plan(plan, workers=self.workers, cancel_event=self._stop_event,
+                                          journal=journal)
+        finally:
+            if journal is not None:
+                journal.finish_run(RUN_CANCELLED if self._stop_event.is_set() else RUN_COMPLETED)
+        with self._lock:
+            for item in plan.skipped:
+                signature = _signature(item.source)
+                if signature is not None:
+                    self._settled[item.source] = signature
+        self.passes += 1
+        logger.info(f"Watch pass {self.passes} in '{self.src_dir}': {moved} file(s) moved, {skipped} item(s) skipped.")
+        if self.on_pass is not None:
+            self.on_pass(moved, skipped)
+
+    def _start_events(self):
+        if self.use_polling:
+            return
+        observer = Observer()
+        observer.schedule(_EventHandler(self), self.src_dir, recursive=self.recursive)
+        try:
+            observer.start()
+        except OSError as e: # e.g. the inotify watch limit is reached
+            logger.warning(f"Filesystem events unavailable for '{self.src_dir}' ({e}); polling instead.")
+            self.use_polling = True
+            return
+        self._observer = observer
+
+    def _stop_events(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def run(self):
+        """Watches and sorts until stop() is called. Blocks; see start() to run it on a thread."""
+        ensure_logging()
+        if not os.path.isdir(self.src_dir):
+            logger.error(f"Source directory '{self.src_dir}' not found or is not a directory.")
+            return
+        self._start_events() # Subscribe before the first listing, so nothing slips in between
+        self._scan(self.src_dir) # Files that were already there are sorted by the first pass
+        logger.info(f"Watching '{self.src_dir}' ({self.mode}).")
+        journal = MoveJournal(self.journal_path) if self.journal_path else None
+        try:
+            while not self._stop_event.is_set():
+                self._wakeup.wait(self._next_timeout())
+                self._wakeup.clear()
+                if self._stop_event.is_set():
+                    break
+                if self.use_polling:
+                    self._poll()
+                ready = self._collect_ready()
+                if ready:
+                    self._sort_pass(ready, journal)
+        finally:
+            self._stop_events()
+            if journal is not None:
+                journal.close()
+            logger.info(f"Stopped watching '{self.src_dir}'.")
+
+    def start(self):
+        """Runs the watcher on a background thread."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name="sorter-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stops watching; a pass in progress stops after the files already being moved."""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Keep a folder sorted by watching it for new files.")
+    parser.add_argument("src_dir")
+    parser.add_argument("--recursive", action="store_true", help="Also sort files appearing in subdirectories.")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_TIME,
+                        help="Seconds a file must stay unchanged before it is sorted.")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--polling", action="store_true", help="Poll even if watchdog is installed.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--journal", help="Record every pass in this move journal, for rollback.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    watcher = FolderWatcher(args.src_dir, recursive=args.recursive, settle_time=args.settle,
+                            poll_interval=args.poll_interval, use_polling=args.polling,
+                            workers=args.workers, journal_path=args.journal)
+    try:
+        watcher.run()
+    except KeyboardInterrupt: # run() unsubscribes and closes the journal on its way out
+        pass
@@ -0,0 +1,54 @@
+import asyncio
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+from sorter.aio import STATUS_MOVED, STATUS_SKIPPED, sort_async
+
+def make_files(root, count):
+    for i in range(count):
+        (root / f"photo{i}.jpg").write_text("x" * 10)
+
+def test_streams_an_event_per_item(tmp_path):
+    make_files(tmp_path, 3)
+    (tmp_path / "README").write_text("no extension")
+
+    async def consume():
+        async with sort_async(str(tmp_path), workers=2) as run:
+            return [event async for event in run], run
+
+    events, run = asyncio.run(consume())
+
+    assert sorted(event.status for event in events) == [STATUS_MOVED] * 3 + [STATUS_SKIPPED]
+    moved = [event for event in events if event.status == STATUS_MOVED]
+    assert all(Path(event.destination).parent == tmp_path / "Images" for event in moved)
+    assert sum(event.bytes for event in moved) == 30
+    assert run.summary[:4] == (3, 1, 0, 30)
+    assert not run.summary.cancelled
+
+def test_slow_consumer_holds_the_sort_back_and_cancelling_stops_it(tmp_path):
+    make_files(tmp_path, 20)
+
+    async def consume():
+        run = sort_async(str(tmp_path), max_pending=1, max_in_flight=1)
+        first = await run.__anext__()
+        await asyncio.sleep(0.3) # The sort waits for us meanwhile
+        moved_meanwhile = len(list((tmp_path / "Images").iterdir()))
+        summary = await run.aclose()
+        return first, moved_meanwhile, summary
+
+    first, moved_meanwhile, summary = asyncio.run(consume())
+
+    assert first.status == STATUS_MOVED
+    assert moved_meanwhile <= 3 # The event read, the one queued and the one waiting for room
+    assert summary.cancelled
+    assert summary.moved == len(list((tmp_path / "Images").iterdir())) < 20
+    assert len(list(tmp_path.glob("*.jpg"))) == 20 - summary.moved
+
+def test_unknown_transfer_mode_fails_before_starting(tmp_path):
+    with pytest.raises(ValueError):
+        sort_async(str(tmp_path), transfer_mode="teleport")
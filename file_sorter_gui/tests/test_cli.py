@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.cli import main
+
+def make_files(root):
+    (root / "photo.jpg").write_text("jpg")
+    (root / "notes.txt").write_text("txt")
+    (root / "README").write_text("no extension")
+
+def test_importing_the_cli_and_engine_has_no_side_effects(tmp_path):
+    # Guards the fast-startup path: no Qt, and no logs/ directory or handlers on import
+    code = ("import os, sys, logging, sorter.cli, sorter.sorter_engine; "
+            "assert not [m for m in sys.modules if m.split('.')[0] == 'PyQt5'], 'Qt was imported'; "
+            "assert not os.path.exists('logs'), 'logs/ was created'; "
+            "assert not logging.getLogger('FileSorterEngine').handlers, 'handlers were installed'")
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+def test_dry_run_prints_the_plan_as_json(tmp_path, capsys):
+    make_files(tmp_path)
+
+    assert main([str(tmp_path), "--dry-run", "--json"]) == 0
+
+    summary = json.loads(capsys.readouterr().out)
+    assert (summary["planned"], summary["skipped"]) == (2, 1)
+    assert {op["category"] for op in summary["plan"]["operations"]} == {"Images", "Documents"}
+    assert (tmp_path / "photo.jpg").exists() # Nothing moved
+
+def test_sort_with_workers_prints_a_json_summary(tmp_path, capsys):
+    make_files(tmp_path)
+
+    assert main([str(tmp_path), "--workers", "2", "--quiet", "--json"]) == 0
+
+    summary = json.loads(capsys.readouterr().out)
+    assert (summary["moved"], summary["skipped"]) == (2, 1)
+    assert (tmp_path / "Images" / "photo.jpg").exists()
+
+def test_missing_directory_fails(tmp_path, capsys):
+    assert main([str(tmp_path / "missing")]) == 1
+    assert "is not a directory" in capsys.readouterr().err
+
+def test_several_sources_report_per_source_throughput(tmp_path, capsys):
+    first, second, archive = tmp_path / "a", tmp_path / "b", tmp_path / "archive"
+    for source in (first, second):
+        source.mkdir()
+        make_files(source)
+
+    assert main([str(first), str(second), "--target", str(archive), "--quiet", "--json"]) == 0
+
+    summary = json.loads(capsys.readouterr().out)
+    assert (summary["moved"], summary["skipped"]) == (4, 2)
+    assert [source["moved"] for source in summary["sources"]] == [2, 2]
+    assert len(list((archive / "Images").iterdir())) == 2 # photo.jpg and photo (1).jpg
+
+def test_failed_moves_give_a_nonzero_exit_status(tmp_path, capsys):
+    source, archive = tmp_path / "src", tmp_path / "archive"
+    source.mkdir()
+    make_files(source)
+    archive.mkdir()
+    (archive / "Images").write_text("a file where the Images folder should go")
+
+    assert main([str(source), "--target", str(archive), "--quiet", "--json"]) == 2
+
+    summary = json.loads(capsys.readouterr().out)
+    assert (summary["moved"], summary["skipped"]) == (1, 2)
+    assert summary["errors"] >= 1
+    assert (source / "photo.jpg").exists()
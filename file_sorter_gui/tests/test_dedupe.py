@@ -0,0 +1,78 @@
+import os
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+from sorter.dedupe import DEDUPE_HARDLINK, DEDUPE_MOVE, DEDUPE_SKIP, PARTIAL_BLOCK, find_duplicate_groups
+from sorter.sorter_engine import sort_files_by_extension
+
+def test_staged_hashing_only_fully_hashes_survivors(tmp_path):
+    size = 4 * PARTIAL_BLOCK
+    base = bytearray(size)
+    files = {
+        "a": bytes(base),
+        "b": bytes(base), # Identical to a
+        "c": b"x" + bytes(base[1:]), # Differs in the first block: told apart by the partial hash
+        "d": bytes(base[:size // 2]) + b"x" + bytes(base[size // 2 + 1:]), # Differs in the middle only
+        "e": b"other size",
+    }
+    candidates = []
+    for name, content in files.items():
+        (tmp_path / name).write_bytes(content)
+        candidates.append((str(tmp_path / name), len(content)))
+
+    groups, stats = find_duplicate_groups(candidates, lambda path: True, workers=2)
+
+    assert groups == [[str(tmp_path / "a"), str(tmp_path / "b")]]
+    assert stats.partial_hashed == 4 # "e" has a unique size and is never read
+    assert stats.full_hashed == 3 # a, b and d; c dropped out after the partial hash
+    assert stats.duplicates == 1
+
+def make_redownload(src_dir):
+    (src_dir / "Images").mkdir()
+    (src_dir / "Images" / "photo.jpg").write_bytes(b"photo bytes")
+    (src_dir / "photo (copy).jpg").write_bytes(b"photo bytes")
+    (src_dir / "other.jpg").write_bytes(b"other bytes")
+
+@pytest.mark.parametrize("mode", [DEDUPE_SKIP, DEDUPE_MOVE, DEDUPE_HARDLINK])
+def test_dedupe_modes(tmp_path, mode):
+    make_redownload(tmp_path)
+
+    moved, skipped = sort_files_by_extension(str(tmp_path), dedupe=mode)
+
+    assert (tmp_path / "Images" / "other.jpg").exists()
+    duplicate = tmp_path / "photo (copy).jpg"
+    if mode == DEDUPE_SKIP:
+        assert (moved, skipped) == (1, 2) # The Images folder is skipped too
+        assert duplicate.exists()
+        assert not (tmp_path / "Images" / "photo (copy).jpg").exists()
+    elif mode == DEDUPE_MOVE:
+        assert (moved, skipped) == (2, 1)
+        assert (tmp_path / "Duplicates" / "photo (copy).jpg").read_bytes() == b"photo bytes"
+    else:
+        assert (moved, skipped) == (2, 1)
+        assert not duplicate.exists()
+        linked = tmp_path / "Images" / "photo (copy).jpg"
+        assert os.path.samefile(linked, tmp_path / "Images" / "photo.jpg")
+
+def test_hardlink_mode_links_duplicates_with_parallel_workers(tmp_path, monkeypatch):
+    import time
+    from sorter import utils
+    real_move = utils.move_file
+    def slow_move(src_path, dest_path, **kwargs):
+        time.sleep(0.01) # Originals are still moving when their duplicates come up
+        return real_move(src_path, dest_path, **kwargs)
+    monkeypatch.setattr(utils, "move_file", slow_move)
+    for i in range(20):
+        (tmp_path / f"a{i:02d}.jpg").write_bytes(f"photo {i}".encode())
+        (tmp_path / f"b{i:02d}.jpg").write_bytes(f"photo {i}".encode())
+
+    moved, skipped = sort_files_by_extension(str(tmp_path), dedupe=DEDUPE_HARDLINK, workers=4)
+
+    assert (moved, skipped) == (40, 0)
+    for i in range(20):
+        assert os.path.samefile(tmp_path / "Images" / f"a{i:02d}.jpg", tmp_path / "Images" / f"b{i:02d}.jpg")
@@ -0,0 +1,43 @@
+import pytest
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.file_rules import DEFAULT_RULES, RuleIndex, compile_rules
+
+def test_index_matches_default_rules():
+    """Every extension in DEFAULT_RULES resolves to its category, case-insensitively."""
+    index = compile_rules()
+    for category, extensions in DEFAULT_RULES.items():
+        for ext in extensions:
+            assert index.classify(f"file{ext}") == category
+            assert index.classify(f"FILE{ext.upper()}") == category
+    assert index.classify("unknown.xyz") is None
+    assert index.classify("file_no_ext") is None
+    assert index.classify(".bashrc") is None
+    assert index.classify("trailing.") is None
+
+def test_multi_part_suffixes():
+    """The longest configured suffix wins over a shorter one."""
+    index = compile_rules({"Archives": [".gz"], "Tarballs": [".tar.gz"]})
+    assert index.classify("backup.tar.gz") == "Tarballs"
+    assert index.classify("log.gz") == "Archives"
+    assert index.classify("photo.tar") is None
+
+def test_first_category_wins_and_index_is_cached():
+    rules = {"A": [".dup"], "B": ["dup", ".other"]}
+    index = compile_rules(rules)
+    assert index.classify("x.dup") == "A"
+    assert index.classify("x.other") == "B"  # Extensions are normalized to a leading dot
+    assert compile_rules(dict(rules)) is index
+    assert compile_rules(index) is index
+
+def test_index_is_immutable():
+    index = compile_rules()
+    assert isinstance(index, RuleIndex)
+    with pytest.raises(AttributeError):
+        index._max_parts = 3
+    with pytest.raises(TypeError):
+        index.extensions[".new"] = "Images"
@@ -0,0 +1,76 @@
+import os
+import subprocess
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.journal import (
+    RUN_COMPLETED, RUN_PARTIALLY_ROLLED_BACK, RUN_ROLLED_BACK, RUN_RUNNING, MoveJournal, rollback_run
+)
+from sorter.sorter_engine import sort_files_by_extension
+
+def test_journal_records_and_rolls_back_a_run(tmp_path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    names = [f"file{i}{ext}" for i, ext in enumerate([".jpg", ".txt", ".mp3"] * 5)]
+    for name in names:
+        (src_dir / name).write_text(name)
+    journal_path = str(tmp_path / "journal.sqlite3")
+
+    with MoveJournal(journal_path, batch_size=4) as journal:
+        moved, _ = sort_files_by_extension(str(src_dir), journal=journal)
+        run = journal.runs()[0]
+    assert moved == len(names)
+    assert (run.status, run.moves) == (RUN_COMPLETED, len(names))
+
+    # Simulate two conflicts: a sorted file went missing, and an original path got reused
+    os.remove(src_dir / "Images" / "file0.jpg")
+    (src_dir / "file1.txt").write_text("new file with the old name")
+
+    report = rollback_run(run.run_id, journal_path=journal_path, workers=4, batch_size=4)
+
+    assert report.restored == len(names) - 2
+    assert sorted(os.path.basename(source) for source, _, _ in report.conflicts) == ["file0.jpg", "file1.txt"]
+    assert (src_dir / "file1.txt").read_text() == "new file with the old name"
+    assert (src_dir / "Documents" / "file1.txt").exists() # Left in place, reported as a conflict
+    for name in names[2:]:
+        assert (src_dir / name).read_text() == name
+    with MoveJournal(journal_path) as journal:
+        assert journal.runs()[0].status == RUN_PARTIALLY_ROLLED_BACK # Two moves couldn't be undone
+
+CRASHING_SORT = """
+import os, sys
+sys.path.insert(0, {root!r})
+from sorter.journal import MoveJournal
+from sorter.sorter_engine import sort_files_by_extension
+journal = MoveJournal({journal!r}, flush_interval=3600) # Nothing confirmed before the crash
+moved = []
+def on_result(item, result):
+    moved.append(item)
+    if len(moved) == 5:
+        os._exit(1) # Killed mid-run: no flush, no finish_run()
+sort_files_by_extension({src!r}, journal=journal, on_result=on_result)
+"""
+
+def test_moves_made_before_a_crash_can_be_rolled_back(tmp_path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    names = [f"file{i:02d}.txt" for i in range(20)]
+    for name in names:
+        (src_dir / name).write_text(name)
+    journal_path = str(tmp_path / "journal.sqlite3")
+
+    script = CRASHING_SORT.format(root=str(PROJECT_ROOT), journal=journal_path, src=str(src_dir))
+    assert subprocess.run([sys.executable, "-c", script], cwd=str(tmp_path)).returncode == 1
+    assert len(os.listdir(src_dir / "Documents")) == 5
+    with MoveJournal(journal_path) as journal:
+        run = journal.runs()[0]
+    assert (run.status, run.moves) == (RUN_RUNNING, 0) # Only unconfirmed intents made it to disk
+
+    report = rollback_run(run.run_id, journal_path=journal_path)
+
+    assert (report.restored, report.conflicts) == (5, [])
+    assert sorted(os.listdir(src_dir)) == ["Documents"] + names
+    assert os.listdir(src_dir / "Documents") == []
@@ -0,0 +1,55 @@
+import os
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.planner import SKIP_DIRECTORY, SKIP_NO_EXTENSION, plan_sort
+from sorter.sorter_engine import execute_plan
+
+def make_tree(root):
+    (root / "photo.jpg").write_text("new photo")
+    (root / "notes.txt").write_text("notes")
+    (root / "README").write_text("no extension")
+    (root / "subfolder").mkdir()
+    (root / "Images").mkdir()
+    (root / "Images" / "photo.jpg").write_text("existing photo")
+
+def test_plan_is_a_dry_run(tmp_path):
+    make_tree(tmp_path)
+    before = sorted(os.listdir(tmp_path))
+
+    plan = plan_sort(str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == before
+    assert not (tmp_path / "Documents").exists()
+    destinations = {op.name: op.destination for op in plan.operations}
+    # The collision with the existing Images/photo.jpg is resolved in the plan itself
+    assert destinations["photo.jpg"] == str(tmp_path / "Images" / "photo (1).jpg")
+    assert destinations["notes.txt"] == str(tmp_path / "Documents" / "notes.txt")
+    reasons = {item.name: item.reason for item in plan.skipped}
+    assert reasons == {"README": SKIP_NO_EXTENSION, "subfolder": SKIP_DIRECTORY, "Images": SKIP_DIRECTORY}
+
+def test_execute_plan_applies_moves(tmp_path):
+    make_tree(tmp_path)
+    plan = plan_sort(str(tmp_path))
+
+    moved, skipped = execute_plan(plan)
+
+    assert (moved, skipped) == (2, 3)
+    assert (tmp_path / "Images" / "photo (1).jpg").read_text() == "new photo"
+    assert (tmp_path / "Images" / "photo.jpg").read_text() == "existing photo"
+    assert (tmp_path / "Documents" / "notes.txt").exists()
+
+def test_plan_diff(tmp_path):
+    make_tree(tmp_path)
+    first = plan_sort(str(tmp_path))
+    (tmp_path / "song.mp3").write_text("mp3")
+    second = plan_sort(str(tmp_path))
+
+    added, removed = second.diff(first)
+
+    assert added == [(str(tmp_path / "song.mp3"), str(tmp_path / "Audio" / "song.mp3"))]
+    assert removed == []
+    assert second.to_dict()["src_dir"] == str(tmp_path)
@@ -0,0 +1,60 @@
+import os
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.preview import SORT_NAME, SORT_SIZE, build_preview
+from sorter.scheduler import SortJob, sort_sources
+
+def make_tree(root):
+    (root / "photo.jpg").write_text("new photo")
+    (root / "big.png").write_text("x" * 500)
+    (root / "notes.txt").write_text("notes")
+    (root / "README").write_text("no extension")
+    (root / "Images").mkdir()
+    (root / "Images" / "photo.jpg").write_text("existing photo")
+
+def test_preview_rows_match_the_plan(tmp_path):
+    make_tree(tmp_path)
+
+    preview = build_preview([str(tmp_path)])
+
+    assert len(preview) == 3
+    assert preview.skipped == [2] # README and the Images folder stay put
+    rows = {Path(row.source).name: row for row in map(preview.row, range(len(preview)))}
+    assert rows["photo.jpg"].name == "photo (1).jpg" # Collision resolved as in the plan
+    assert rows["photo.jpg"].destination == str(tmp_path / "Images" / "photo (1).jpg")
+    assert rows["big.png"].size == 500
+    assert rows["notes.txt"].category == "Documents"
+    assert sorted(os.listdir(tmp_path)) == ["Images", "README", "big.png", "notes.txt", "photo.jpg"]
+
+def test_views_filter_and_sort_row_numbers(tmp_path):
+    make_tree(tmp_path)
+    preview = build_preview([str(tmp_path)])
+
+    images = preview.view(category="Images")
+    assert sorted(preview.name(row) for row in images) == ["big.png", "photo (1).jpg"]
+    assert list(preview.view(category="Video")) == []
+    by_size = preview.view(sort_key=SORT_SIZE, descending=True)
+    assert preview.name(by_size[0]) == "big.png"
+    by_name = preview.view(sort_key=SORT_NAME)
+    assert [preview.name(row) for row in by_name] == ["big.png", "notes.txt", "photo (1).jpg"]
+
+def test_excluded_rows_stay_in_place(tmp_path):
+    make_tree(tmp_path)
+    target = tmp_path / "archive"
+    preview = build_preview([(str(tmp_path), str(target))])
+    excluded = [row for row in range(len(preview)) if preview.name(row) == "notes.txt"]
+    preview.set_excluded(excluded)
+    assert preview.excluded_count() == 1
+
+    report = sort_sources([SortJob(str(tmp_path), str(target), preview.iter_items(0))])
+
+    assert report.moved == 2
+    assert report.skipped == 1 # The excluded file
+    assert (tmp_path / "notes.txt").exists()
+    assert (target / "Images" / "photo.jpg").read_text() == "new photo"
+    assert (target / "Images" / "big.png").exists()
+    assert not (target / "Documents").exists()
@@ -0,0 +1,112 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+from sorter.file_rules import RuleIndex
+from sorter.planner import plan_sort
+from sorter.rule_engine import RuleSet, load_rules
+from sorter.scanner import ScanEntry
+
+RULES = {
+    "rules": [
+        {"name": "Photos by month", "extensions": [".jpg"], "target": "{category}/{year}/{month}"},
+        {"name": "Screenshots", "priority": 5, "glob": "screenshot*", "target": "Images/Screenshots"},
+        {"name": "Big archives", "priority": 5, "extensions": ["zip"], "min_size": "1KiB", "target": "Archives/Large"},
+        {"name": "Invoices", "regex": "^invoice[-_]\\d+", "target": "Documents/Invoices"},
+    ]
+}
+
+def test_rules_are_evaluated_by_priority_and_criteria(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps(RULES))
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "Screenshot 1.jpg").write_text("x") # Both photo rules match; priority picks Screenshots
+    (src / "holiday.jpg").write_text("x")
+    os.utime(src / "holiday.jpg", (time.mktime((2024, 5, 17, 12, 0, 0, 0, 0, -1)),) * 2)
+    (src / "small.zip").write_bytes(b"z" * 10)
+    (src / "big.zip").write_bytes(b"z" * 2048)
+    (src / "invoice_0042.pdf").write_text("x")
+    (src / "Makefile").write_text("x")
+
+    rule_set = load_rules(str(rules_file))
+    plan = plan_sort(str(src), rule_set)
+
+    categories = {op.name: op.category for op in plan.operations}
+    assert categories == {
+        "Screenshot 1.jpg": "Images/Screenshots",
+        "holiday.jpg": "Images/2024/05",
+        "small.zip": "Archives",
+        "big.zip": "Archives/Large",
+        "invoice_0042.pdf": "Documents/Invoices",
+    }
+    assert {op.name: op.destination for op in plan.operations}["holiday.jpg"] == str(
+        src / "Images" / "2024" / "05" / "holiday.jpg")
+    assert [item.name for item in plan.skipped] == ["Makefile"]
+
+def test_stat_is_only_fetched_when_a_rule_needs_it(tmp_path):
+    rule_set = RuleSet(RULES["rules"])
+    for name in ("Screenshot 2.png", "notes.txt", "big.zip"):
+        (tmp_path / name).write_text("x")
+
+    entries = {name: ScanEntry(name, str(tmp_path / name), True, False) for name in os.listdir(tmp_path)}
+    assert rule_set.classify_entry(entries["Screenshot 2.png"]) == "Images/Screenshots"
+    assert rule_set.classify_entry(entries["notes.txt"]) == "Documents"
+    assert not entries["Screenshot 2.png"].has_stat and not entries["notes.txt"].has_stat
+    assert rule_set.classify_entry(entries["big.zip"]) == "Archives"
+    assert entries["big.zip"].has_stat
+
+def test_patterns_that_cannot_be_combined_still_match():
+    rule_set = RuleSet([
+        {"regex": "(a)\\1", "target": "Doubled"}, # Backreference: evaluated on its own
+        {"glob": "*.bak", "target": "Backups"},
+    ])
+    assert rule_set.classify("xaay.txt") == "Doubled"
+    assert rule_set.classify("old.bak") == "Backups"
+    assert rule_set.classify("plain.txt") == "Documents"
+
+def test_plain_extension_files_and_invalid_rules(tmp_path):
+    plain = tmp_path / "plain.json"
+    plain.write_text(json.dumps({"Notes": [".md"]}))
+    assert isinstance(load_rules(str(plain)), RuleIndex)
+
+    with pytest.raises(ValueError, match="unknown placeholder"):
+        RuleSet([{"target": "Images/{week}"}])
+    with pytest.raises(ValueError, match="inside the sorted directory"):
+        RuleSet([{"target": "../elsewhere"}])
+    with pytest.raises(ValueError, match="extensions must be a list"):
+        RuleSet([{"extensions": "jpg", "target": "Images"}])
+    with pytest.raises(ValueError, match="priority must be a number"):
+        RuleSet([{"priority": "high", "glob": "*", "target": "First"}, {"glob": "*", "target": "Second"}])
+
+def test_age_rules_use_the_evaluation_time_and_a_stable_fingerprint(tmp_path):
+    rules = [{"older_than_days": 30, "target": "Old"}]
+    (tmp_path / "report.txt").write_text("x")
+    month_ago = time.time() - 31 * 86400
+    os.utime(tmp_path / "report.txt", (month_ago, month_ago))
+    entry = ScanEntry.from_path(str(tmp_path / "report.txt"))
+
+    # The fingerprint (and so an incremental run's index) doesn't change from one run to the next
+    assert RuleSet(rules).fingerprint == RuleSet(rules, now=time.time() + 86400).fingerprint
+    assert RuleSet(rules).classify_entry(entry) == "Old"
+    assert RuleSet(rules, now=month_ago + 86400).classify_entry(entry) == "Documents"
+
+def test_recursive_rerun_with_dynamic_top_level_target_moves_nothing(tmp_path):
+    from sorter.sorter_engine import sort_files_by_extension
+    rules = RuleSet([{"glob": "*", "target": "{ext}/{year}"}])
+    (tmp_path / "a.jpg").write_text("jpg")
+    (tmp_path / "b.pdf").write_text("pdf")
+    assert sort_files_by_extension(str(tmp_path), rules=rules, recursive=True) == (2, 0)
+    sorted_files = sorted(str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*.*"))
+
+    moved, skipped = sort_files_by_extension(str(tmp_path), rules=rules, recursive=True)
+
+    assert (moved, skipped) == (0, 2)
+    assert sorted(str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*.*")) == sorted_files
@@ -0,0 +1,56 @@
+import os
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.scanner import scan_directory
+from sorter.sorter_engine import sort_files_by_extension
+
+def test_scan_directory_reports_types(tmp_path):
+    (tmp_path / "a.txt").write_text("hello")
+    (tmp_path / "sub").mkdir()
+
+    entries = {entry.name: entry for entry in scan_directory(str(tmp_path))}
+
+    assert set(entries) == {"a.txt", "sub"}
+    assert entries["a.txt"].is_file and not entries["a.txt"].is_dir
+    assert entries["sub"].is_dir and not entries["sub"].is_file
+    assert entries["a.txt"].path == str(tmp_path / "a.txt")
+    assert entries["a.txt"].stat().st_size == 5
+    assert entries["a.txt"].has_stat
+
+def test_sort_does_not_restat_sources(tmp_path, monkeypatch):
+    """The engine and move helper reuse scan records instead of calling isfile/isdir."""
+    (tmp_path / "photo.jpg").write_text("jpg")
+    (tmp_path / "sub").mkdir()
+
+    def fail(path):
+        raise AssertionError(f"unexpected type check on {path}")
+    monkeypatch.setattr(os.path, "isfile", fail)
+
+    moved, skipped = sort_files_by_extension(str(tmp_path))
+
+    assert (moved, skipped) == (1, 1)
+    assert (tmp_path / "Images" / "photo.jpg").exists()
+
+def test_walk_directory_streams_tree_with_limits(tmp_path):
+    from sorter.scanner import PRUNE_DEPTH, PRUNE_EXCLUDED, PRUNE_LOOP, PRUNE_SYMLINK, walk_directory
+    (tmp_path / "a" / "b" / "c").mkdir(parents=True)
+    (tmp_path / "top.txt").write_text("")
+    (tmp_path / "a" / "one.txt").write_text("")
+    (tmp_path / "a" / "b" / "two.txt").write_text("")
+    (tmp_path / "a" / "b" / "c" / "three.txt").write_text("")
+    (tmp_path / "Images").mkdir()
+    (tmp_path / "a" / "loop").symlink_to(tmp_path, target_is_directory=True)
+    exclude = {os.path.normcase(os.path.abspath(tmp_path / "Images"))}
+
+    def walk(**kwargs):
+        return {(e.name, reason) for e, reason in walk_directory(str(tmp_path), exclude=exclude, **kwargs)}
+
+    assert walk(max_depth=1) == {("top.txt", None), ("one.txt", None), ("Images", PRUNE_EXCLUDED),
+                                 ("b", PRUNE_DEPTH), ("loop", PRUNE_DEPTH)}
+    assert ("loop", PRUNE_SYMLINK) in walk()
+    assert walk(follow_symlinks=True) == {("top.txt", None), ("one.txt", None), ("two.txt", None),
+                                          ("three.txt", None), ("Images", PRUNE_EXCLUDED), ("loop", PRUNE_LOOP)}
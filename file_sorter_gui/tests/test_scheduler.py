@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter import scheduler
+from sorter.scheduler import DeviceSlots, SortJob, sort_sources
+
+def make_source(root, name, count=3):
+    source = root / name
+    source.mkdir()
+    for i in range(count):
+        (source / f"photo{i}.jpg").write_text("x" * 100)
+    return source
+
+def test_sorts_each_source_into_its_own_target(tmp_path):
+    inbox = make_source(tmp_path, "inbox")
+    downloads = make_source(tmp_path, "downloads", count=2)
+    archive = tmp_path / "archive"
+
+    report = sort_sources([SortJob(str(inbox), str(archive)), str(downloads)])
+
+    assert (report.moved, report.skipped) == (5, 0)
+    assert len(list((archive / "Images").iterdir())) == 3
+    assert len(list((downloads / "Images").iterdir())) == 2
+    assert [source.moved for source in report.sources] == [3, 2]
+    assert report.sources[0].bytes_moved == 300
+    assert all(source.error is None for source in report.sources)
+
+def test_jobs_on_one_disk_are_throttled_to_its_limit(tmp_path, monkeypatch):
+    sources = [make_source(tmp_path, f"src{i}", count=1) for i in range(4)]
+    running = []
+    peak = []
+    lock = threading.Lock()
+    original = scheduler.sort_files_by_extension
+
+    def tracking_sort(*args, **kwargs):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        try:
+            return original(*args, **kwargs)
+        finally:
+            with lock:
+                running.pop()
+
+    monkeypatch.setattr(scheduler, "sort_files_by_extension", tracking_sort)
+    report = sort_sources([str(source) for source in sources], per_device=2)
+
+    assert report.moved == 4
+    assert max(peak) == 2 # All sources are on the same disk
+
+def test_device_slots_take_all_disks_or_none():
+    slots = DeviceSlots({"a": 1, "b": 2})
+
+    assert slots.try_acquire({"a", "b"})
+    assert not slots.try_acquire({"a", "b"}) # "a" is full; "b" must not be taken either
+    assert slots.try_acquire({"b"})
+    slots.release({"a", "b"})
+    assert slots.try_acquire({"a"})
+
+def test_missing_source_is_reported_and_others_still_run(tmp_path):
+    inbox = make_source(tmp_path, "inbox")
+
+    report = sort_sources([str(tmp_path / "missing"), str(inbox)])
+
+    assert report.sources[0].error == "not a directory"
+    assert report.sources[1].moved == 3
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.planner import SKIP_NO_EXTENSION, plan_sort
+from sorter.scanner import ScanEntry
+from sorter.sniffer import ContentSniffer, match_signature
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+ZIP_HEADER = b"PK\x03\x04" + b"\x00" * 32
+
+def test_signatures():
+    assert match_signature(PNG_HEADER)[0] == ".png"
+    assert match_signature(b"RIFF\x00\x00\x00\x00WAVEfmt ")[0] == ".wav"
+    assert match_signature(b"\x00\x00\x00\x18ftypmp42")[0] == ".mp4"
+    assert match_signature(b"just some text") is None
+
+def test_plan_classifies_by_content(tmp_path):
+    (tmp_path / "scan").write_bytes(PNG_HEADER) # No extension
+    (tmp_path / "photo.txt").write_bytes(PNG_HEADER) # Wrong extension
+    (tmp_path / "report.docx").write_bytes(ZIP_HEADER) # A .docx is a zip: the name wins
+    (tmp_path / "notes").write_text("plain text")
+
+    with ContentSniffer(workers=4) as sniffer:
+        plan = plan_sort(str(tmp_path), sniffer=sniffer)
+
+    categories = {op.name: op.category for op in plan.operations}
+    assert categories == {"scan": "Images", "photo.txt": "Images", "report.docx": "Documents"}
+    assert [(item.name, item.reason) for item in plan.skipped] == [("notes", SKIP_NO_EXTENSION)]
+    # Without a sniffer nothing changes
+    assert {op.name: op.category for op in plan_sort(str(tmp_path)).operations} == {
+        "photo.txt": "Documents", "report.docx": "Documents"}
+
+def test_short_signatures_dont_overrule_the_name(tmp_path):
+    (tmp_path / "notes.txt").write_text("MZ-3 launch checklist")
+    (tmp_path / "data.csv").write_text("MZ,100\nMY,200\n")
+    (tmp_path / "tool").write_text("MZ-3 launch checklist") # No extension: the content decides
+    pe_header = bytearray(256)
+    pe_header[:2] = b"MZ"
+    pe_header[0x3C:0x40] = (0x80).to_bytes(4, "little")
+    pe_header[0x80:0x84] = b"PE\0\0"
+    (tmp_path / "setup.txt").write_bytes(bytes(pe_header)) # A real executable wins over the name
+
+    with ContentSniffer(workers=1) as sniffer:
+        plan = plan_sort(str(tmp_path), sniffer=sniffer)
+
+    assert {op.name: op.category for op in plan.operations} == {
+        "notes.txt": "Documents", "data.csv": "Uncategorized", "tool": "Executables", "setup.txt": "Executables"}
+
+def test_jpeg_and_mp3_are_classified_by_content(tmp_path):
+    jpeg = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00" + b"\x00" * 32
+    (tmp_path / "IMG_0001").write_bytes(jpeg)
+    (tmp_path / "IMG_0002.dat").write_bytes(jpeg)
+    (tmp_path / "song").write_bytes(b"ID3\x04\x00" + b"\x00" * 32)
+    (tmp_path / "song.bin").write_bytes(b"ID3\x04\x00" + b"\x00" * 32)
+    (tmp_path / "track").write_bytes(b"\xff\xfb\x90\x64" + b"\x00" * 32) # Bare MPEG frame, no tag
+
+    with ContentSniffer(workers=2) as sniffer:
+        plan = plan_sort(str(tmp_path), sniffer=sniffer)
+
+    assert {op.name: op.category for op in plan.operations} == {
+        "IMG_0001": "Images", "IMG_0002.dat": "Images", "song": "Audio", "song.bin": "Audio", "track": "Audio"}
+
+def test_cache_is_bounded_and_keyed_on_file_identity(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"file{i}"
+        path.write_bytes(PNG_HEADER)
+        paths.append(str(path))
+    sniffer = ContentSniffer(max_entries=3, workers=1)
+
+    sniffer.sniff_many(ScanEntry.from_path(path) for path in paths)
+    assert (sniffer.misses, sniffer.hits, len(sniffer)) == (5, 0, 3)
+    assert sniffer.sniff(ScanEntry.from_path(paths[-1])) == (".png",)
+    assert sniffer.hits == 1
+
+    Path(paths[-1]).write_bytes(ZIP_HEADER + b"changed") # New size and mtime: read again
+    assert sniffer.sniff(ScanEntry.from_path(paths[-1]))[0] == ".zip"
+    assert sniffer.misses == 6
@@ -11,6 +11,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from sorter.sorter_engine import sort_files_by_extension
 from sorter.file_rules import DEFAULT_RULES # To help verify categories
+from sorter.transfer import TRANSFER_COPY
 
 @pytest.fixture
 def temp_sorting_dir(tmp_path):
@@ -101,6 +102,151 @@ def test_sort_non_existent_directory(tmp_path, caplog):
 
     assert f"Source directory '{str(non_existent_dir)}' not found or is not a directory." in caplog.text
 
+def test_sort_parallel_matches_serial(tmp_path, caplog):
+    """A parallel run moves the same files as a serial run and logs them in plan order."""
+    import logging
+    from sorter.planner import plan_sort
+    from sorter.sorter_engine import execute_plan
+    caplog.set_level(logging.INFO)
+    names = [f"file{i:03d}{ext}" for i, ext in enumerate([".jpg", ".txt", ".mp3", ".xyz"] * 100)]
+    counts = {}
+    for workers in (1, 8):
+        src_dir = tmp_path / f"src_{workers}"
+        src_dir.mkdir()
+        for name in names:
+            (src_dir / name).write_text(name)
+        (src_dir / "Images").mkdir()
+        (src_dir / "Images" / "file000.jpg").write_text("already there")
+        caplog.clear()
+
+        plan = plan_sort(str(src_dir))
+        counts[workers] = execute_plan(plan, workers=workers)
+
+        moved_lines = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Moved ")]
+        assert moved_lines == [f"Moved '{op.name}' -> '{op.category}/'" for op in plan.operations]
+        assert (src_dir / "Images" / "file000 (1).jpg").read_text() == "file000.jpg"
+        assert sorted(os.listdir(src_dir / "Uncategorized")) == sorted(n for n in names if n.endswith(".xyz"))
+
+    assert counts[1] == counts[8] == (400, 1)
+
+def test_sort_reports_progress_and_can_be_cancelled(tmp_path):
+    """Progress events count every item; setting the cancel event stops the run early."""
+    import threading
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    for i in range(10):
+        (src_dir / f"file{i}.txt").write_text("12345")
+    cancel_event = threading.Event()
+    events = []
+
+    def on_progress(event):
+        events.append(event)
+        if event.files_done == 4:
+            cancel_event.set()
+
+    moved, skipped = sort_files_by_extension(str(src_dir), progress=on_progress, cancel_event=cancel_event)
+
+    assert (moved, skipped) == (4, 0)
+    assert [e.files_done for e in events] == [1, 2, 3, 4, 4]
+    assert events[0].files_total == 10 and events[0].bytes_total == 50
+    assert events[-1].cancelled and events[-1].bytes_done == 20
+    assert len(os.listdir(src_dir / "Documents")) == 4
+
+def test_sort_summary_logging_mode(temp_sorting_dir, caplog, monkeypatch):
+    """With per-file logging off, only summaries (plus warnings) are logged."""
+    import logging
+    from sorter import sorter_engine
+    monkeypatch.setattr(sorter_engine, "SUMMARY_LOG_INTERVAL", 0.0) # Summarize on every item
+    caplog.set_level(logging.INFO)
+
+    moved, skipped = sort_files_by_extension(str(temp_sorting_dir), log_each_file=False)
+
+    assert (moved, skipped) == (5, 2)
+    assert "Moved '" not in caplog.text
+    assert "Skipping directory" not in caplog.text
+    assert "so far." in caplog.text
+    assert "Summary: 5 file(s) moved, 2 item(s) skipped." in caplog.text
+
+def test_sort_recursive(temp_sorting_dir, caplog):
+    """Recursive mode flattens nested files into the category folders but never re-walks them."""
+    import logging
+    caplog.set_level(logging.INFO)
+    src_dir = temp_sorting_dir
+    (src_dir / "subfolder" / "deeper").mkdir()
+    (src_dir / "subfolder" / "deeper" / "image1.jpg").write_text("nested jpg with a clashing name")
+    (src_dir / "Images").mkdir()
+    (src_dir / "Images" / "already_sorted.png").write_text("png")
+
+    moved, skipped = sort_files_by_extension(str(src_dir), recursive=True)
+
+    assert (src_dir / "Documents" / "ignored_file.txt").exists()
+    assert {p.name for p in (src_dir / "Images").iterdir()} == {"image1.jpg", "image1 (1).jpg", "already_sorted.png"}
+    assert (src_dir / "file_no_ext").exists()
+    # 7 files moved; the no-extension file is skipped, the Images output folder isn't walked or counted
+    assert (moved, skipped) == (7, 1)
+    assert "Skipping directory: 'Images'" not in caplog.text
+
+def test_sort_recursive_large_folder_does_not_count_its_own_output(tmp_path, caplog):
+    """Category folders created while the root is still being listed are neither counted nor logged."""
+    import logging
+    caplog.set_level(logging.INFO)
+    extensions = (".jpg", ".txt", ".zip", ".py", ".mp3", ".xyz")
+    for i in range(3000): # Enough entries to span several getdents() batches of the root listing
+        (tmp_path / f"file_with_a_longish_name_{i:05d}{extensions[i % len(extensions)]}").write_text("x")
+    (tmp_path / "subfolder").mkdir()
+    (tmp_path / "subfolder" / "nested.pdf").write_text("pdf")
+
+    moved, skipped = sort_files_by_extension(str(tmp_path), recursive=True, log_each_file=False)
+
+    assert (moved, skipped) == (3001, 0)
+    assert "Skipping directory" not in caplog.text
+    assert len(list((tmp_path / "Uncategorized").iterdir())) == 500
+
+def test_sort_copy_mode_leaves_originals(temp_sorting_dir, tmp_path, caplog):
+    src_dir = str(temp_sorting_dir)
+    target = tmp_path / "organised"
+    before = sorted(os.listdir(src_dir))
+
+    moved, skipped = sort_files_by_extension(src_dir, target_dir=str(target), transfer_mode=TRANSFER_COPY)
+
+    assert (moved, skipped) == (5, 2) # The no-extension file and the subfolder stay out
+    assert sorted(os.listdir(src_dir)) == before
+    assert (target / "Images" / "image1.jpg").read_text() == "dummy jpg content"
+    # Every file reports how it was copied: a clone where the filesystem supports it, else bytes
+    assert "Copied 'image1.jpg' -> 'Images/' (" in caplog.text
+    assert "Copied by: " in caplog.text
+
+def test_sort_rejects_unknown_transfer_mode(temp_sorting_dir):
+    with pytest.raises(ValueError):
+        sort_files_by_extension(str(temp_sorting_dir), transfer_mode="teleport")
+
+def test_category_folders_are_created_up_front(temp_sorting_dir):
+    import threading
+    cancel_event = threading.Event()
+    def cancel_after_first(event):
+        cancel_event.set()
+
+    sort_files_by_extension(str(temp_sorting_dir), progress=cancel_after_first, cancel_event=cancel_event)
+
+    # Only one file moved, but every folder the plan needs already exists
+    for category in ("Images", "Documents", "Archives", "Code"):
+        assert (temp_sorting_dir / category).is_dir()
+
+def test_streamed_recursive_sort_creates_category_folders_before_walking(tmp_path):
+    (tmp_path / "photo.jpg").write_text("jpg")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "notes.txt").write_text("txt")
+    folders_at_first_move = []
+    def on_result(item, result):
+        if not folders_at_first_move:
+            folders_at_first_move.extend(p.name for p in tmp_path.iterdir() if p.is_dir())
+
+    assert sort_files_by_extension(str(tmp_path), recursive=True, on_result=on_result) == (2, 0)
+
+    assert {"Images", "Documents", "Video", "Uncategorized"} <= set(folders_at_first_move)
+    # Folders the run didn't need are removed again
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["Documents", "Images", "sub"]
+
 # To run tests from the file_sorter_gui directory:
 # Ensure pytest is installed in your venv.
 # Activate venv: .\venv\Scripts\Activate.ps1
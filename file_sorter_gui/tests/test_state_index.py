@@ -0,0 +1,72 @@
+import os
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter import state_index
+from sorter.state_index import ScanStateIndex
+from sorter.sorter_engine import sort_files_by_extension
+
+def count_scandir_calls(monkeypatch):
+    calls = []
+    real_scandir = os.scandir
+    def counting_scandir(path):
+        calls.append(path)
+        return real_scandir(path)
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+    return calls
+
+def test_unchanged_tree_is_not_relisted(tmp_path, monkeypatch):
+    src_dir = tmp_path / "src"
+    (src_dir / "a" / "b").mkdir(parents=True)
+    (src_dir / "a" / "photo.jpg").write_text("jpg")
+    (src_dir / "a" / "b" / "README").write_text("no extension")
+    (src_dir / "LICENSE").write_text("no extension")
+    state_path = str(tmp_path / "state.sqlite3")
+    calls = count_scandir_calls(monkeypatch)
+    # Every directory here was just modified; trust its mtime as if the filesystem's clock were exact
+    monkeypatch.setattr(state_index, "TIMESTAMP_GRANULARITY_NS", 0)
+
+    with ScanStateIndex(state_path) as state:
+        assert sort_files_by_extension(str(src_dir), recursive=True, state_index=state) == (1, 2)
+    # Directories the first run changed are listed once more; the new Images folder isn't reported
+    with ScanStateIndex(state_path) as state:
+        assert sort_files_by_extension(str(src_dir), recursive=True, state_index=state) == (0, 0)
+    calls.clear()
+    with ScanStateIndex(state_path) as state:
+        assert sort_files_by_extension(str(src_dir), recursive=True, state_index=state) == (0, 0)
+    assert calls == []
+
+    # A new file only makes its own directory get listed again
+    (src_dir / "a" / "b" / "new.txt").write_text("txt")
+    with ScanStateIndex(state_path) as state:
+        assert sort_files_by_extension(str(src_dir), recursive=True, state_index=state) == (1, 0)
+    assert calls == [str(src_dir / "a" / "b")]
+    assert (src_dir / "Documents" / "new.txt").exists()
+
+def test_directory_modified_in_the_tick_it_was_listed_is_listed_again(tmp_path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "README").write_text("no extension")
+    state_path = str(tmp_path / "state.sqlite3")
+    with ScanStateIndex(state_path) as state:
+        assert sort_files_by_extension(str(src_dir), state_index=state) == (0, 1)
+    # A file created right after the listing, within the same mtime tick
+    listed_mtime = os.stat(src_dir).st_mtime_ns
+    (src_dir / "late.txt").write_text("txt")
+    os.utime(src_dir, ns=(listed_mtime, listed_mtime))
+
+    with ScanStateIndex(state_path) as state:
+        assert sort_files_by_extension(str(src_dir), state_index=state) == (1, 0)
+    assert (src_dir / "Documents" / "late.txt").exists()
+
+def test_changed_rules_reset_the_index(tmp_path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "notes.md").write_text("markdown")
+    state_path = str(tmp_path / "state.sqlite3")
+    with ScanStateIndex(state_path) as state:
+        assert sort_files_by_extension(str(src_dir), state_index=state) == (1, 0)
+        assert sort_files_by_extension(str(src_dir), rules={"Notes": [".md"]}, state_index=state) == (0, 1)
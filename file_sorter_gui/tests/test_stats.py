@@ -0,0 +1,66 @@
+import json
+import time
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.sorter_engine import sort_files_by_extension
+from sorter.stats import LatencyHistogram, MetricsFileHook, RunHooks, RunStats
+
+def test_sort_records_counters_phases_and_latencies(tmp_path):
+    for name in ("a.jpg", "b.jpg", "notes.txt"):
+        (tmp_path / name).write_text("12345")
+    (tmp_path / "Images").mkdir()
+    (tmp_path / "Images" / "a.jpg").write_text("already sorted")
+    stats = RunStats()
+
+    assert sort_files_by_extension(str(tmp_path), stats=stats) == (3, 1)
+
+    counters = stats.counters
+    assert (counters["renames"], counters["mkdirs"], counters["collisions"]) == (3, 1, 1)
+    assert counters["bytes_moved"] == 15
+    assert stats.move_latency.count == 3
+    assert stats.phases["scan"] > 0 and stats.phases["move"] > 0
+    assert sum(stats.phases.values()) <= stats.wall_time
+
+def test_nested_phases_pause_their_parent():
+    stats = RunStats()
+    with stats.phase("outer"):
+        time.sleep(0.02)
+        with stats.phase("inner"):
+            time.sleep(0.05)
+
+    assert 0.02 <= stats.phases["outer"] < 0.05
+    assert stats.phases["inner"] >= 0.05
+
+def test_hooks_run_once_around_nested_runs(tmp_path):
+    calls = []
+
+    class Recorder(RunHooks):
+        def on_run_start(self, stats):
+            calls.append("start")
+
+        def on_run_end(self, stats):
+            calls.append("end")
+
+    metrics = tmp_path / "metrics.jsonl"
+    stats = RunStats([Recorder(), MetricsFileHook(str(metrics))])
+    stats.start()
+    stats.start() # e.g. sort_files_by_extension() inside sort_sources()
+    stats.count("renames", 2)
+    stats.finish()
+    stats.finish()
+
+    assert calls == ["start", "end"]
+    assert json.loads(metrics.read_text())["counters"] == {"renames": 2}
+
+def test_histogram_percentiles_are_bucket_upper_bounds():
+    histogram = LatencyHistogram()
+    for seconds in [0.0001] * 90 + [0.01] * 10:
+        histogram.record(seconds)
+
+    assert histogram.percentile(0.5) == 128e-6 # 100us falls in the bucket below 128us
+    assert histogram.percentile(0.99) == 0.01 # Capped at the maximum
+    assert histogram.count == 100
@@ -0,0 +1,183 @@
+import errno
+import os
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+from sorter import transfer
+from sorter.transfer import (
+    STRATEGY_COPY, STRATEGY_HARDLINK, STRATEGY_REFLINK, STRATEGY_RENAME, SourceChangedError, copy_file, move_file,
+    stream_copy
+)
+
+PAYLOAD = bytes(range(256)) * 1000 # 256 kB
+
+def test_same_device_move_is_a_rename(tmp_path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(PAYLOAD)
+    seen = []
+
+    result = move_file(str(src), str(tmp_path / "b.bin"), progress=lambda done, total: seen.append((done, total)))
+
+    assert result.strategy == STRATEGY_RENAME
+    assert result.bytes == len(PAYLOAD)
+    assert not src.exists()
+    assert seen == [(len(PAYLOAD), len(PAYLOAD))]
+
+def test_cross_device_move_streams_in_chunks(tmp_path, monkeypatch):
+    src = tmp_path / "a.bin"
+    src.write_bytes(PAYLOAD)
+    os.utime(src, (1_000_000, 1_000_000))
+    (tmp_path / "other").mkdir()
+    monkeypatch.setattr(transfer, "device_of_dir", lambda directory: -1) # Pretend it's another mount
+    seen = []
+
+    result = move_file(str(src), str(tmp_path / "other" / "a.bin"), chunk_size=64 * 1024,
+                       progress=lambda done, total: seen.append(done))
+
+    assert result.strategy == STRATEGY_COPY
+    assert (tmp_path / "other" / "a.bin").read_bytes() == PAYLOAD
+    assert os.stat(tmp_path / "other" / "a.bin").st_mtime == 1_000_000
+    assert not src.exists()
+    assert seen == [65536, 131072, 196608, 256000]
+
+def test_cross_device_move_copies_what_was_appended_after_the_scan(tmp_path, monkeypatch):
+    src = tmp_path / "a.log"
+    src.write_bytes(b"x" * 1000)
+    scanned = os.stat(src)
+    with open(src, "ab") as f:
+        f.write(b"y" * 5000)
+    (tmp_path / "other").mkdir()
+    monkeypatch.setattr(transfer, "device_of_dir", lambda directory: -1)
+
+    result = move_file(str(src), str(tmp_path / "other" / "a.log"), src_stat=scanned)
+
+    assert result.bytes == 6000
+    assert (tmp_path / "other" / "a.log").read_bytes() == b"x" * 1000 + b"y" * 5000
+    assert not src.exists()
+
+def test_cross_device_move_keeps_a_source_written_to_while_copying(tmp_path, monkeypatch):
+    src = tmp_path / "a.log"
+    src.write_bytes(PAYLOAD)
+    (tmp_path / "other").mkdir()
+    monkeypatch.setattr(transfer, "device_of_dir", lambda directory: -1)
+    real_chunk = transfer._read_write_chunk
+
+    def append_after_copying(src_fd, dst_fd, count, offset):
+        sent = real_chunk(src_fd, dst_fd, count, offset)
+        if sent == 0:
+            with open(src, "ab") as f: # The writer appends just after we reached EOF
+                f.write(b"late")
+        return sent
+    monkeypatch.setattr(transfer, "_zero_copy_candidates", lambda: [append_after_copying])
+
+    with pytest.raises(SourceChangedError):
+        move_file(str(src), str(tmp_path / "other" / "a.log"))
+
+    assert src.read_bytes() == PAYLOAD + b"late"
+
+def test_symlink_to_another_device_is_moved_as_a_link(tmp_path, monkeypatch):
+    target = tmp_path / "elsewhere.jpg"
+    target.write_bytes(PAYLOAD)
+    link = tmp_path / "pic.jpg"
+    link.symlink_to(target)
+    (tmp_path / "Images").mkdir()
+    followed = os.stat(link)
+    # The target's device differs from the destination's (e.g. a link into /dev/shm)
+    monkeypatch.setattr(transfer, "device_of_dir", lambda directory: followed.st_dev + 1)
+
+    result = move_file(str(link), str(tmp_path / "Images" / "pic.jpg"))
+
+    assert result.strategy == STRATEGY_RENAME
+    assert os.readlink(tmp_path / "Images" / "pic.jpg") == str(target)
+    assert not os.path.lexists(link)
+    assert target.read_bytes() == PAYLOAD
+
+def test_symlink_is_recreated_when_it_cant_be_renamed_across_devices(tmp_path, monkeypatch):
+    target = tmp_path / "elsewhere.jpg"
+    target.write_bytes(PAYLOAD)
+    link = tmp_path / "pic.jpg"
+    link.symlink_to(target)
+    (tmp_path / "Images").mkdir()
+    dest = tmp_path / "Images" / "pic.jpg"
+    dest.write_bytes(b"") # The reserved placeholder
+    real_replace = os.replace
+    def replace(src, dst, **kwargs):
+        if src == str(link):
+            raise OSError(errno.EXDEV, "cross-device")
+        return real_replace(src, dst, **kwargs)
+    monkeypatch.setattr(os, "replace", replace)
+
+    result = move_file(str(link), str(dest))
+
+    assert result.strategy == STRATEGY_RENAME
+    assert os.readlink(dest) == str(target)
+    assert not os.path.lexists(link)
+    assert target.read_bytes() == PAYLOAD
+
+def test_stream_copy_falls_back_when_zero_copy_is_unsupported(tmp_path, monkeypatch):
+    def unsupported(src_fd, dst_fd, count, offset):
+        raise OSError(errno.EXDEV, "cross-device")
+    monkeypatch.setattr(transfer, "_zero_copy_candidates", lambda: [unsupported])
+    src = tmp_path / "a.bin"
+    src.write_bytes(PAYLOAD)
+
+    copied = stream_copy(str(src), str(tmp_path / "b.bin"), chunk_size=100_000)
+
+    assert copied == len(PAYLOAD)
+    assert (tmp_path / "b.bin").read_bytes() == PAYLOAD
+
+def test_copy_file_falls_back_from_clone_to_link_to_copy(tmp_path, monkeypatch):
+    src = tmp_path / "a.bin"
+    src.write_bytes(PAYLOAD)
+    # No reflinks here
+    monkeypatch.setattr(transfer, "clone_file", lambda src_path, dest_path, no_clone_devices=None: False)
+
+    linked = copy_file(str(src), str(tmp_path / "linked.bin"), allow_hardlink=True)
+    copied = copy_file(str(src), str(tmp_path / "copied.bin"))
+
+    assert linked.strategy == STRATEGY_HARDLINK
+    assert os.stat(tmp_path / "linked.bin").st_ino == os.stat(src).st_ino
+    assert copied.strategy == STRATEGY_COPY
+    assert (tmp_path / "copied.bin").read_bytes() == PAYLOAD
+    assert os.stat(tmp_path / "copied.bin").st_ino != os.stat(src).st_ino
+    assert src.read_bytes() == PAYLOAD # The original stays
+
+def test_copy_file_prefers_a_clone(tmp_path, monkeypatch):
+    def fake_clone(src_path, dest_path, no_clone_devices=None):
+        Path(dest_path).write_bytes(Path(src_path).read_bytes())
+        return True
+    monkeypatch.setattr(transfer, "clone_file", fake_clone)
+    src = tmp_path / "a.bin"
+    src.write_bytes(PAYLOAD)
+    os.utime(src, (1_000_000, 1_000_000))
+
+    result = copy_file(str(src), str(tmp_path / "b.bin"), allow_hardlink=True)
+
+    assert result.strategy == STRATEGY_REFLINK
+    assert result.bytes == len(PAYLOAD)
+    assert os.stat(tmp_path / "b.bin").st_mtime == 1_000_000
+
+def test_filesystems_that_cant_clone_are_remembered_per_run(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from sorter.utils import DirectoryHandles
+    calls = []
+    def ioctl(fd, request, arg):
+        calls.append(request)
+        raise OSError(errno.EOPNOTSUPP, "no reflinks")
+    monkeypatch.setattr(transfer, "fcntl", SimpleNamespace(ioctl=ioctl))
+    src = tmp_path / "a.bin"
+    src.write_bytes(PAYLOAD)
+
+    handles = DirectoryHandles()
+    for name in ("b.bin", "c.bin"):
+        result = copy_file(str(src), str(tmp_path / name), no_clone_devices=handles.no_clone_devices)
+        assert result.strategy == STRATEGY_COPY
+    assert len(calls) == 1 # The second copy didn't try again
+    assert handles.no_clone_devices == {os.stat(src).st_dev}
+    handles.close() # A later run (e.g. after a remount) tries again
+    assert handles.no_clone_devices == set()
@@ -0,0 +1,119 @@
+import logging
+import logging.handlers
+import os
+import queue
+from pathlib import Path
+
+import pytest
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.utils import BackgroundLogWriter, BatchedFileHandler, DirectoryHandles, NameRegistry, move_file_safely
+
+def test_registry_hands_out_sequential_names(tmp_path):
+    (tmp_path / "IMG_0001.jpg").write_text("a")
+    (tmp_path / "IMG_0001 (2).jpg").write_text("b")
+    registry = NameRegistry()
+    target = str(tmp_path / "IMG_0001.jpg")
+
+    names = [os.path.basename(registry.claim(target)) for _ in range(3)]
+
+    # '(2)' already exists on disk, so it is skipped
+    assert names == ["IMG_0001 (1).jpg", "IMG_0001 (3).jpg", "IMG_0001 (4).jpg"]
+    assert os.path.basename(registry.claim(str(tmp_path / "other.jpg"))) == "other.jpg"
+
+def test_reserve_falls_back_when_file_appears_concurrently(tmp_path):
+    registry = NameRegistry()
+    claimed = registry.claim(str(tmp_path / "photo.jpg"))
+    # Another process creates the claimed name after the registry listed the directory
+    (tmp_path / "photo.jpg").write_text("someone else")
+
+    reserved = registry.reserve(claimed)
+
+    assert reserved == str(tmp_path / "photo (1).jpg")
+    assert (tmp_path / "photo.jpg").read_text() == "someone else"
+
+def test_move_file_safely_never_overwrites(tmp_path):
+    src = tmp_path / "src"
+    dest = tmp_path / "dest"
+    src.mkdir()
+    registry = NameRegistry()
+    results = []
+    for i in range(3):
+        (src / "file.txt").write_text(f"copy {i}")
+        results.append(move_file_safely(str(src / "file.txt"), str(dest / "file.txt"), registry=registry))
+
+    assert [os.path.basename(r) for r in results] == ["file.txt", "file (1).txt", "file (2).txt"]
+    assert [Path(r).read_text() for r in results] == ["copy 0", "copy 1", "copy 2"]
+    assert move_file_safely(str(src / "missing.txt"), str(dest / "missing.txt")) is None
+
+@pytest.mark.skipif(not DirectoryHandles.supported, reason="needs dir_fd support")
+def test_moves_relative_to_open_folders_survive_a_renamed_source(tmp_path):
+    src = tmp_path / "inbox"
+    dest = tmp_path / "sorted" / "Documents"
+    src.mkdir()
+    (src / "a.txt").write_text("a")
+    (src / "b.txt").write_text("b")
+
+    with DirectoryHandles(str(src)) as handles:
+        assert handles.prepare([str(dest)]) == {}
+        assert handles.created == 1
+        assert move_file_safely(str(src / "a.txt"), str(dest / "a.txt"), handles=handles)
+        os.rename(src, tmp_path / "inbox-renamed") # The user renames the folder mid-run
+        result = move_file_safely(str(src / "b.txt"), str(dest / "b.txt"), handles=handles)
+
+    assert result == str(dest / "b.txt")
+    assert (dest / "b.txt").read_text() == "b"
+    assert os.listdir(tmp_path / "inbox-renamed") == []
+
+def test_move_file_safely_moves_a_symlink_not_its_target(tmp_path, monkeypatch):
+    from sorter import transfer
+    from sorter.scanner import ScanEntry
+    target = tmp_path / "x.jpg"
+    target.write_text("target")
+    (tmp_path / "src").mkdir()
+    link = tmp_path / "src" / "pic.jpg"
+    link.symlink_to(target)
+    entry = ScanEntry.from_path(str(link)) # Its stat() follows the link
+    monkeypatch.setattr(transfer, "device_of_dir", lambda directory: entry.stat().st_dev + 1)
+
+    result = move_file_safely(str(link), str(tmp_path / "Images" / "pic.jpg"), entry=entry)
+
+    assert result == str(tmp_path / "Images" / "pic.jpg")
+    assert os.path.islink(result) and os.readlink(result) == str(target)
+    assert not os.path.lexists(link)
+
+def test_folder_devices_are_cached_per_run_only(tmp_path, monkeypatch):
+    stats = []
+    real_stat = os.stat
+    def counting_stat(path, *args, **kwargs):
+        stats.append(path)
+        return real_stat(path, *args, **kwargs)
+    monkeypatch.setattr(os, "stat", counting_stat)
+
+    handles = DirectoryHandles(max_open=0) # Paths only, so devices come from os.stat()
+    device = handles.device(str(tmp_path))
+    assert handles.device(str(tmp_path)) == device == real_stat(tmp_path).st_dev
+    assert stats.count(str(tmp_path)) == 1
+    handles.close() # A later run (e.g. after a remount) looks again
+    handles.device(str(tmp_path))
+    assert stats.count(str(tmp_path)) == 2
+
+def test_background_log_writer_writes_queued_records(tmp_path):
+    log_queue = queue.SimpleQueue()
+    handler = BatchedFileHandler(str(tmp_path / "test.log"))
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    writer = BackgroundLogWriter(log_queue, [handler], batch_size=8)
+    test_logger = logging.getLogger("test_background_log_writer")
+    test_logger.propagate = False
+    test_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    writer.start()
+
+    for i in range(50):
+        test_logger.warning(f"record {i}")
+    writer.stop()
+
+    lines = (tmp_path / "test.log").read_text().splitlines()
+    assert lines == [f"WARNING record {i}" for i in range(50)]
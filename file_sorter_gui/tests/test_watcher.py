@@ -0,0 +1,51 @@
+import os
+import time
+from pathlib import Path
+
+import sys
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sorter.watcher import FolderWatcher
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+def test_polling_watcher_sorts_new_files(tmp_path):
+    (tmp_path / "existing.jpg").write_text("jpg")
+    (tmp_path / "README").write_text("no extension")
+    passes = []
+    watcher = FolderWatcher(str(tmp_path), settle_time=0.1, poll_interval=0.05, use_polling=True,
+                            on_pass=lambda moved, skipped: passes.append((moved, skipped)))
+    watcher.start()
+    try:
+        assert wait_for(lambda: (tmp_path / "Images" / "existing.jpg").exists())
+        (tmp_path / "later.pdf").write_text("pdf")
+        assert wait_for(lambda: (tmp_path / "Documents" / "later.pdf").exists())
+    finally:
+        watcher.stop()
+    assert (tmp_path / "README").exists()
+    assert sum(moved for moved, _ in passes) == 2
+    assert sum(skipped for _, skipped in passes) == 1 # README is not planned again
+
+def test_file_still_being_written_is_not_sorted(tmp_path):
+    watcher = FolderWatcher(str(tmp_path), settle_time=0.5, poll_interval=0.05, use_polling=True)
+    watcher.start()
+    try:
+        growing = tmp_path / "download.zip"
+        with open(growing, "wb") as f:
+            for _ in range(10):
+                f.write(b"x" * 1024)
+                f.flush()
+                os.fsync(f.fileno())
+                time.sleep(0.1)
+                assert growing.exists()
+        assert wait_for(lambda: (tmp_path / "Archives" / "download.zip").exists())
+    finally:
+        watcher.stop()
+    assert (tmp_path / "Archives" / "download.zip").stat().st_size == 10 * 1024